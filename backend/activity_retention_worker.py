@@ -0,0 +1,50 @@
+"""
+Activity retention worker.
+
+Keeps monthly activity_logs partitions created ahead and rolls up and drops
+months older than ACTIVITY_RETENTION_MONTHS. Runs as its own process against
+the same database as the API:
+
+	python activity_retention_worker.py
+"""
+import logging
+import os
+import signal
+import threading
+
+from app.activity_retention import apply_retention, ensure_partitions
+from app.database import SessionLocal
+
+RUN_INTERVAL_SECONDS = float(os.getenv("ACTIVITY_RETENTION_INTERVAL_SECONDS", "3600"))
+
+logger = logging.getLogger("activity_retention_worker")
+
+stop_event = threading.Event()
+
+
+def _stop(signum, frame):
+	logger.info("Received signal %s, stopping after the current run", signum)
+	stop_event.set()
+
+
+def main():
+	logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+	signal.signal(signal.SIGTERM, _stop)
+	signal.signal(signal.SIGINT, _stop)
+	
+	logger.info("Applying activity retention every %ss", RUN_INTERVAL_SECONDS)
+	while not stop_event.is_set():
+		db = SessionLocal()
+		try:
+			ensure_partitions(db)
+			apply_retention(db)
+		except Exception:
+			logger.exception("Activity retention run failed")
+			db.rollback()
+		finally:
+			db.close()
+		stop_event.wait(RUN_INTERVAL_SECONDS)
+
+
+if __name__ == "__main__":
+	main()
@@ -1,8 +1,24 @@
+import base64
 import json
-from typing import Optional, Dict, Any
-from sqlalchemy.orm import Session
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List, Sequence, Tuple
+from sqlalchemy import Text, cast, func, literal, tuple_, type_coerce
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session, selectinload
+from fastapi import HTTPException, status
 
-from app.models import ActivityLog, ActivityActionType, ActivityEntityType
+from app import activity_diff, activity_digest, activity_writer, schemas
+from app.models import ActivityLog, ActivityActionType, ActivityEntityType, utcnow
+from app.authorization import viewable_list_ids
+
+
+# Consecutive updates of the same todo or list by the same user within this
+# many seconds are merged into one entry; 0 disables merging
+COALESCE_SECONDS = float(os.getenv("ACTIVITY_COALESCE_SECONDS", "30"))
 
 
 def log_activity(
@@ -15,8 +31,6 @@ def log_activity(
 	todo_id: Optional[int] = None,
 	details: Optional[Dict[str, Any]] = None
 ) -> ActivityLog:
-	details_json = json.dumps(details) if details else None
-	
 	activity = ActivityLog(
 		user_id=user_id,
 		list_id=list_id,
@@ -24,16 +38,78 @@ def log_activity(
 		action_type=action_type,
 		entity_type=entity_type,
 		entity_id=entity_id,
-		details=details_json
+		details=details or None
 	)
 	
+	# Buffered mode: written in batches after the caller commits (see app.activity_writer)
+	if activity_writer.get_writer() is not None:
+		activity_writer.defer(db, activity)
+		return activity
+	
+	# Joins the caller's transaction: the caller commits the entry together with its change
 	db.add(activity)
-	db.commit()
-	db.refresh(activity)
+	db.flush()
+	activity_digest.record(db, [{key: getattr(activity, key) for key in activity_digest.ROW_KEYS}])
 	
 	return activity
 
 
+def _coalesce_update(
+	db: Session,
+	user_id: int,
+	entity_type: str,
+	entity_id: int,
+	name: str,
+	changes: Dict[str, Any],
+	scope
+) -> Optional[ActivityLog]:
+	"""
+	Merge an update into the entity's latest entry when that entry is an update
+	by the same user from the last COALESCE_SECONDS: each field keeps its first
+	old value and takes the newest new value. Returns the merged entry, or None
+	when a new entry should be written. `scope` narrows the lookup to an
+	indexed column (todo_id or list_id).
+	
+	The window runs from the entry's creation, so one entry spans at most
+	COALESCE_SECONDS; its created_at is left alone so feed cursors stay valid.
+	Entries still queued by the buffered writer are not visible here and are
+	not merged.
+	"""
+	if COALESCE_SECONDS <= 0:
+		return None
+	
+	latest = db.query(ActivityLog).filter(
+		scope,
+		ActivityLog.entity_type == entity_type,
+		ActivityLog.entity_id == entity_id,
+		ActivityLog.created_at >= utcnow() - timedelta(seconds=COALESCE_SECONDS)
+	).order_by(
+		ActivityLog.created_at.desc(), ActivityLog.id.desc()
+	).with_for_update().first()
+	
+	if latest is None or latest.user_id != user_id or latest.action_type != ActivityActionType.UPDATED.value:
+		return None
+	
+	details = dict(latest.details or {})
+	merged = dict(details.get("changes") or {})
+	for field, change in changes.items():
+		previous = merged.get(field)
+		if activity_diff.is_diff(previous):
+			# The previous entry's new value is this update's old value
+			first_old = activity_diff.old_value(previous, change["old"])
+			if first_old is None:
+				return None
+			change = {"old": first_old, "new": change["new"]}
+		elif previous is not None:
+			change = {"old": previous["old"], "new": change["new"]}
+		merged[field] = activity_diff.compact_change(change)
+	details.update(name=name, changes=merged, coalesced=details.get("coalesced", 1) + 1)
+	# Reassigned, not mutated, so the JSON column sees the change
+	latest.details = details
+	db.flush()
+	return latest
+
+
 def log_list_created(db: Session, user_id: int, list_id: int, list_name: str) -> ActivityLog:
 	return log_activity(
 		db=db,
@@ -52,6 +128,13 @@ def log_list_updated(
 	list_name: str,
 	changes: Dict[str, Any]
 ) -> ActivityLog:
+	coalesced = _coalesce_update(
+		db, user_id, ActivityEntityType.LIST.value, list_id, list_name, changes,
+		ActivityLog.list_id == list_id
+	)
+	if coalesced is not None:
+		return coalesced
+	changes = activity_diff.compact_changes(changes)
 	return log_activity(
 		db=db,
 		user_id=user_id,
@@ -99,6 +182,13 @@ def log_todo_updated(
 	todo_name: str,
 	changes: Dict[str, Any]
 ) -> ActivityLog:
+	coalesced = _coalesce_update(
+		db, user_id, ActivityEntityType.TODO.value, todo_id, todo_name, changes,
+		ActivityLog.todo_id == todo_id
+	)
+	if coalesced is not None:
+		return coalesced
+	changes = activity_diff.compact_changes(changes)
 	return log_activity(
 		db=db,
 		user_id=user_id,
@@ -152,6 +242,51 @@ def log_todo_deleted(
 		details={"name": todo_name}
 	)
 
+def log_tags_merged(
+	db: Session,
+	user_id: int,
+	tag_id: int,
+	tag_name: str,
+	merged_tag_names: List[str],
+	relabeled_todos: int
+) -> ActivityLog:
+	return log_activity(
+		db=db,
+		user_id=user_id,
+		action_type=ActivityActionType.UPDATED.value,
+		entity_type=ActivityEntityType.TAG.value,
+		entity_id=tag_id,
+		details={
+			"name": tag_name,
+			"merged_tags": merged_tag_names,
+			"relabeled_todos": relabeled_todos
+		}
+	)
+
+def log_todos_moved(
+	db: Session,
+	user_id: int,
+	list_id: int,
+	todo_ids: List[int],
+	from_list_id: Optional[int] = None,
+	to_list_id: Optional[int] = None
+) -> ActivityLog:
+	details = {"todo_ids": todo_ids, "count": len(todo_ids)}
+	if from_list_id is not None:
+		details["from_list_id"] = from_list_id
+	if to_list_id is not None:
+		details["to_list_id"] = to_list_id
+	
+	return log_activity(
+		db=db,
+		user_id=user_id,
+		action_type=ActivityActionType.MOVED.value,
+		entity_type=ActivityEntityType.LIST.value,
+		entity_id=list_id,
+		list_id=list_id,
+		details=details
+	)
+
 def log_list_shared(
 	db: Session,
 	user_id: int,
@@ -200,13 +335,140 @@ def log_permission_changed(
 	)
 
 
+# Exact feed totals are cached for this long; "estimate" asks the Postgres planner instead
+FEED_TOTAL_CACHE_SECONDS = 60.0
+# Cache keys come from client filters, so the oldest entries are evicted past this many
+FEED_TOTAL_CACHE_SIZE = 1000
+FEED_TOTAL_MODES = ("none", "cached", "estimate")
+
+# In insertion order, which is also expiry order
+_total_cache: "OrderedDict[tuple, Tuple[float, int]]" = OrderedDict()
+_total_lock = threading.Lock()
+
+
+def encode_feed_cursor(activity: ActivityLog) -> str:
+	raw = f"{activity.created_at.isoformat()}|{activity.id}"
+	return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_feed_cursor(cursor: str) -> Tuple[datetime, int]:
+	"""Raises ValueError for anything encode_feed_cursor did not produce."""
+	try:
+		created_at, activity_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+		return datetime.fromisoformat(created_at), int(activity_id)
+	except (UnicodeDecodeError, ValueError) as exc:
+		raise ValueError(f"Invalid feed cursor: {cursor!r}") from exc
+
+
+# Marks a details filter that only requires the key to be present
+_KEY_EXISTS = object()
+
+
+def parse_detail_filter(expression: str) -> Tuple[List[str], Any]:
+	"""
+	Parse a details filter: "changes.status" matches entries that have the key,
+	"permission_level=update" entries where it has that value. Values are read
+	as JSON when they parse (5, true, null) and as strings otherwise.
+	"""
+	path, has_value, raw = expression.partition("=")
+	keys = path.split(".")
+	if not all(keys):
+		raise ValueError(f"Invalid details filter: {expression!r}")
+	
+	if not has_value:
+		return keys, _KEY_EXISTS
+	try:
+		return keys, json.loads(raw)
+	except ValueError:
+		return keys, raw
+
+
+def _detail_condition(db: Session, keys: List[str], value: Any):
+	if db.get_bind().dialect.name == "postgresql":
+		details = type_coerce(ActivityLog.details, JSONB)
+		if value is _KEY_EXISTS:
+			jsonpath = "$" + "".join("." + json.dumps(key) for key in keys)
+			return details.op("@?")(jsonpath)
+		for key in reversed(keys):
+			value = {key: value}
+		return details.op("@>")(cast(literal(json.dumps(value), Text), JSONB))
+	
+	jsonpath = "$" + "".join("." + json.dumps(key) for key in keys)
+	if value is _KEY_EXISTS:
+		return func.json_type(ActivityLog.details, jsonpath).isnot(None)
+	if value is None:
+		return func.json_type(ActivityLog.details, jsonpath) == "null"
+	return func.json_extract(ActivityLog.details, jsonpath) == value
+
+
+def clear_total_cache() -> None:
+	with _total_lock:
+		_total_cache.clear()
+
+
+def _cached_total(query, key: tuple) -> int:
+	now = time.monotonic()
+	with _total_lock:
+		cached = _total_cache.get(key)
+	if cached and now - cached[0] < FEED_TOTAL_CACHE_SECONDS:
+		return cached[1]
+	
+	total = query.order_by(None).count()
+	with _total_lock:
+		_total_cache.pop(key, None)
+		_total_cache[key] = (now, total)
+		while _total_cache:
+			oldest_at, _ = next(iter(_total_cache.values()))
+			if now - oldest_at < FEED_TOTAL_CACHE_SECONDS and len(_total_cache) <= FEED_TOTAL_CACHE_SIZE:
+				break
+			_total_cache.popitem(last=False)
+	return total
+
+
+def _estimated_total(db: Session, query, key: tuple) -> int:
+	"""The planner's row estimate on Postgres; other databases fall back to the cached count."""
+	dialect = db.get_bind().dialect
+	if dialect.name != "postgresql":
+		return _cached_total(query, key)
+	
+	# Sent to the driver as-is with bound parameters, so filter values are never parsed as SQL
+	compiled = query.statement.compile(dialect=dialect, compile_kwargs={"render_postcompile": True})
+	params = compiled.params
+	if compiled.positional:
+		params = tuple(params[name] for name in compiled.positiontup)
+	plan = db.connection().exec_driver_sql("EXPLAIN (FORMAT JSON) " + str(compiled), params).scalar()
+	if isinstance(plan, str):
+		plan = json.loads(plan)
+	return int(plan[0]["Plan"]["Plan Rows"])
+
+
 def get_activity_feed(
 	db: Session,
 	user_id: Optional[int] = None,
 	list_id: Optional[int] = None,
+	viewer_id: Optional[int] = None,
+	cursor: Optional[str] = None,
 	skip: int = 0,
-	limit: int = 50
-):
+	limit: int = 50,
+	total: str = "none",
+	detail_filters: Sequence[str] = (),
+	since: Optional[datetime] = None,
+	until: Optional[datetime] = None
+) -> Tuple[List[ActivityLog], Optional[str], Optional[int]]:
+	"""
+	A page of activity, newest first, keyset-paginated on (created_at, id).
+	
+	Pass the returned next_cursor back as `cursor` to fetch the following page;
+	it is None on the last page. `skip` is only honoured without a cursor, for
+	older clients. The total is left out unless asked for: "cached" counts and
+	caches the result briefly, "estimate" uses the planner's estimate.
+	`viewer_id` limits the feed to lists that user owns or has a permission on,
+	as one semi-join rather than a query per list.
+	`detail_filters` narrow the feed on details keys (see parse_detail_filter).
+	`since` (inclusive) and `until` (exclusive) bound created_at; on the
+	partitioned Postgres table only the months in range are scanned.
+	Returns (activities, next_cursor, total).
+	"""
 	query = db.query(ActivityLog)
 	
 	if user_id:
@@ -215,8 +477,66 @@ def get_activity_feed(
 	if list_id:
 		query = query.filter(ActivityLog.list_id == list_id)
 	
-	total = query.count()
+	if viewer_id:
+		query = query.filter(ActivityLog.list_id.in_(viewable_list_ids(viewer_id)))
+	
+	for expression in detail_filters:
+		query = query.filter(_detail_condition(db, *parse_detail_filter(expression)))
+	
+	if since is not None:
+		query = query.filter(ActivityLog.created_at >= since)
+	
+	if until is not None:
+		query = query.filter(ActivityLog.created_at < until)
+	
+	page = query.options(selectinload(ActivityLog.user)).order_by(
+		ActivityLog.created_at.desc(), ActivityLog.id.desc()
+	)
+	if cursor is not None:
+		created_at, activity_id = decode_feed_cursor(cursor)
+		page = page.filter(
+			tuple_(ActivityLog.created_at, ActivityLog.id) < tuple_(created_at, activity_id),
+			# Redundant, but the planner only prunes partitions on plain comparisons of created_at
+			ActivityLog.created_at <= created_at
+		)
+	elif skip:
+		page = page.offset(skip)
+	
+	activities = page.limit(limit + 1).all()
+	
+	next_cursor = encode_feed_cursor(activities[limit - 1]) if len(activities) > limit else None
+	activities = activities[:limit]
+	
+	key = (user_id, list_id, viewer_id, tuple(sorted(detail_filters)), since, until)
+	if total == "cached":
+		count = _cached_total(query, key)
+	elif total == "estimate":
+		count = _estimated_total(db, query, key)
+	else:
+		count = None
+	
+	return activities, next_cursor, count
+
+
+def get_activity_feed_response(db: Session, expand: bool = False, **feed_args) -> schemas.ActivityFeedResponse:
+	"""
+	get_activity_feed as the feed endpoints' response. A malformed cursor or
+	details filter is a 400; with `expand`, diff-stored changes are rebuilt
+	into full old/new values.
+	"""
+	try:
+		activities, next_cursor, count = get_activity_feed(db, **feed_args)
+	except ValueError as exc:
+		raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
 	
-	activities = query.order_by(ActivityLog.created_at.desc()).offset(skip).limit(limit).all()
+	if not expand:
+		return schemas.ActivityFeedResponse(total=count, next_cursor=next_cursor, items=activities)
 	
-	return activities, total
+	full_details = activity_diff.expand_changes(db, activities)
+	items = []
+	for activity in activities:
+		item = schemas.ActivityLogResponse.model_validate(activity)
+		if activity.id in full_details:
+			item.details = full_details[activity.id]
+		items.append(item)
+	return schemas.ActivityFeedResponse(total=count, next_cursor=next_cursor, items=items)
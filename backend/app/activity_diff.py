@@ -0,0 +1,159 @@
+"""
+Compact storage of large text changes in activity details.
+
+Updates record each field as {"old": ..., "new": ...}. When either side of a
+text change is at least ACTIVITY_DIFF_MIN_LENGTH characters, the change is
+stored as a word-level diff instead:
+
+	{"diff": [12, ["-", "old words"], ["+", "new words"], 40], "old_length": ..,
+	 "new_length": .., "new_hash": ..}
+
+where an integer keeps that many characters of the old text. Diffs whose JSON is at least
+ACTIVITY_COMPRESS_MIN_BYTES long are zlib-compressed and base64-encoded under
+"diff_z" instead of "diff".
+
+A diff only turns one side into the other, so full values are rebuilt on
+request from the entity's current value, walking its later updates backwards.
+new_hash checks every step; when the chain is broken (the todo was deleted, or
+changed without an activity entry) the change is returned as stored.
+"""
+import base64
+import difflib
+import hashlib
+import json
+import os
+import re
+import zlib
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models import ActivityActionType, ActivityEntityType, ActivityLog, Todo, TodoList
+
+DIFF_MIN_LENGTH = int(os.getenv("ACTIVITY_DIFF_MIN_LENGTH", "200"))
+COMPRESS_MIN_BYTES = int(os.getenv("ACTIVITY_COMPRESS_MIN_BYTES", "2048"))
+
+# Diffed per word and whitespace run, which keeps matching close to linear on long texts
+_TOKENS = re.compile(r"\s+|\S+")
+
+# Entity model, and the indexed activity column that holds the entity's id
+_ENTITIES = {
+	ActivityEntityType.TODO.value: (Todo, ActivityLog.todo_id),
+	ActivityEntityType.LIST.value: (TodoList, ActivityLog.list_id),
+}
+
+
+def _hash(text: str) -> str:
+	return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+def _diff_ops(old: str, new: str) -> List[Any]:
+	old_tokens, new_tokens = _TOKENS.findall(old), _TOKENS.findall(new)
+	ops = []
+	for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, old_tokens, new_tokens, autojunk=False).get_opcodes():
+		if tag == "equal":
+			ops.append(sum(len(token) for token in old_tokens[i1:i2]))
+			continue
+		if i2 > i1:
+			ops.append(["-", "".join(old_tokens[i1:i2])])
+		if j2 > j1:
+			ops.append(["+", "".join(new_tokens[j1:j2])])
+	return ops
+
+
+def is_diff(change: Any) -> bool:
+	return isinstance(change, dict) and ("diff" in change or "diff_z" in change)
+
+
+def compact_change(change: Dict[str, Any]) -> Dict[str, Any]:
+	"""The stored form of one field's {"old", "new"} change."""
+	old, new = change.get("old"), change.get("new")
+	if not isinstance(old, str) or not isinstance(new, str) or max(len(old), len(new)) < DIFF_MIN_LENGTH:
+		return change
+	
+	ops = _diff_ops(old, new)
+	encoded = json.dumps(ops, separators=(",", ":"))
+	compact = {"old_length": len(old), "new_length": len(new), "new_hash": _hash(new)}
+	if len(encoded) >= COMPRESS_MIN_BYTES:
+		compact["diff_z"] = base64.b64encode(zlib.compress(encoded.encode())).decode()
+	else:
+		compact["diff"] = ops
+	# Nothing gained when the texts have little in common
+	if len(json.dumps(compact)) >= len(json.dumps(change)):
+		return change
+	return compact
+
+
+def compact_changes(changes: Dict[str, Any]) -> Dict[str, Any]:
+	return {field: compact_change(change) for field, change in changes.items()}
+
+
+def _ops(change: Dict[str, Any]) -> List[Any]:
+	if "diff_z" in change:
+		return json.loads(zlib.decompress(base64.b64decode(change["diff_z"])))
+	return change["diff"]
+
+
+def old_value(change: Dict[str, Any], new: Optional[str]) -> Optional[str]:
+	"""Rebuild the old text of a diff-stored change from its new text, or None if `new` does not match it."""
+	if not isinstance(new, str) or len(new) != change["new_length"] or _hash(new) != change["new_hash"]:
+		return None
+	
+	old, position = [], 0
+	for op in _ops(change):
+		if isinstance(op, int):
+			old.append(new[position:position + op])
+			position += op
+		elif op[0] == "-":
+			old.append(op[1])
+		else:
+			position += len(op[1])
+	return "".join(old)
+
+
+def expand_changes(db: Session, activities: List[ActivityLog]) -> Dict[int, Dict[str, Any]]:
+	"""
+	Details with full old/new values for the given entries that hold diff-stored
+	changes, by entry id. Each entity's later updates are loaded once.
+	"""
+	targets = defaultdict(list)
+	for activity in activities:
+		changes = (activity.details or {}).get("changes") if isinstance(activity.details, dict) else None
+		if changes and any(is_diff(change) for change in changes.values()) and activity.entity_type in _ENTITIES:
+			targets[(activity.entity_type, activity.entity_id)].append(activity)
+	
+	expanded = {}
+	for (entity_type, entity_id), entries in targets.items():
+		model, scope = _ENTITIES[entity_type]
+		entity = db.get(model, entity_id)
+		if entity is None:
+			continue
+		
+		oldest = min(entries, key=lambda a: (a.created_at, a.id))
+		history = db.query(ActivityLog).filter(
+			scope == entity_id,
+			ActivityLog.entity_type == entity_type,
+			ActivityLog.entity_id == entity_id,
+			ActivityLog.action_type == ActivityActionType.UPDATED.value,
+			ActivityLog.created_at >= oldest.created_at
+		).order_by(ActivityLog.created_at.desc(), ActivityLog.id.desc()).all()
+		
+		wanted = {entry.id for entry in entries}
+		values = {}
+		for entry in history:
+			changes = (entry.details or {}).get("changes") or {}
+			full = {}
+			for field, change in changes.items():
+				if not is_diff(change):
+					values[field] = change.get("old") if isinstance(change, dict) else None
+					full[field] = change
+					continue
+				new = values[field] if field in values else getattr(entity, field, None)
+				old = old_value(change, new)
+				# When the chain is broken the stored diff is returned, and older changes of the field fail too
+				full[field] = change if old is None else {"old": old, "new": new}
+				values[field] = old
+			if entry.id in wanted:
+				expanded[entry.id] = dict(entry.details, changes=full)
+	return expanded
@@ -0,0 +1,107 @@
+"""
+Per-list daily activity digest.
+
+list_activity_daily holds one count per list, day (UTC), user, action type
+and entity type. It is updated in the same transaction that writes the
+activity entries, with one upsert per batch, so digests read a handful of
+aggregate rows instead of scanning activity_logs.
+"""
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.models import ListActivityDaily, User
+
+_KEY_COLUMNS = ("list_id", "day", "user_id", "action_type", "entity_type")
+
+# Activity columns record() reads
+ROW_KEYS = ("list_id", "created_at", "user_id", "action_type", "entity_type")
+
+
+def record(db: Session, rows: Iterable[Dict[str, Any]]) -> None:
+	"""Add activity entries (column dicts with created_at set) to the daily counts. Does not commit."""
+	counts = Counter(
+		(row["list_id"], row["created_at"].date(), row["user_id"], row["action_type"], row["entity_type"])
+		for row in rows
+		if row["list_id"] is not None
+	)
+	if not counts:
+		return
+	
+	# Sorted so concurrent writers lock rows in the same order
+	values = [dict(zip(_KEY_COLUMNS, key), count=count) for key, count in sorted(counts.items())]
+	
+	dialect = db.get_bind().dialect.name
+	if dialect == "postgresql":
+		from sqlalchemy.dialects.postgresql import insert
+	elif dialect == "sqlite":
+		from sqlalchemy.dialects.sqlite import insert
+	else:
+		_record_without_upsert(db, values)
+		return
+	
+	stmt = insert(ListActivityDaily).values(values)
+	db.execute(stmt.on_conflict_do_update(
+		index_elements=[getattr(ListActivityDaily, column) for column in _KEY_COLUMNS],
+		set_={"count": ListActivityDaily.count + stmt.excluded["count"]}
+	))
+
+
+def _record_without_upsert(db: Session, values):
+	for value in values:
+		key = [getattr(ListActivityDaily, column) == value[column] for column in _KEY_COLUMNS]
+		result = db.execute(
+			update(ListActivityDaily).where(*key).values(count=ListActivityDaily.count + value["count"])
+		)
+		if not result.rowcount:
+			db.add(ListActivityDaily(**value))
+	db.flush()
+
+
+def get_list_digest(db: Session, list_id: int, end: Optional[date] = None, days: int = 7, top: int = 5) -> Dict[str, Any]:
+	"""Activity on a list over the `days` days ending with `end` (inclusive), read from the daily counts only."""
+	end = end or datetime.now(timezone.utc).date()
+	start = end - timedelta(days=days - 1)
+	
+	rows = db.execute(
+		select(
+			ListActivityDaily.day,
+			ListActivityDaily.user_id,
+			ListActivityDaily.action_type,
+			ListActivityDaily.entity_type,
+			ListActivityDaily.count
+		).where(
+			ListActivityDaily.list_id == list_id,
+			ListActivityDaily.day >= start,
+			ListActivityDaily.day <= end
+		)
+	).all()
+	
+	by_action, by_entity, by_day, by_user = Counter(), Counter(), defaultdict(int), Counter()
+	for day, user_id, action_type, entity_type, count in rows:
+		by_action[action_type] += count
+		by_entity[entity_type] += count
+		by_day[day] += count
+		by_user[user_id] += count
+	
+	contributors = sorted(by_user.items(), key=lambda item: (-item[1], item[0]))[:top]
+	usernames = dict(db.execute(
+		select(User.id, User.username).where(User.id.in_([user_id for user_id, _ in contributors]))
+	).all()) if contributors else {}
+	
+	return {
+		"list_id": list_id,
+		"start": start,
+		"end": end,
+		"total": sum(by_action.values()),
+		"by_action_type": dict(by_action),
+		"by_entity_type": dict(by_entity),
+		"days": [{"day": day, "count": by_day[day]} for day in sorted(by_day)],
+		"top_contributors": [
+			{"user_id": user_id, "username": usernames.get(user_id, ""), "count": count}
+			for user_id, count in contributors
+		],
+	}
@@ -0,0 +1,71 @@
+"""
+Streaming activity export.
+
+Entries are read with yield_per, which on Postgres uses a server-side cursor,
+and written out as NDJSON in chunks of about CHUNK_BYTES, optionally through an
+incremental gzip compressor. Memory stays constant whatever the history size.
+"""
+import json
+import zlib
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import ActivityLog
+
+FETCH_SIZE = 1000
+CHUNK_BYTES = 64 * 1024
+
+_COLUMNS = list(ActivityLog.__table__.columns)
+
+
+def iter_list_activity(
+	db: Session,
+	list_id: int,
+	since: Optional[datetime] = None,
+	until: Optional[datetime] = None,
+	fetch_size: int = FETCH_SIZE
+) -> Iterator[Dict[str, Any]]:
+	"""Every entry of a list, oldest first, as column dicts fetched `fetch_size` rows at a time."""
+	query = select(*_COLUMNS).where(ActivityLog.list_id == list_id)
+	if since is not None:
+		query = query.where(ActivityLog.created_at >= since)
+	if until is not None:
+		query = query.where(ActivityLog.created_at < until)
+	query = query.order_by(ActivityLog.created_at, ActivityLog.id).execution_options(yield_per=fetch_size)
+	
+	for row in db.execute(query):
+		yield dict(row._mapping)
+
+
+def _to_json(value):
+	if isinstance(value, datetime):
+		return value.isoformat()
+	raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def ndjson_chunks(records: Iterable[Dict[str, Any]], compress: bool = False) -> Iterator[bytes]:
+	"""One JSON document per line, yielded in chunks of about CHUNK_BYTES, gzip-compressed if asked."""
+	# wbits=31 writes a gzip header and trailer
+	compressor = zlib.compressobj(wbits=31) if compress else None
+	buffer = bytearray()
+	
+	def emit(data: bytes) -> bytes:
+		return compressor.compress(data) if compressor else data
+	
+	for record in records:
+		buffer += json.dumps(record, default=_to_json, separators=(",", ":")).encode()
+		buffer += b"\n"
+		if len(buffer) >= CHUNK_BYTES:
+			chunk = emit(bytes(buffer))
+			buffer.clear()
+			if chunk:
+				yield chunk
+	
+	tail = emit(bytes(buffer))
+	if compressor:
+		tail += compressor.flush()
+	if tail:
+		yield tail
@@ -0,0 +1,172 @@
+"""
+Activity log partitions and retention.
+
+On Postgres activity_logs is partitioned by month on created_at (migration
+20251120000019), one partition per month named activity_logs_YYYY_MM.
+ensure_partitions keeps partitions created ACTIVITY_PARTITIONS_AHEAD months
+ahead, and apply_retention removes months older than ACTIVITY_RETENTION_MONTHS:
+their entries are first rolled up into activity_daily_rollups, then each
+partition is detached and dropped, which frees its rows and index entries at
+once instead of deleting row by row.
+
+Months, partition bounds and rollup days are all UTC, whatever the database
+session's time zone. Retention removes everything before the cutoff: whole
+partitions where they hold nothing newer, and a DELETE for the rest (a
+partition created with other bounds, or a table that is not partitioned:
+SQLite, or a database created without the migrations).
+"""
+import logging
+import os
+import re
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.orm import Session
+
+from app.models import ActivityDailyRollup, ActivityLog
+
+RETENTION_MONTHS = int(os.getenv("ACTIVITY_RETENTION_MONTHS", "12"))
+PARTITIONS_AHEAD = int(os.getenv("ACTIVITY_PARTITIONS_AHEAD", "3"))
+
+PARTITION_PREFIX = "activity_logs_"
+_PARTITION_NAME = re.compile(r"^activity_logs_(\d{4})_(\d{2})$")
+
+logger = logging.getLogger(__name__)
+
+
+def _add_months(month: date, months: int) -> date:
+	month_index = month.month - 1 + months
+	return date(month.year + month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+	return f"{PARTITION_PREFIX}{month:%Y_%m}"
+
+
+def _utc_bound(month: date) -> str:
+	# An explicit offset, so the bound does not depend on the session's TimeZone
+	return f"{month.isoformat()} 00:00:00+00"
+
+
+def retention_cutoff(today: Optional[date] = None, months: int = RETENTION_MONTHS) -> datetime:
+	"""Start of the oldest month that is kept; entries before it are rolled up and removed."""
+	today = today or datetime.now(timezone.utc).date()
+	month = _add_months(today.replace(day=1), -months)
+	return datetime(month.year, month.month, 1, tzinfo=timezone.utc)
+
+
+def is_partitioned(db: Session) -> bool:
+	if db.get_bind().dialect.name != "postgresql":
+		return False
+	return db.execute(text(
+		"SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('activity_logs'))"
+	)).scalar()
+
+
+def list_partitions(db: Session) -> Dict[date, str]:
+	"""Monthly partitions of activity_logs by the month they hold."""
+	names = db.execute(text(
+		"SELECT child.relname FROM pg_inherits "
+		"JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+		"WHERE pg_inherits.inhparent = to_regclass('activity_logs')"
+	)).scalars()
+	partitions = {}
+	for name in names:
+		match = _PARTITION_NAME.match(name)
+		if match:
+			partitions[date(int(match.group(1)), int(match.group(2)), 1)] = name
+	return partitions
+
+
+def ensure_partitions(db: Session, today: Optional[date] = None, ahead: int = PARTITIONS_AHEAD) -> List[str]:
+	"""Create the partitions for the current month and `ahead` months after it. Returns the names created."""
+	if not is_partitioned(db):
+		return []
+	
+	today = today or datetime.now(timezone.utc).date()
+	existing = list_partitions(db)
+	created = []
+	for offset in range(ahead + 1):
+		month = _add_months(today.replace(day=1), offset)
+		if month in existing:
+			continue
+		name = partition_name(month)
+		db.execute(text(
+			f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF activity_logs '
+			f"FOR VALUES FROM ('{_utc_bound(month)}') TO ('{_utc_bound(_add_months(month, 1))}')"
+		))
+		created.append(name)
+	db.commit()
+	
+	if created:
+		logger.info("Created activity partitions %s", ", ".join(created))
+	return created
+
+
+def prepare_partitions():
+	"""Create upcoming partitions at startup, so inserts never miss one while the retention worker is down."""
+	from app.database import SessionLocal
+	db = SessionLocal()
+	try:
+		ensure_partitions(db)
+	except Exception:
+		logger.exception("Could not create activity partitions")
+		db.rollback()
+	finally:
+		db.close()
+
+
+def rollup_activity(db: Session, before: datetime) -> int:
+	"""
+	Add per-day counts of entries created before `before` to activity_daily_rollups,
+	in one INSERT ... SELECT. Does not commit; the caller removes the entries in the
+	same transaction so a month is never counted twice. Returns the rows added.
+	"""
+	if db.get_bind().dialect.name == "postgresql":
+		day = func.date(func.timezone("UTC", ActivityLog.created_at))
+	else:
+		# SQLite stores the UTC timestamps as written
+		day = func.date(ActivityLog.created_at)
+	summary = select(
+		day,
+		ActivityLog.user_id,
+		ActivityLog.list_id,
+		ActivityLog.action_type,
+		ActivityLog.entity_type,
+		func.count()
+	).where(ActivityLog.created_at < before).group_by(
+		day, ActivityLog.user_id, ActivityLog.list_id, ActivityLog.action_type, ActivityLog.entity_type
+	)
+	result = db.execute(insert(ActivityDailyRollup).from_select(
+		["day", "user_id", "list_id", "action_type", "entity_type", "count"], summary
+	))
+	return result.rowcount
+
+
+def apply_retention(db: Session, today: Optional[date] = None, months: int = RETENTION_MONTHS) -> Dict[str, Any]:
+	"""Roll up and remove every month older than the retention window."""
+	cutoff = retention_cutoff(today, months)
+	rolled_up = rollup_activity(db, cutoff)
+	
+	dropped = []
+	if is_partitioned(db):
+		for month, name in sorted(list_partitions(db).items()):
+			if _add_months(month, 1) > cutoff.date():
+				continue
+			# Only drop partitions that hold nothing past the cutoff, whatever bounds they were created with
+			if db.execute(text(f'SELECT EXISTS (SELECT 1 FROM "{name}" WHERE created_at >= :cutoff)'), {"cutoff": cutoff}).scalar():
+				continue
+			db.execute(text(f'ALTER TABLE activity_logs DETACH PARTITION "{name}"'))
+			db.execute(text(f'DROP TABLE "{name}"'))
+			dropped.append(name)
+	# Whatever was rolled up and is still there; on a partitioned table only partitions straddling the cutoff are scanned
+	deleted = db.query(ActivityLog).filter(ActivityLog.created_at < cutoff).delete(synchronize_session=False)
+	db.commit()
+	
+	if rolled_up or dropped or deleted:
+		logger.info(
+			"Activity retention before %s: %s rollup rows, dropped partitions %s, deleted %s entries",
+			cutoff.date(), rolled_up, dropped or "none", deleted
+		)
+	return {"cutoff": cutoff, "rolled_up": rolled_up, "dropped_partitions": dropped, "deleted": deleted}
@@ -0,0 +1,294 @@
+"""
+Buffered activity writer.
+
+With ACTIVITY_WRITER_MODE=buffered, activity entries are not inserted in the
+mutation's transaction. They are held on the session until it commits, then
+queued in memory and written by a background thread with multi-row INSERTs,
+every ACTIVITY_FLUSH_INTERVAL_MS or ACTIVITY_BATCH_SIZE entries, whichever
+comes first. Entries from a transaction that rolls back are discarded.
+
+The trade-off is durability: entries still queued when the process dies are
+lost. A clean shutdown drains the queue. When the queue is full the overflow
+policy decides what happens to new entries:
+
+	write  - insert them synchronously in the calling thread (default)
+	block  - wait up to ACTIVITY_BLOCK_TIMEOUT_MS for space, then drop them
+	drop   - drop them
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import event, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import activity_digest
+from app.models import ActivityLog, Todo, TodoList, User, utcnow
+
+WRITER_MODE = os.getenv("ACTIVITY_WRITER_MODE", "sync")
+BATCH_SIZE = int(os.getenv("ACTIVITY_BATCH_SIZE", "100"))
+FLUSH_INTERVAL_MS = int(os.getenv("ACTIVITY_FLUSH_INTERVAL_MS", "200"))
+MAX_QUEUE_SIZE = int(os.getenv("ACTIVITY_QUEUE_SIZE", "10000"))
+OVERFLOW_POLICY = os.getenv("ACTIVITY_OVERFLOW_POLICY", "write")
+BLOCK_TIMEOUT_MS = int(os.getenv("ACTIVITY_BLOCK_TIMEOUT_MS", "50"))
+
+OVERFLOW_POLICIES = ("write", "block", "drop")
+
+# Session.info key holding entries logged in the current transaction
+PENDING_KEY = "pending_activity"
+
+# How often an idle writer thread checks whether it should stop
+STOP_POLL_SECONDS = 0.1
+
+logger = logging.getLogger(__name__)
+
+_COLUMNS = [column.key for column in ActivityLog.__table__.columns if column.key != "id"]
+
+
+class ActivityWriter:
+	def __init__(
+		self,
+		session_factory: Callable[[], Session],
+		batch_size: int = BATCH_SIZE,
+		flush_interval_ms: int = FLUSH_INTERVAL_MS,
+		max_queue_size: int = MAX_QUEUE_SIZE,
+		overflow_policy: str = OVERFLOW_POLICY,
+		block_timeout_ms: int = BLOCK_TIMEOUT_MS
+	):
+		if overflow_policy not in OVERFLOW_POLICIES:
+			raise ValueError(f"Unknown overflow policy {overflow_policy!r}, expected one of {OVERFLOW_POLICIES}")
+		
+		self.session_factory = session_factory
+		self.batch_size = batch_size
+		self.flush_interval = flush_interval_ms / 1000
+		self.overflow_policy = overflow_policy
+		self.block_timeout = block_timeout_ms / 1000
+		
+		self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=max_queue_size)
+		self._stopping = threading.Event()
+		self._closed = False
+		self._thread: Optional[threading.Thread] = None
+		self._write_lock = threading.Lock()
+		self._stats_lock = threading.Lock()
+		self._stats = {
+			"submitted": 0,
+			"written": 0,
+			"dropped": 0,
+			"discarded": 0,
+			"failed": 0,
+			"written_on_overflow": 0,
+			"batches": 0,
+			"last_batch_size": 0,
+			"max_batch_size": 0,
+		}
+	
+	@property
+	def running(self) -> bool:
+		return self._thread is not None and self._thread.is_alive()
+	
+	def start(self):
+		if self.running:
+			return
+		self._stopping.clear()
+		self._thread = threading.Thread(target=self._run, name="activity-writer", daemon=True)
+		self._thread.start()
+	
+	def stop(self, timeout: Optional[float] = None):
+		"""Stop the background thread and write everything still queued; later entries are written synchronously."""
+		self._closed = True
+		self._stopping.set()
+		if self._thread is not None:
+			self._thread.join(timeout)
+			self._thread = None
+		self.flush()
+	
+	def submit(self, rows: List[Dict[str, Any]]):
+		self._count("submitted", len(rows))
+		
+		if self._closed:
+			self._write(rows)
+			return
+		
+		overflow = []
+		for row in rows:
+			try:
+				if self.overflow_policy == "block":
+					self._queue.put(row, timeout=self.block_timeout)
+				else:
+					self._queue.put_nowait(row)
+			except queue.Full:
+				overflow.append(row)
+		
+		if not overflow:
+			return
+		if self.overflow_policy == "write":
+			self._count("written_on_overflow", len(overflow))
+			self._write(overflow)
+		else:
+			self._count("dropped", len(overflow))
+			logger.warning("Activity queue full, dropped %s entries", len(overflow))
+	
+	def flush(self) -> int:
+		"""Write everything currently queued in the calling thread. Returns the number of entries taken."""
+		taken = 0
+		while True:
+			batch = []
+			while len(batch) < self.batch_size:
+				try:
+					batch.append(self._queue.get_nowait())
+				except queue.Empty:
+					break
+			if not batch:
+				return taken
+			taken += len(batch)
+			self._write(batch)
+	
+	def stats(self) -> Dict[str, Any]:
+		with self._stats_lock:
+			stats = dict(self._stats)
+		stats.update(
+			running=self.running,
+			queue_depth=self._queue.qsize(),
+			max_queue_size=self._queue.maxsize,
+			batch_size=self.batch_size,
+			flush_interval_ms=int(self.flush_interval * 1000),
+			overflow_policy=self.overflow_policy,
+			avg_batch_size=round(stats["written"] / stats["batches"], 2) if stats["batches"] else 0,
+		)
+		return stats
+	
+	def _count(self, key: str, amount: int = 1):
+		with self._stats_lock:
+			self._stats[key] += amount
+	
+	def _run(self):
+		while not self._stopping.is_set():
+			batch = self._next_batch()
+			if batch:
+				self._write(batch)
+	
+	def _next_batch(self) -> List[Dict[str, Any]]:
+		"""Collect up to batch_size entries, waiting at most one flush interval."""
+		deadline = time.monotonic() + self.flush_interval
+		batch = []
+		while len(batch) < self.batch_size and not self._stopping.is_set():
+			remaining = deadline - time.monotonic()
+			if remaining <= 0:
+				break
+			try:
+				batch.append(self._queue.get(timeout=min(remaining, STOP_POLL_SECONDS)))
+			except queue.Empty:
+				continue
+		return batch
+	
+	def _write(self, rows: List[Dict[str, Any]]):
+		with self._write_lock:
+			db = self.session_factory()
+			try:
+				try:
+					db.execute(insert(ActivityLog), rows)
+					activity_digest.record(db, rows)
+					db.commit()
+					written = rows
+				except IntegrityError:
+					# A list or todo was deleted between logging and writing
+					db.rollback()
+					written = _resolve_deleted_references(db, rows)
+					if written:
+						db.execute(insert(ActivityLog), written)
+						activity_digest.record(db, written)
+						db.commit()
+					self._count("discarded", len(rows) - len(written))
+			except Exception:
+				db.rollback()
+				self._count("failed", len(rows))
+				logger.exception("Failed to write %s activity entries", len(rows))
+				return
+			finally:
+				db.close()
+		
+		with self._stats_lock:
+			self._stats["written"] += len(written)
+			self._stats["batches"] += 1
+			self._stats["last_batch_size"] = len(written)
+			self._stats["max_batch_size"] = max(self._stats["max_batch_size"], len(written))
+
+
+def _resolve_deleted_references(db: Session, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+	"""
+	Apply the foreign keys' ON DELETE rules by hand: entries of deleted users or
+	lists are dropped (CASCADE) and references to deleted todos cleared (SET NULL).
+	"""
+	def existing(model, key):
+		ids = {row[key] for row in rows if row[key] is not None}
+		return set(db.execute(select(model.id).where(model.id.in_(ids))).scalars()) if ids else set()
+	
+	users, lists, todos = existing(User, "user_id"), existing(TodoList, "list_id"), existing(Todo, "todo_id")
+	resolved = []
+	for row in rows:
+		if row["user_id"] not in users or (row["list_id"] is not None and row["list_id"] not in lists):
+			continue
+		if row["todo_id"] is not None and row["todo_id"] not in todos:
+			row = dict(row, todo_id=None)
+		resolved.append(row)
+	return resolved
+
+
+_writer: Optional[ActivityWriter] = None
+
+
+def get_writer() -> Optional[ActivityWriter]:
+	return _writer
+
+
+def start_writer(session_factory: Optional[Callable[[], Session]] = None) -> Optional[ActivityWriter]:
+	"""Start the buffered writer if ACTIVITY_WRITER_MODE is 'buffered'."""
+	global _writer
+	if WRITER_MODE != "buffered" or _writer is not None:
+		return _writer
+	
+	if session_factory is None:
+		from app.database import SessionLocal
+		session_factory = SessionLocal
+	
+	_writer = ActivityWriter(session_factory)
+	_writer.start()
+	logger.info(
+		"Buffered activity writer started (batch %s, every %sms, queue %s, overflow %s)",
+		_writer.batch_size, FLUSH_INTERVAL_MS, MAX_QUEUE_SIZE, _writer.overflow_policy
+	)
+	return _writer
+
+
+def stop_writer():
+	global _writer
+	if _writer is not None:
+		_writer.stop()
+		_writer = None
+
+
+def defer(db: Session, activity: ActivityLog):
+	"""Hold an entry on the session; it is queued once the session commits."""
+	if activity.created_at is None:
+		activity.created_at = utcnow()
+	db.info.setdefault(PENDING_KEY, []).append({key: getattr(activity, key) for key in _COLUMNS})
+
+
+@event.listens_for(Session, "after_commit")
+def _submit_pending(session: Session):
+	rows = session.info.pop(PENDING_KEY, None)
+	if not rows:
+		return
+	if _writer is None:
+		logger.warning("Activity writer stopped before %s entries could be queued", len(rows))
+		return
+	_writer.submit(rows)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session):
+	session.info.pop(PENDING_KEY, None)
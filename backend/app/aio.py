@@ -0,0 +1,34 @@
+"""
+Running the sync data layer on an AsyncSession.
+
+crud, authorization and activity are written against a sync Session. Instead
+of keeping a second copy of each function, async handlers run the same
+function on an AsyncSession through run_sync: the ORM code executes in a
+greenlet on the request's asyncpg connection, so a request waiting on Postgres
+holds no thread.
+
+	todos = await aio.run(db, crud.get_list_todos, list_id=list_id, user_id=user_id)
+
+Lazy loads only work inside run_sync, so anything serialized after the call
+must be loaded during it; serialized() wraps a function to return its result
+already validated into a response model.
+"""
+from typing import Any, Callable
+
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def run(db: AsyncSession, fn: Callable[..., Any], *args, **kwargs) -> Any:
+	"""`fn(session, *args, **kwargs)` on the async session's connection."""
+	return await db.run_sync(fn, *args, **kwargs)
+
+
+def serialized(fn: Callable[..., Any], response_model: Any) -> Callable[..., Any]:
+	"""Wrap `fn` so its result is validated into `response_model` while lazy loads still work."""
+	adapter = TypeAdapter(response_model)
+	
+	def call(session, *args, **kwargs):
+		return adapter.validate_python(fn(session, *args, **kwargs), from_attributes=True)
+	
+	return call
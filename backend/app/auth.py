@@ -4,10 +4,11 @@ from jose import JWTError, jwt
 import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 import os
 
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app.models import User
 from app.schemas import TokenData
 
@@ -73,7 +74,7 @@ def decode_access_token(token: str) -> TokenData:
 			)
 		
 		return TokenData(user_id=user_id, username=username)
-		
+	
 	except JWTError as e:
 		raise HTTPException(
 			status_code=status.HTTP_401_UNAUTHORIZED,
@@ -109,6 +110,20 @@ async def get_current_user(
 	# Get user from database
 	user = db.query(User).filter(User.id == token_data.user_id).first()
 	
+	return _check_user(user)
+
+
+async def get_current_user_async(
+	credentials: HTTPAuthorizationCredentials = Depends(security),
+	db: AsyncSession = Depends(get_async_db)
+) -> User:
+	"""get_current_user on the async session, for the handlers in app.routes.aio."""
+	token_data = decode_access_token(credentials.credentials)
+	user = await db.get(User, token_data.user_id)
+	return _check_user(user)
+
+
+def _check_user(user: Optional[User]) -> User:
 	if user is None:
 		raise HTTPException(
 			status_code=status.HTTP_401_UNAUTHORIZED,
@@ -148,7 +163,7 @@ async def get_current_user_optional(
 		
 		if user and user.is_active:
 			return user
-			
+	
 	except HTTPException:
 		pass
 	
@@ -1,5 +1,6 @@
 from typing import Optional
 from fastapi import HTTPException, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.models import TodoList, ListPermission, PermissionLevel
@@ -96,6 +97,13 @@ def get_user_permission_level(db: Session, list_id: int, user_id: int) -> Option
 	return None
 
 
+def viewable_list_ids(user_id: int):
+	"""Select of every list id the user owns or has been granted any permission on."""
+	owned = select(TodoList.id).where(TodoList.owner_id == user_id)
+	shared = select(ListPermission.list_id).where(ListPermission.user_id == user_id)
+	return owned.union(shared)
+
+
 def can_view_list(db: Session, list_id: int, user_id: int) -> bool:
 	permission = get_user_permission_level(db, list_id, user_id)
 	return permission in ["owner", "update", "view"]
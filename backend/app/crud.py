@@ -1,16 +1,24 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import cast, ARRAY, Text, or_
+import enum
+import os
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+from sqlalchemy.orm import Session, aliased, selectinload
+from sqlalchemy import cast, ARRAY, Text, case, or_, delete, func, literal, select, update
+from sqlalchemy.dialects import postgresql, sqlite
 from fastapi import HTTPException, status
 
 from app import models, schemas
-from app.models import TodoList, Todo, ListPermission, Tag, User, PermissionLevel
+from app.models import TodoList, Todo, TodoDeletion, ListPermission, Tag, User, PermissionLevel, TodoStatus, utcnow
 from app.authorization import (
 	check_list_ownership,
 	check_list_view_permission,
-	check_list_update_permission
+	check_list_update_permission,
+	viewable_list_ids
 )
 from app import activity
+from app import ordering
+from app import recurrence
+from app import tag_stats
 
 def get_user_lists(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[TodoList]:
 	owned_lists = db.query(TodoList).filter(TodoList.owner_id == user_id)
@@ -25,6 +33,12 @@ def get_user_lists(db: Session, user_id: int, skip: int = 0, limit: int = 100) -
 	return all_lists
 
 
+def with_todo_count(todo_list: TodoList) -> TodoList:
+	"""Set the todo_count that list responses include."""
+	todo_list.todo_count = len(todo_list.todos)
+	return todo_list
+
+
 def get_list_by_id(db: Session, list_id: int, user_id: int) -> TodoList:
 	return check_list_view_permission(db, list_id, user_id)
 
@@ -37,11 +51,12 @@ def create_list(db: Session, list_data: schemas.TodoListCreate, owner_id: int) -
 		owner_id=owner_id
 	)
 	db.add(db_list)
-	db.commit()
-	db.refresh(db_list)
+	db.flush()
 	
 	activity.log_list_created(db, owner_id, db_list.id, db_list.name)
 	
+	db.commit()
+	db.refresh(db_list)
 	return db_list
 
 
@@ -62,12 +77,11 @@ def update_list(db: Session, list_id: int, list_data: schemas.TodoListUpdate, us
 		changes["is_archived"] = {"old": todo_list.is_archived, "new": list_data.is_archived}
 		todo_list.is_archived = list_data.is_archived
 	
-	db.commit()
-	db.refresh(todo_list)
-	
 	if changes:
 		activity.log_list_updated(db, user_id, list_id, todo_list.name, changes)
 	
+	db.commit()
+	db.refresh(todo_list)
 	return todo_list
 
 def delete_list(db: Session, list_id: int, user_id: int) -> bool:
@@ -78,8 +92,16 @@ def delete_list(db: Session, list_id: int, user_id: int) -> bool:
 	# Log activity before deletion
 	activity.log_list_deleted(db, user_id, list_id, list_name)
 	
+	tag_stats.invalidate_on_commit(
+		db, (owner_id for (owner_id,) in db.query(Tag.user_id).join(
+			models.todo_tags, models.todo_tags.c.tag_id == Tag.id
+		).join(Todo, Todo.id == models.todo_tags.c.todo_id).filter(Todo.list_id == list_id).distinct())
+	)
+	
 	db.query(Todo).filter(Todo.list_id == list_id).delete()
 	
+	db.query(TodoDeletion).filter(TodoDeletion.list_id == list_id).delete()
+	
 	db.query(ListPermission).filter(ListPermission.list_id == list_id).delete()
 	
 	db.delete(todo_list)
@@ -119,8 +141,6 @@ def create_permission(
 		# Update the permission level if it's different
 		old_permission = existing.permission_level.value
 		existing.permission_level = permission_data.permission_level
-		db.commit()
-		db.refresh(existing)
 		
 		# Log activity if permission level changed
 		if old_permission != permission_data.permission_level.value:
@@ -130,6 +150,8 @@ def create_permission(
 				target_user.id, old_permission, permission_data.permission_level.value
 			)
 		
+		db.commit()
+		db.refresh(existing)
 		return existing
 	
 	db_permission = ListPermission(
@@ -139,8 +161,6 @@ def create_permission(
 		shared_by=owner_id
 	)
 	db.add(db_permission)
-	db.commit()
-	db.refresh(db_permission)
 	
 	todo_list = db.query(TodoList).filter(TodoList.id == list_id).first()
 	activity.log_list_shared(
@@ -148,6 +168,8 @@ def create_permission(
 		target_user.id, permission_data.permission_level.value
 	)
 	
+	db.commit()
+	db.refresh(db_permission)
 	return db_permission
 
 
@@ -172,9 +194,6 @@ def update_permission(
 	if permission_data.permission_level is not None:
 		permission.permission_level = permission_data.permission_level
 	
-	db.commit()
-	db.refresh(permission)
-	
 	if permission_data.permission_level is not None:
 		todo_list = db.query(TodoList).filter(TodoList.id == permission.list_id).first()
 		activity.log_permission_changed(
@@ -182,6 +201,8 @@ def update_permission(
 			permission.user_id, old_permission, permission.permission_level.value
 		)
 	
+	db.commit()
+	db.refresh(permission)
 	return permission
 
 
@@ -203,6 +224,14 @@ def delete_permission(db: Session, permission_id: int, user_id: int) -> bool:
 
 # ==================== TODOS ====================
 
+# Tombstones older than this are pruned, so clients further behind must resync fully
+TODO_TOMBSTONE_RETENTION = timedelta(days=30)
+
+# updated_at/deleted_at are stamped when the row is written, not when it commits, so a
+# transaction committing after a sync can carry a stamp older than that sync's cursor.
+# Every sync re-reads this far behind its cursor to pick such rows up.
+TODO_SYNC_SAFETY_WINDOW = timedelta(seconds=float(os.getenv("TODO_SYNC_SAFETY_SECONDS", "60")))
+
 def get_list_todos(
 	db: Session,
 	list_id: int,
@@ -211,7 +240,176 @@ def get_list_todos(
 	limit: int = 100
 ) -> List[Todo]:
 	check_list_view_permission(db, list_id, user_id)
-	return db.query(Todo).filter(Todo.list_id == list_id).offset(skip).limit(limit).all()
+	return db.query(Todo).filter(Todo.list_id == list_id).order_by(
+		Todo.position.nulls_last(), Todo.id
+	).offset(skip).limit(limit).all()
+
+
+def get_todo_changes(
+	db: Session,
+	list_id: int,
+	user_id: int,
+	since: Optional[datetime] = None
+) -> Tuple[List[Todo], List[int], datetime, bool]:
+	"""
+	Todos created/updated and ids deleted in a list since a cursor.
+	
+	Returns (changed, deleted_ids, cursor, full_resync). Rows stamped up to
+	TODO_SYNC_SAFETY_WINDOW before the cursor are re-sent, so changes committed
+	late with an older stamp are not missed; clients apply changes as idempotent
+	upserts. Without a cursor, or with one older than the tombstone retention
+	window, every todo is returned and full_resync is set.
+	"""
+	check_list_view_permission(db, list_id, user_id)
+	
+	if since is not None:
+		since = since.replace(tzinfo=timezone.utc) if since.tzinfo is None else since.astimezone(timezone.utc)
+	
+	full_resync = since is None or since - TODO_SYNC_SAFETY_WINDOW < utcnow() - TODO_TOMBSTONE_RETENTION
+	
+	query = db.query(Todo).filter(Todo.list_id == list_id)
+	deletions = []
+	if not full_resync:
+		lower_bound = since - TODO_SYNC_SAFETY_WINDOW
+		query = query.filter(Todo.updated_at >= lower_bound)
+		deletions = db.query(TodoDeletion.todo_id, TodoDeletion.deleted_at).filter(
+			TodoDeletion.list_id == list_id,
+			TodoDeletion.deleted_at >= lower_bound
+		).all()
+	changed = query.order_by(Todo.updated_at, Todo.id).all()
+	
+	stamps = [todo.updated_at for todo in changed if todo.updated_at] + [d.deleted_at for d in deletions]
+	cursor = max(stamps) if stamps else (since or utcnow())
+	
+	return changed, [d.todo_id for d in deletions], cursor, full_resync
+
+
+def prune_todo_deletions(db: Session, older_than: timedelta = TODO_TOMBSTONE_RETENTION) -> int:
+	"""Drop tombstones past the retention window; returns the number removed."""
+	removed = db.query(TodoDeletion).filter(
+		TodoDeletion.deleted_at < utcnow() - older_than
+	).delete(synchronize_session=False)
+	db.commit()
+	return removed
+
+
+def get_agenda(
+	db: Session,
+	user_id: int,
+	date_from: date,
+	date_to: date,
+	skip: int = 0,
+	limit: int = 100,
+	compact: bool = False
+) -> Tuple[list, bool]:
+	"""
+	Open todos due in [date_from, date_to] across every list the user can view,
+	ordered by due date. Returns (rows, has_more); compact rows carry only the
+	columns needed for an agenda view and skip loading tags.
+	"""
+	columns = (
+		(Todo.id, Todo.list_id, Todo.name, Todo.due_date, Todo.status, Todo.priority)
+		if compact else (Todo,)
+	)
+	query = db.query(*columns).filter(
+		Todo.list_id.in_(viewable_list_ids(user_id)),
+		Todo.due_date >= date_from,
+		Todo.due_date <= date_to,
+		Todo.status != TodoStatus.COMPLETED
+	)
+	if not compact:
+		query = query.options(selectinload(Todo.tags))
+	
+	rows = query.order_by(Todo.due_date, Todo.id).offset(skip).limit(limit + 1).all()
+	return rows[:limit], len(rows) > limit
+
+
+MAX_SUBTASK_DEPTH = 5
+
+def _subtree_cte(list_id: int, todo_ids: List[int], max_depth: int):
+	"""Recursive CTE of (id, depth) for todos and their subtasks down to max_depth levels."""
+	tree = select(Todo.id.label("id"), literal(0).label("depth")).where(
+		Todo.id.in_(todo_ids)
+	).cte("subtree", recursive=True)
+	child = aliased(Todo)
+	return tree.union_all(
+		select(child.id, tree.c.depth + 1).where(
+			child.list_id == list_id,
+			child.parent_id == tree.c.id,
+			tree.c.depth < max_depth
+		)
+	)
+
+
+def _todo_depth(db: Session, todo_id: int) -> int:
+	"""Number of ancestors above a todo."""
+	ancestors = select(Todo.id.label("id"), Todo.parent_id.label("parent_id"), literal(0).label("depth")).where(
+		Todo.id == todo_id
+	).cte("ancestors", recursive=True)
+	parent = aliased(Todo)
+	ancestors = ancestors.union_all(
+		select(parent.id, parent.parent_id, ancestors.c.depth + 1).where(
+			parent.id == ancestors.c.parent_id,
+			ancestors.c.depth <= MAX_SUBTASK_DEPTH
+		)
+	)
+	return db.execute(select(func.max(ancestors.c.depth))).scalar()
+
+
+def get_todo_subtree(
+	db: Session,
+	list_id: int,
+	todo_id: int,
+	user_id: int,
+	max_depth: int = MAX_SUBTASK_DEPTH
+) -> schemas.TodoTreeNode:
+	"""
+	A todo with its subtasks nested down to max_depth levels, fetched in one
+	recursive query. Every node carries the number of its direct subtasks and
+	how many of them are completed, including nodes whose children lie below
+	max_depth and are not returned.
+	"""
+	check_list_view_permission(db, list_id, user_id)
+	
+	tree = _subtree_cte(list_id, [todo_id], max_depth)
+	counts = select(
+		Todo.parent_id.label("parent_id"),
+		func.count().label("child_count"),
+		func.count().filter(Todo.status == TodoStatus.COMPLETED).label("completed_child_count")
+	).where(
+		Todo.list_id == list_id,
+		Todo.parent_id.in_(select(tree.c.id))
+	).group_by(Todo.parent_id).subquery()
+	
+	rows = db.query(
+		Todo,
+		tree.c.depth,
+		func.coalesce(counts.c.child_count, 0),
+		func.coalesce(counts.c.completed_child_count, 0)
+	).join(tree, tree.c.id == Todo.id).outerjoin(
+		counts, counts.c.parent_id == Todo.id
+	).filter(Todo.list_id == list_id).options(
+		selectinload(Todo.tags)
+	).order_by(tree.c.depth, Todo.position.nulls_last(), Todo.id).all()
+	
+	if not rows:
+		raise HTTPException(
+			status_code=status.HTTP_404_NOT_FOUND,
+			detail="Todo not found in this list"
+		)
+	
+	# Rows arrive breadth-first, so every parent is built before its children
+	nodes = {}
+	for todo, depth, child_count, completed_child_count in rows:
+		node = schemas.TodoTreeNode.model_validate(todo)
+		node.depth = depth
+		node.child_count = child_count
+		node.completed_child_count = completed_child_count
+		nodes[todo.id] = node
+		if depth > 0:
+			nodes[todo.parent_id].children.append(node)
+	
+	return nodes[todo_id]
 
 
 def get_todo_by_id(db: Session, todo_id: int, user_id: int) -> Todo:
@@ -227,6 +425,17 @@ def get_todo_by_id(db: Session, todo_id: int, user_id: int) -> Todo:
 	return todo
 
 
+def get_list_todo(db: Session, list_id: int, todo_id: int, user_id: int) -> Todo:
+	"""A todo, checked to belong to `list_id`."""
+	todo = get_todo_by_id(db, todo_id=todo_id, user_id=user_id)
+	if todo.list_id != list_id:
+		raise HTTPException(
+			status_code=status.HTTP_404_NOT_FOUND,
+			detail="Todo not found in this list"
+		)
+	return todo
+
+
 def create_todo(
 	db: Session,
 	list_id: int,
@@ -235,6 +444,19 @@ def create_todo(
 ) -> Todo:
 	check_list_update_permission(db, list_id, user_id)
 	
+	if todo_data.parent_id is not None:
+		parent = db.query(Todo).filter(Todo.id == todo_data.parent_id, Todo.list_id == list_id).first()
+		if not parent:
+			raise HTTPException(
+				status_code=status.HTTP_404_NOT_FOUND,
+				detail="Parent todo not found in this list"
+			)
+		if _todo_depth(db, parent.id) >= MAX_SUBTASK_DEPTH:
+			raise HTTPException(
+				status_code=status.HTTP_400_BAD_REQUEST,
+				detail=f"Subtasks cannot be nested more than {MAX_SUBTASK_DEPTH} levels deep"
+			)
+	
 	db_todo = Todo(
 		name=todo_data.name,
 		description=todo_data.description,
@@ -242,21 +464,27 @@ def create_todo(
 		status=todo_data.status,
 		priority=todo_data.priority,
 		list_id=list_id,
-		created_by=user_id
+		created_by=user_id,
+		parent_id=todo_data.parent_id,
+		position=ordering.append_key(db, list_id)
 	)
+	if todo_data.recurrence is not None:
+		db_todo.recurrence_frequency = todo_data.recurrence.frequency
+		db_todo.recurrence_interval = todo_data.recurrence.interval
+		db_todo.recurrence_until = todo_data.recurrence.until
+		db_todo.recurrence_anchor_day = todo_data.due_date.day
+	if todo_data.tag_ids:
+		db_todo.tags = db.query(Tag).filter(Tag.id.in_(todo_data.tag_ids)).all()
 	db.add(db_todo)
+	db.flush()
+	
+	activity.log_todo_created(db, user_id, db_todo.id, list_id, db_todo.name)
+	
 	db.commit()
 	db.refresh(db_todo)
 	
 	if todo_data.tag_ids:
-		for tag_id in todo_data.tag_ids:
-			tag = db.query(Tag).filter(Tag.id == tag_id).first()
-			if tag:
-				db_todo.tags.append(tag)
-		db.commit()
-		db.refresh(db_todo)
-	
-	activity.log_todo_created(db, user_id, db_todo.id, list_id, db_todo.name)
+		tag_stats.invalidate_for_tags(db_todo.tags)
 	
 	return db_todo
 
@@ -281,12 +509,18 @@ def update_todo(
 	old_status = str(todo.status.value) if todo.status else None
 	status_changed = False
 	
+	if _needs_new_reminder(todo, todo_data.due_date, todo_data.status):
+		todo.reminder_sent_at = None
+	
 	if todo_data.name is not None:
 		changes["name"] = {"old": todo.name, "new": todo_data.name}
 		todo.name = todo_data.name
 	if todo_data.description is not None:
 		changes["description"] = {"old": todo.description, "new": todo_data.description}
 		todo.description = todo_data.description
+	if todo_data.due_date is not None and todo_data.due_date != todo.due_date:
+		changes["due_date"] = {"old": _activity_value(todo.due_date), "new": _activity_value(todo_data.due_date)}
+		todo.due_date = todo_data.due_date
 	if todo_data.status is not None:
 		new_status = str(todo_data.status.value)
 		if old_status != new_status:
@@ -297,27 +531,302 @@ def update_todo(
 		changes["priority"] = {"old": str(todo.priority.value), "new": str(todo_data.priority.value)}
 		todo.priority = todo_data.priority
 
+	if todo_data.tag_ids is not None or status_changed:
+		tag_stats.invalidate_for_tags_on_commit(db, todo.tags)
+	
 	if todo_data.tag_ids is not None:
 		todo.tags.clear()
 		for tag_id in todo_data.tag_ids:
 			tag = db.query(Tag).filter(Tag.id == tag_id).first()
 			if tag:
 				todo.tags.append(tag)
+		# Tag links live in todo_tags, so bump the row for delta-sync clients
+		todo.updated_at = utcnow()
+		tag_stats.invalidate_for_tags_on_commit(db, todo.tags)
+	
+	next_todo = None
+	if status_changed and todo.status == TodoStatus.COMPLETED:
+		next_todo = recurrence.create_next_occurrence(db, todo)
+	
+	_log_todo_changes(db, user_id, todo, changes)
+	
+	if next_todo is not None:
+		db.flush()
+		activity.log_todo_created(db, user_id, next_todo.id, next_todo.list_id, next_todo.name)
 	
 	db.commit()
 	db.refresh(todo)
-	
-	if status_changed and todo_data.status is not None:
+	return todo
+
+
+def _activity_value(value):
+	if isinstance(value, enum.Enum):
+		return value.value
+	if isinstance(value, date):
+		return value.isoformat()
+	return value
+
+
+def _log_todo_changes(db: Session, user_id: int, todo: Todo, changes: dict):
+	"""
+	A status change is logged as its own status_changed entry and every other
+	changed field in one updated entry, so no field is left out of the log.
+	"""
+	changes = dict(changes)
+	status_change = changes.get("status")
+	if status_change is not None and status_change["old"] != status_change["new"]:
+		del changes["status"]
 		activity.log_todo_status_changed(
 			db, user_id, todo.id, todo.list_id, todo.name,
-			old_status, str(todo_data.status.value)
+			status_change["old"], status_change["new"]
 		)
-	elif changes:
+	if changes:
 		activity.log_todo_updated(db, user_id, todo.id, todo.list_id, todo.name, changes)
+
+
+def _needs_new_reminder(todo: Todo, due_date: Optional[date], new_status: Optional[TodoStatus]) -> bool:
+	"""Whether an update reschedules or reopens the todo, so the reminder worker should pick it up again."""
+	rescheduled = due_date is not None and due_date != todo.due_date
+	reopened = todo.status == TodoStatus.COMPLETED and new_status is not None and new_status != TodoStatus.COMPLETED
+	return rescheduled or reopened
+
+
+def patch_todo(
+	db: Session,
+	todo_id: int,
+	todo_data: schemas.TodoUpdate,
+	user_id: int,
+	list_id: Optional[int] = None
+) -> Todo:
+	"""
+	Apply only the submitted fields that differ from the stored todo.
 	
+	Changed columns are written with a single UPDATE ... RETURNING and the result is
+	returned without a refresh. A patch that changes nothing is a no-op: no write,
+	no commit and no activity entry.
+	"""
+	todo = db.query(Todo).options(selectinload(Todo.tags)).filter(Todo.id == todo_id).first()
+	
+	if not todo or (list_id is not None and todo.list_id != list_id):
+		raise HTTPException(
+			status_code=status.HTTP_404_NOT_FOUND,
+			detail="Todo not found"
+		)
+	
+	check_list_update_permission(db, todo.list_id, user_id)
+	
+	submitted = todo_data.model_dump(exclude_unset=True, exclude={"tag_ids", "color"})
+	values = {
+		field: value for field, value in submitted.items()
+		if value is not None and getattr(todo, field) != value
+	}
+	
+	new_tags = None
+	if todo_data.tag_ids is not None:
+		new_tags = db.query(Tag).filter(Tag.id.in_(todo_data.tag_ids)).all() if todo_data.tag_ids else []
+		if {tag.id for tag in new_tags} == {tag.id for tag in todo.tags}:
+			new_tags = None
+	
+	if not values and new_tags is None:
+		return todo
+	
+	changes = {
+		field: {"old": _activity_value(getattr(todo, field)), "new": _activity_value(value)}
+		for field, value in values.items()
+	}
+	
+	written = dict(values, updated_at=utcnow())
+	if _needs_new_reminder(todo, values.get("due_date"), values.get("status")):
+		written["reminder_sent_at"] = None
+	
+	db.execute(
+		update(Todo)
+		.where(Todo.id == todo.id)
+		.values(**written)
+		.returning(Todo)
+		.execution_options(populate_existing=True)
+	)
+	
+	if new_tags is not None or "status" in values:
+		tag_stats.invalidate_for_tags_on_commit(db, todo.tags + (new_tags or []))
+	
+	if new_tags is not None:
+		todo.tags = new_tags
+	
+	next_todo = None
+	if values.get("status") == TodoStatus.COMPLETED:
+		next_todo = recurrence.create_next_occurrence(db, todo)
+	
+	if new_tags is not None or next_todo is not None:
+		db.flush()
+	
+	# Detach so committing doesn't expire the RETURNING values and force a reload
+	db.expunge(todo)
+	
+	_log_todo_changes(db, user_id, todo, changes)
+	
+	if next_todo is not None:
+		activity.log_todo_created(db, user_id, next_todo.id, next_todo.list_id, next_todo.name)
+	
+	db.commit()
+	return todo
+
+
+def set_todo_recurrence(
+	db: Session,
+	list_id: int,
+	todo_id: int,
+	rule: Optional[schemas.RecurrenceRule],
+	user_id: int
+) -> Todo:
+	"""Set or, with rule=None, stop the recurrence of a todo."""
+	todo = db.query(Todo).filter(Todo.id == todo_id, Todo.list_id == list_id).first()
+	
+	if not todo:
+		raise HTTPException(
+			status_code=status.HTTP_404_NOT_FOUND,
+			detail="Todo not found in this list"
+		)
+	
+	check_list_update_permission(db, list_id, user_id)
+	
+	old_rule = schemas.RecurrenceRule.model_validate(todo.recurrence) if todo.recurrence else None
+	if old_rule == rule:
+		return todo
+	
+	todo.recurrence_frequency = rule.frequency if rule else None
+	todo.recurrence_interval = rule.interval if rule else None
+	todo.recurrence_until = rule.until if rule else None
+	# A series keeps its anchor when its rule changes, even while on a clamped occurrence
+	todo.recurrence_anchor_day = (todo.recurrence_anchor_day or todo.due_date.day) if rule else None
+	
+	activity.log_todo_updated(db, user_id, todo.id, todo.list_id, todo.name, {
+		"recurrence": {
+			"old": old_rule.model_dump(mode="json") if old_rule else None,
+			"new": rule.model_dump(mode="json") if rule else None
+		}
+	})
+	
+	db.commit()
+	db.refresh(todo)
 	return todo
 
 
+def move_todo(
+	db: Session,
+	list_id: int,
+	todo_id: int,
+	move_data: schemas.TodoMove,
+	user_id: int
+) -> Todo:
+	"""
+	Place a todo right after `after_id` (or first) by giving it a key between its new
+	neighbours; no other row is rewritten. Ties from concurrent moves into the same
+	gap fall back to id order until the list is rebalanced. Todos without a
+	position are given keys at the end of the list first, where reads sort them.
+	"""
+	check_list_update_permission(db, list_id, user_id)
+	
+	todo = db.query(Todo).filter(Todo.id == todo_id, Todo.list_id == list_id).first()
+	if not todo:
+		raise HTTPException(
+			status_code=status.HTTP_404_NOT_FOUND,
+			detail="Todo not found in this list"
+		)
+	
+	ordering.lock_list(db, list_id)
+	ordering.fill_missing_positions(db, list_id)
+	
+	before = None
+	if move_data.after_id is not None:
+		after_todo = db.query(Todo.position).filter(
+			Todo.id == move_data.after_id,
+			Todo.list_id == list_id
+		).first()
+		if not after_todo:
+			raise HTTPException(
+				status_code=status.HTTP_404_NOT_FOUND,
+				detail="Todo to move after not found in this list"
+			)
+		before = after_todo.position
+	
+	next_query = db.query(func.min(Todo.position)).filter(Todo.list_id == list_id, Todo.id != todo.id)
+	if before is not None:
+		next_query = next_query.filter(Todo.position > before)
+	after = next_query.scalar()
+	
+	todo.position = ordering.track_key(db, list_id, ordering.key_between(before, after))
+	db.commit()
+	db.refresh(todo)
+	return todo
+
+
+def move_todos_to_list(
+	db: Session,
+	list_id: int,
+	move_data: schemas.TodoBulkMove,
+	user_id: int
+) -> List[Todo]:
+	"""
+	Move todos, with their subtasks, to the end of another list in a single
+	UPDATE, keeping their relative order. Todos whose parent stays behind
+	become top-level in the target list. Delta sync sees them as deleted from
+	the source list and changed in the target list.
+	"""
+	target_list_id = move_data.target_list_id
+	if target_list_id == list_id:
+		raise HTTPException(
+			status_code=status.HTTP_400_BAD_REQUEST,
+			detail="Todos are already in this list"
+		)
+	
+	check_list_update_permission(db, list_id, user_id)
+	check_list_update_permission(db, target_list_id, user_id)
+	
+	todo_ids = set(move_data.todo_ids)
+	found_ids = {todo_id for (todo_id,) in db.query(Todo.id).filter(Todo.id.in_(todo_ids), Todo.list_id == list_id)}
+	if found_ids != todo_ids:
+		raise HTTPException(
+			status_code=status.HTTP_404_NOT_FOUND,
+			detail=f"Todos not found in this list: {sorted(todo_ids - found_ids)}"
+		)
+	
+	tree = _subtree_cte(list_id, list(todo_ids), MAX_SUBTASK_DEPTH)
+	moved_ids = [
+		todo_id for (todo_id,) in db.query(Todo.id).filter(
+			Todo.id.in_(select(tree.c.id))
+		).order_by(Todo.position.nulls_last(), Todo.id)
+	]
+	
+	positions = {}
+	position = ordering.last_position(db, target_list_id)
+	for todo_id in moved_ids:
+		position = ordering.track_key(db, target_list_id, ordering.key_between(position, None))
+		positions[todo_id] = position
+	
+	db.execute(
+		update(Todo).where(Todo.id.in_(moved_ids)).values(
+			list_id=target_list_id,
+			position=case(positions, value=Todo.id),
+			parent_id=case((Todo.parent_id.in_(moved_ids), Todo.parent_id), else_=None),
+			updated_at=utcnow()
+		).execution_options(synchronize_session=False)
+	)
+	
+	# A todo moving back into a list it left earlier must not also be reported as deleted there
+	db.query(TodoDeletion).filter(
+		TodoDeletion.list_id == target_list_id,
+		TodoDeletion.todo_id.in_(moved_ids)
+	).delete(synchronize_session=False)
+	db.add_all(TodoDeletion(todo_id=todo_id, list_id=list_id) for todo_id in moved_ids)
+	
+	activity.log_todos_moved(db, user_id, list_id, moved_ids, to_list_id=target_list_id)
+	activity.log_todos_moved(db, user_id, target_list_id, moved_ids, from_list_id=list_id)
+	
+	db.commit()
+	return db.query(Todo).filter(Todo.id.in_(moved_ids)).order_by(Todo.position.nulls_last()).all()
+
+
 def delete_todo(db: Session, todo_id: int, user_id: int) -> bool:
 	todo = db.query(Todo).filter(Todo.id == todo_id).first()
 	
@@ -331,6 +840,20 @@ def delete_todo(db: Session, todo_id: int, user_id: int) -> bool:
 	
 	activity.log_todo_deleted(db, user_id, todo.id, todo.list_id, todo.name)
 	
+	# Subtasks go with their parent: tombstone the whole subtree for delta sync
+	tree = _subtree_cte(todo.list_id, [todo.id], MAX_SUBTASK_DEPTH)
+	subtree_ids = [todo_id for (todo_id,) in db.execute(select(tree.c.id))]
+	descendant_ids = [todo_id for todo_id in subtree_ids if todo_id != todo.id]
+	
+	tag_stats.invalidate_on_commit(
+		db, (owner_id for (owner_id,) in db.query(Tag.user_id).join(
+			models.todo_tags, models.todo_tags.c.tag_id == Tag.id
+		).filter(models.todo_tags.c.todo_id.in_(subtree_ids)).distinct())
+	)
+	
+	db.add_all(TodoDeletion(todo_id=todo_id, list_id=todo.list_id) for todo_id in subtree_ids)
+	if descendant_ids:
+		db.query(Todo).filter(Todo.id.in_(descendant_ids)).delete(synchronize_session=False)
 	db.delete(todo)
 	db.commit()
 	return True
@@ -342,6 +865,53 @@ def get_user_tags(db: Session, user_id: int) -> List[Tag]:
 	return db.query(Tag).filter(Tag.user_id == user_id).all()
 
 
+def get_tag_todos(
+	db: Session,
+	tag_id: int,
+	user_id: int,
+	after_id: Optional[int] = None,
+	limit: int = 50
+) -> Tuple[List[Todo], Optional[int]]:
+	"""
+	Todos carrying a tag in any list the user can view, in todo id order.
+	
+	Pages are keyset-based on todo id: the scan starts right after `after_id` in the
+	(tag_id, todo_id) index instead of skipping rows. Returns (todos, next_cursor).
+	"""
+	if not db.query(Tag.id).filter(Tag.id == tag_id).first():
+		raise HTTPException(
+			status_code=status.HTTP_404_NOT_FOUND,
+			detail="Tag not found"
+		)
+	
+	query = db.query(Todo).join(
+		models.todo_tags, models.todo_tags.c.todo_id == Todo.id
+	).filter(
+		models.todo_tags.c.tag_id == tag_id,
+		Todo.list_id.in_(viewable_list_ids(user_id))
+	)
+	if after_id is not None:
+		query = query.filter(models.todo_tags.c.todo_id > after_id)
+	
+	todos = query.options(selectinload(Todo.tags)).order_by(
+		models.todo_tags.c.todo_id
+	).limit(limit + 1).all()
+	
+	next_cursor = todos[limit - 1].id if len(todos) > limit else None
+	return todos[:limit], next_cursor
+
+
+def _touch_tagged_todos(db: Session, tag_ids) -> int:
+	"""Bump the todos linked to these tags so delta-sync clients pick up their new tags."""
+	todo_tags = models.todo_tags
+	return db.execute(
+		update(Todo).where(
+			Todo.id.in_(select(todo_tags.c.todo_id).where(todo_tags.c.tag_id.in_(tag_ids)))
+		).values(updated_at=utcnow()),
+		execution_options={"synchronize_session": False}
+	).rowcount
+
+
 def create_tag(db: Session, tag_data: schemas.TagCreate, user_id: int) -> Tag:
 	existing = db.query(Tag).filter(
 		Tag.name == tag_data.name,
@@ -385,6 +955,8 @@ def update_tag(db: Session, tag_id: int, tag_data: schemas.TagUpdate, user_id: i
 	if tag_data.color is not None:
 		tag.color = tag_data.color
 	
+	if db.is_modified(tag):
+		_touch_tagged_todos(db, [tag.id])
 	db.commit()
 	db.refresh(tag)
 	return tag
@@ -405,6 +977,61 @@ def delete_tag(db: Session, tag_id: int, user_id: int) -> bool:
 			detail="You do not have permission to delete this tag"
 		)
 	
+	# Before the delete, while the links still exist
+	_touch_tagged_todos(db, [tag.id])
 	db.delete(tag)
 	db.commit()
 	return True
+
+
+def merge_tags(db: Session, tag_id: int, merge_data: schemas.TagMerge, user_id: int) -> Tag:
+	"""
+	Fold the source tags into tag_id and delete them, in one transaction.
+	
+	Links are re-pointed set-wise with INSERT ... SELECT ... ON CONFLICT DO NOTHING
+	(todos already carrying the target keep a single link), so the statement count
+	does not depend on how many todos are relabeled.
+	"""
+	source_ids = set(merge_data.source_tag_ids)
+	if tag_id in source_ids:
+		raise HTTPException(
+			status_code=status.HTTP_400_BAD_REQUEST,
+			detail="A tag cannot be merged into itself"
+		)
+	
+	tags = {tag.id: tag for tag in db.query(Tag).filter(Tag.id.in_(source_ids | {tag_id}))}
+	if len(tags) != len(source_ids) + 1:
+		raise HTTPException(
+			status_code=status.HTTP_404_NOT_FOUND,
+			detail="Tag not found"
+		)
+	
+	if any(tag.user_id != user_id for tag in tags.values()):
+		raise HTTPException(
+			status_code=status.HTTP_403_FORBIDDEN,
+			detail="You do not have permission to modify this tag"
+		)
+	
+	relabeled = _touch_tagged_todos(db, source_ids)
+	
+	todo_tags = models.todo_tags
+	dialect_insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+	db.execute(
+		dialect_insert(todo_tags).from_select(
+			["todo_id", "tag_id"],
+			select(todo_tags.c.todo_id, literal(tag_id)).where(todo_tags.c.tag_id.in_(source_ids)).distinct()
+		).on_conflict_do_nothing()
+	)
+	db.execute(delete(todo_tags).where(todo_tags.c.tag_id.in_(source_ids)))
+	db.execute(delete(Tag).where(Tag.id.in_(source_ids)))
+	
+	target = tags[tag_id]
+	tag_stats.invalidate_on_commit(db, [user_id])
+	activity.log_tags_merged(
+		db, user_id, target.id, target.name,
+		sorted(tags[source_id].name for source_id in source_ids), relabeled
+	)
+	db.commit()
+	
+	db.refresh(target)
+	return target
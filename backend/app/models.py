@@ -1,10 +1,15 @@
-from sqlalchemy import Column, Integer, String, Text, Date, Enum, DateTime, Boolean, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, Text, Date, Enum, DateTime, Boolean, ForeignKey, Table, Index, DDL, JSON, event
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
-from datetime import datetime
+from sqlalchemy.sql import func, text
+from datetime import datetime, timezone
 import enum
 from app.database import Base
 
+def utcnow() -> datetime:
+	return datetime.now(timezone.utc)
+
+
 class TodoStatus(str, enum.Enum):
 	NOT_STARTED = "Not Started"
 	IN_PROGRESS = "In Progress"
@@ -19,6 +24,13 @@ class TodoPriority(str, enum.Enum):
 	LOWEST = "Lowest"
 
 
+class RecurrenceFrequency(str, enum.Enum):
+	DAILY = "daily"
+	WEEKLY = "weekly"
+	MONTHLY = "monthly"
+	YEARLY = "yearly"
+
+
 class PermissionLevel(str, enum.Enum):
 	VIEW = "view"
 	UPDATE = "update"
@@ -31,6 +43,7 @@ class ActivityActionType(str, enum.Enum):
 	DELETED = "deleted"
 	SHARED = "shared"
 	PERMISSION_CHANGED = "permission_changed"
+	MOVED = "moved"
 
 
 class ActivityEntityType(str, enum.Enum):
@@ -44,7 +57,9 @@ todo_tags = Table(
 	Base.metadata,
 	Column('todo_id', Integer, ForeignKey('todos.id', ondelete='CASCADE'), primary_key=True),
 	Column('tag_id', Integer, ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True),
-	Column('created_at', DateTime(timezone=True), server_default=func.now())
+	Column('created_at', DateTime(timezone=True), server_default=func.now()),
+	# Covers tag -> todos lookups without touching the heap; the PK covers todo -> tags
+	Index('idx_todo_tags_tag_id_todo_id', 'tag_id', 'todo_id')
 )
 
 class User(Base):
@@ -155,30 +170,158 @@ class Todo(Base):
 	list_id = Column(Integer, ForeignKey('todo_lists.id', ondelete='CASCADE'), nullable=False, index=True)
 	created_by = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
 	created_at = Column(DateTime(timezone=True), server_default=func.now())
-	updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+	# Set on insert as well as update so it doubles as the delta-sync cursor
+	updated_at = Column(DateTime(timezone=True), default=utcnow, onupdate=utcnow)
 	completed_at = Column(DateTime(timezone=True), nullable=True, index=True)
+	reminder_sent_at = Column(DateTime(timezone=True), nullable=True)
+	# Fractional ordering key (see app.ordering); byte-wise collation keeps key order on Postgres
+	position = Column(String(255).with_variant(String(255, collation="C"), "postgresql"), nullable=True)
+	# Subtasks: deleting a todo deletes its whole subtree
+	parent_id = Column(Integer, ForeignKey('todos.id', ondelete='CASCADE'), nullable=True)
+	# Recurrence rule; only the latest open occurrence of a series carries it (see app.recurrence)
+	recurrence_frequency = Column(
+		Enum(RecurrenceFrequency, native_enum=False, length=20, values_callable=lambda x: [e.value for e in x]),
+		nullable=True
+	)
+	recurrence_interval = Column(Integer, nullable=True)
+	recurrence_until = Column(Date, nullable=True)
+	# Day of month monthly/yearly series fall on; occurrences clamped to a shorter month return to it
+	recurrence_anchor_day = Column(Integer, nullable=True)
+
+	__table_args__ = (
+		Index('idx_todos_list_id_updated_at', 'list_id', 'updated_at'),
+		Index('idx_todos_list_id_position', 'list_id', 'position'),
+		Index('idx_todos_list_id_parent_id', 'list_id', 'parent_id'),
+		# Open todos only: serves the cross-list agenda by due date
+		Index(
+			'idx_todos_list_id_due_date_open', 'list_id', 'due_date',
+			postgresql_where=text("status <> 'Completed'"),
+			sqlite_where=text("status <> 'Completed'")
+		),
+		# Open todos still awaiting a reminder: the index empties as the scanner marks them
+		Index(
+			'idx_todos_due_date_pending_reminder', 'due_date',
+			postgresql_where=text("status <> 'Completed' AND reminder_sent_at IS NULL"),
+			sqlite_where=text("status <> 'Completed' AND reminder_sent_at IS NULL")
+		),
+	)
 
 	# Relationships
 	todo_list = relationship("TodoList", back_populates="todos")
 	creator = relationship("User", back_populates="created_todos", foreign_keys=[created_by])
 	tags = relationship("Tag", secondary=todo_tags, back_populates="todos")
 
+	@property
+	def recurrence(self):
+		if self.recurrence_frequency is None:
+			return None
+		return {
+			"frequency": self.recurrence_frequency,
+			"interval": self.recurrence_interval or 1,
+			"until": self.recurrence_until
+		}
+
 	def __repr__(self):
 		return f"<Todo(id={self.id}, name='{self.name}', list_id={self.list_id}, status='{self.status}')>"
 
 
+class TodoDeletion(Base):
+	"""Tombstone left behind by a deleted todo so delta-sync clients can drop it."""
+	__tablename__ = "todo_deletions"
+
+	id = Column(Integer, primary_key=True, index=True)
+	todo_id = Column(Integer, nullable=False)
+	list_id = Column(Integer, ForeignKey('todo_lists.id', ondelete='CASCADE'), nullable=False)
+	deleted_at = Column(DateTime(timezone=True), default=utcnow, nullable=False)
+
+	__table_args__ = (
+		Index('idx_todo_deletions_list_id_deleted_at', 'list_id', 'deleted_at'),
+	)
+
+	def __repr__(self):
+		return f"<TodoDeletion(todo_id={self.todo_id}, list_id={self.list_id})>"
+
+
+# Full-text search over todo name/description. On Postgres a trigger keeps
+# todos.search_vector current (see migration 20251120000008); on SQLite an
+# external-content FTS5 table mirrors the same columns so search also works
+# in the in-memory test database.
+_todos_search_ddl = {
+	"postgresql": [
+		"ALTER TABLE todos ADD COLUMN IF NOT EXISTS search_vector tsvector",
+		"""CREATE OR REPLACE FUNCTION todos_search_vector_update() RETURNS trigger AS $$
+BEGIN
+	NEW.search_vector :=
+		setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') ||
+		setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B');
+	RETURN NEW;
+END
+$$ LANGUAGE plpgsql""",
+		"DROP TRIGGER IF EXISTS set_todos_search_vector ON todos",
+		"""CREATE TRIGGER set_todos_search_vector BEFORE INSERT OR UPDATE OF name, description
+	ON todos FOR EACH ROW EXECUTE FUNCTION todos_search_vector_update()""",
+		"CREATE INDEX IF NOT EXISTS idx_todos_search_vector ON todos USING gin (search_vector)",
+	],
+	"sqlite": [
+		"""CREATE VIRTUAL TABLE IF NOT EXISTS todos_fts USING fts5(
+	name, description, content='todos', content_rowid='id'
+)""",
+		"""CREATE TRIGGER IF NOT EXISTS todos_fts_insert AFTER INSERT ON todos BEGIN
+	INSERT INTO todos_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+END""",
+		"""CREATE TRIGGER IF NOT EXISTS todos_fts_delete AFTER DELETE ON todos BEGIN
+	INSERT INTO todos_fts(todos_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+END""",
+		"""CREATE TRIGGER IF NOT EXISTS todos_fts_update AFTER UPDATE OF name, description ON todos BEGIN
+	INSERT INTO todos_fts(todos_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description);
+	INSERT INTO todos_fts(rowid, name, description) VALUES (new.id, new.name, new.description);
+END""",
+	],
+}
+
+for _dialect, _statements in _todos_search_ddl.items():
+	for _statement in _statements:
+		event.listen(Todo.__table__, "after_create", DDL(_statement).execute_if(dialect=_dialect))
+
+event.listen(Todo.__table__, "before_drop", DDL("DROP TABLE IF EXISTS todos_fts").execute_if(dialect="sqlite"))
+
+# Trigram indexes let autocomplete's substring matches (ILIKE '%q%') use an
+# index on Postgres (see migration 20251120000014). SQLite has no equivalent,
+# so autocomplete falls back to a prefix scan there.
+for _table, _index in (
+	(Tag.__table__, "CREATE INDEX IF NOT EXISTS idx_tags_name_trgm ON tags USING gin (name gin_trgm_ops)"),
+	(Todo.__table__, "CREATE INDEX IF NOT EXISTS idx_todos_name_trgm ON todos USING gin (name gin_trgm_ops)"),
+):
+	event.listen(_table, "after_create", DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"))
+	event.listen(_table, "after_create", DDL(_index).execute_if(dialect="postgresql"))
+
+
 class ActivityLog(Base):
+	# On Postgres the migrations partition this table by month on created_at,
+	# with a primary key of (id, created_at); see app.activity_retention
 	__tablename__ = "activity_logs"
 
 	id = Column(Integer, primary_key=True, index=True)
-	user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
-	list_id = Column(Integer, ForeignKey('todo_lists.id', ondelete='CASCADE'), nullable=True, index=True)
+	user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+	list_id = Column(Integer, ForeignKey('todo_lists.id', ondelete='CASCADE'), nullable=True)
 	todo_id = Column(Integer, ForeignKey('todos.id', ondelete='SET NULL'), nullable=True, index=True)
 	action_type = Column(String(50), nullable=False, index=True)
 	entity_type = Column(String(50), nullable=False, index=True)
 	entity_id = Column(Integer, nullable=True)
-	details = Column(Text, nullable=True)  # JSON stored as text
-	created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+	details = Column(JSON().with_variant(JSONB, "postgresql"), nullable=True)
+	# Set in Python as well so feed cursors compare at full precision on every backend
+	created_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now(), index=True)
+
+	__table_args__ = (
+		# Keyset feed pages: newest first per user / per list, id breaking timestamp ties
+		Index('idx_activity_logs_user_id_created_at', user_id, created_at.desc(), id.desc()),
+		Index('idx_activity_logs_list_id_created_at', list_id, created_at.desc(), id.desc()),
+		# Serves containment (@>) and jsonpath (@?) filters on details
+		Index(
+			'idx_activity_logs_details', details,
+			postgresql_using='gin', postgresql_ops={'details': 'jsonb_path_ops'}
+		).ddl_if(dialect='postgresql'),
+	)
 
 	# Relationships
 	user = relationship("User", back_populates="activity_logs")
@@ -187,13 +330,49 @@ class ActivityLog(Base):
 	
 	@property
 	def details_dict(self):
-		if self.details:
-			import json
-			try:
-				return json.loads(self.details)
-			except:
-				return None
-		return None
+		return self.details if isinstance(self.details, dict) else None
 
 	def __repr__(self):
 		return f"<ActivityLog(id={self.id}, user_id={self.user_id}, action='{self.action_type}', entity='{self.entity_type}')>"
+
+
+class ActivityDailyRollup(Base):
+	"""Per-day activity counts kept for months whose entries have been dropped."""
+	__tablename__ = "activity_daily_rollups"
+
+	id = Column(Integer, primary_key=True, index=True)
+	day = Column(Date, nullable=False)
+	user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+	list_id = Column(Integer, ForeignKey('todo_lists.id', ondelete='CASCADE'), nullable=True)
+	action_type = Column(String(50), nullable=False)
+	entity_type = Column(String(50), nullable=False)
+	count = Column(Integer, nullable=False)
+
+	__table_args__ = (
+		Index('idx_activity_daily_rollups_user_id_day', user_id, day),
+		Index('idx_activity_daily_rollups_list_id_day', list_id, day),
+	)
+
+	def __repr__(self):
+		return f"<ActivityDailyRollup(day={self.day}, user_id={self.user_id}, list_id={self.list_id}, count={self.count})>"
+
+
+class ListActivityDaily(Base):
+	"""Per-list, per-day activity counts, kept up to date as entries are written; backs the activity digest."""
+	__tablename__ = "list_activity_daily"
+
+	id = Column(Integer, primary_key=True, index=True)
+	list_id = Column(Integer, ForeignKey('todo_lists.id', ondelete='CASCADE'), nullable=False)
+	day = Column(Date, nullable=False)
+	user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+	action_type = Column(String(50), nullable=False)
+	entity_type = Column(String(50), nullable=False)
+	count = Column(Integer, nullable=False, default=0)
+
+	__table_args__ = (
+		# Upsert target, and serves digest reads by list and day range
+		Index('uq_list_activity_daily', list_id, day, user_id, action_type, entity_type, unique=True),
+	)
+
+	def __repr__(self):
+		return f"<ListActivityDaily(list_id={self.list_id}, day={self.day}, user_id={self.user_id}, count={self.count})>"
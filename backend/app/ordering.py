@@ -0,0 +1,188 @@
+"""
+Fractional position keys for manual todo ordering.
+
+Positions are base-62 strings compared byte-wise and read as fractions in
+(0, 1): "V" sits halfway, "F" a quarter of the way. A key strictly between any
+two keys always exists, so moving a todo rewrites only that todo's row. Keys
+never end in "0" ("a0" would equal "a"), which keeps every midpoint well defined.
+
+Appends count up through levels near the top of the key space: level k is
+"z" * k followed by a (k + 1)-digit number that does not start with "z", so
+every level sorts after the one below it and n appends need O(log n) digits.
+"""
+from typing import List, Optional, Set
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from app.models import Todo, TodoList, utcnow
+
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+
+# Once a write produces a key this long the list is re-spaced in the background
+REBALANCE_KEY_LENGTH = 16
+
+# Session.info key holding lists that got a key of REBALANCE_KEY_LENGTH or more
+REBALANCE_LISTS_KEY = "rebalance_lists"
+
+
+def _increment(digits: str) -> Optional[str]:
+	# `digits` plus one as a number of the same width, or None on overflow
+	carried = digits.rstrip(DIGITS[-1])
+	if not carried:
+		return None
+	bumped = DIGITS[DIGITS.index(carried[-1]) + 1]
+	return carried[:-1] + bumped + DIGITS[0] * (len(digits) - len(carried))
+
+
+def _after(a: str) -> str:
+	# The next append key after `a`: the next number on a's level, or the first
+	# one on the level above once the number would start with "z"
+	if not a:
+		return DIGITS[BASE // 2]
+	
+	level = len(a) - len(a.lstrip(DIGITS[-1]))
+	# a's digits after the run, cut to the level's width: one more sorts above a
+	number = a[level:2 * level + 1].ljust(level + 1, DIGITS[0])
+	while True:
+		number = _increment(number)
+		if number is None or number[0] == DIGITS[-1]:
+			key = DIGITS[-1] * (level + 1) + DIGITS[0] * (level + 1) + DIGITS[1]
+			break
+		if not number.endswith(DIGITS[0]):
+			key = DIGITS[-1] * level + number
+			break
+	
+	if len(key) > len(a) + 2:
+		# Keys appended before levels carry long runs of "z": step the digit
+		# after the run instead, and let the rebalance this triggers re-space them
+		rest = a[level:]
+		return DIGITS[-1] * level + (DIGITS[DIGITS.index(rest[0]) + 1] if rest else DIGITS[BASE // 2])
+	return key
+
+
+def _midpoint(a: str, b: Optional[str]) -> str:
+	# a < b, where "" is the lower bound and None the upper bound
+	if b is None:
+		# Appending: count up instead of halving so keys grow slowly
+		return _after(a)
+	
+	n = 0
+	while n < len(b) and (a[n] if n < len(a) else "0") == b[n]:
+		n += 1
+	if n > 0:
+		return b[:n] + _midpoint(a[n:], b[n:])
+	
+	digit_a = DIGITS.index(a[0]) if a else 0
+	digit_b = DIGITS.index(b[0])
+	if not a and digit_b > 1:
+		# Prepending: step down one digit for the same reason
+		return DIGITS[digit_b - 1]
+	if digit_b - digit_a > 1:
+		return DIGITS[(digit_a + digit_b + 1) // 2]
+	
+	# Adjacent first digits: shorten to b's first digit, or extend a
+	if len(b) > 1:
+		return b[0]
+	return DIGITS[digit_a] + _after(a[1:])
+
+
+def key_between(before: Optional[str], after: Optional[str]) -> str:
+	"""A key sorting strictly after `before` and before `after`; None means open-ended."""
+	before = before or ""
+	if after is not None and before >= after:
+		raise ValueError(f"{before!r} must sort before {after!r}")
+	return _midpoint(before, after)
+
+
+def spaced_keys(count: int) -> List[str]:
+	"""`count` ascending keys spread evenly over the key space, as short as possible."""
+	width = 1
+	while BASE ** width <= count:
+		width += 1
+	
+	step = BASE ** width // (count + 1)
+	keys = []
+	for i in range(1, count + 1):
+		value = step * i
+		digits = []
+		for _ in range(width):
+			value, digit = divmod(value, BASE)
+			digits.append(DIGITS[digit])
+		keys.append("".join(reversed(digits)).rstrip("0"))
+	return keys
+
+
+def last_position(db: Session, list_id: int) -> Optional[str]:
+	return db.query(func.max(Todo.position)).filter(Todo.list_id == list_id).scalar()
+
+
+def track_key(db: Session, list_id: int, key: str) -> str:
+	"""`key`, flagging its list for a rebalance once the session's request is done if the key is long."""
+	if len(key) >= REBALANCE_KEY_LENGTH:
+		db.info.setdefault(REBALANCE_LISTS_KEY, set()).add(list_id)
+	return key
+
+
+def append_key(db: Session, list_id: int) -> str:
+	"""A key after every todo in the list."""
+	return track_key(db, list_id, key_between(last_position(db, list_id), None))
+
+
+def lists_to_rebalance(db: Session) -> Set[int]:
+	"""Lists flagged by track_key on this session since the last call."""
+	return db.info.pop(REBALANCE_LISTS_KEY, set())
+
+
+def lock_list(db: Session, list_id: int) -> None:
+	"""
+	Take the list's row lock until commit. Moves and rebalancing both hold it,
+	so a move never computes its key from positions a rebalance is rewriting.
+	A no-op on SQLite, which serializes writers anyway.
+	"""
+	db.query(TodoList.id).filter(TodoList.id == list_id).with_for_update().scalar()
+
+
+def fill_missing_positions(db: Session, list_id: int) -> int:
+	"""
+	Give todos without a position keys at the end of the list, in id order,
+	which is where reads already sort them. Does not commit.
+	"""
+	missing = [
+		todo_id for (todo_id,) in
+		db.query(Todo.id).filter(Todo.list_id == list_id, Todo.position.is_(None)).order_by(Todo.id)
+	]
+	if not missing:
+		return 0
+	
+	now = utcnow()
+	position = last_position(db, list_id)
+	rows = []
+	for todo_id in missing:
+		position = track_key(db, list_id, key_between(position, None))
+		rows.append({"id": todo_id, "position": position, "updated_at": now})
+	db.execute(update(Todo), rows)
+	return len(rows)
+
+
+def rebalance_positions(db: Session, list_id: int) -> int:
+	"""Rewrite every position in a list with short, evenly spaced keys, keeping the order."""
+	lock_list(db, list_id)
+	todo_ids = [
+		todo_id for (todo_id,) in
+		db.query(Todo.id).filter(Todo.list_id == list_id).order_by(Todo.position.nulls_last(), Todo.id)
+	]
+	if not todo_ids:
+		return 0
+	
+	now = utcnow()
+	db.execute(
+		update(Todo),
+		[
+			{"id": todo_id, "position": key, "updated_at": now}
+			for todo_id, key in zip(todo_ids, spaced_keys(len(todo_ids)))
+		]
+	)
+	db.commit()
+	return len(todo_ids)
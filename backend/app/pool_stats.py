@@ -0,0 +1,167 @@
+"""
+Database connection pool settings and statistics.
+
+Engines created through monitored_engine() take their pool size, overflow,
+timeout, recycle and pre-ping settings from the environment, and their pool
+times every checkout. Stats show how many requests are waiting for a
+connection right now and a histogram of how long checkouts waited, next to
+the pool's own checked-in and checked-out counts, so an exhausted pool shows
+up before requests start timing out.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# Upper bounds of the checkout wait histogram buckets
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_registry: Dict[str, "PoolStats"] = {}
+
+
+class PoolStats:
+	"""Counters for one engine's pool, updated from the pool's checkout path and pool events."""
+	
+	def __init__(self, name: str):
+		self.name = name
+		self.engine = None
+		self._lock = threading.Lock()
+		self._waiting = 0
+		self._counts = {"connects": 0, "checkouts": 0, "timeouts": 0, "invalidated": 0}
+		self._buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+		self._wait_count = 0
+		self._wait_total = 0.0
+		self._wait_max = 0.0
+	
+	def begin_wait(self):
+		with self._lock:
+			self._waiting += 1
+	
+	def end_wait(self, seconds: float, timed_out: bool = False):
+		ms = seconds * 1000
+		with self._lock:
+			self._waiting -= 1
+			self._buckets[bisect_left(WAIT_BUCKETS_MS, ms)] += 1
+			self._wait_count += 1
+			self._wait_total += ms
+			self._wait_max = max(self._wait_max, ms)
+			if timed_out:
+				self._counts["timeouts"] += 1
+	
+	def count(self, key: str):
+		with self._lock:
+			self._counts[key] += 1
+	
+	def watch(self, engine):
+		"""Count connects, checkouts and invalidations on a sync engine."""
+		self.engine = engine
+		event.listen(engine, "connect", lambda *args: self.count("connects"))
+		event.listen(engine, "checkout", lambda *args: self.count("checkouts"))
+		event.listen(engine, "invalidate", lambda *args: self.count("invalidated"))
+	
+	def snapshot(self) -> Dict[str, Any]:
+		# engine.pool is replaced on dispose(), so it is read on every call
+		pool = self.engine.pool if self.engine is not None else None
+		
+		def pool_value(method: str) -> Optional[int]:
+			fn = getattr(pool, method, None)
+			return fn() if callable(fn) else None
+		
+		with self._lock:
+			cumulative, buckets = 0, []
+			for bound, count in zip(WAIT_BUCKETS_MS + (None,), self._buckets):
+				cumulative += count
+				buckets.append({"le_ms": bound, "count": cumulative})
+			stats = dict(self._counts)
+			stats.update(
+				waiting=self._waiting,
+				wait_ms={
+					"count": self._wait_count,
+					"avg": round(self._wait_total / self._wait_count, 3) if self._wait_count else 0,
+					"max": round(self._wait_max, 3),
+					"buckets": buckets,
+				},
+			)
+		
+		stats.update(
+			name=self.name,
+			pool_class=type(pool).__name__ if pool is not None else None,
+			size=pool_value("size"),
+			checked_in=pool_value("checkedin"),
+			checked_out=pool_value("checkedout"),
+			overflow=pool_value("overflow"),
+			max_overflow=getattr(pool, "_max_overflow", None),
+			timeout=pool_value("timeout"),
+			recycle=getattr(pool, "_recycle", None),
+			pre_ping=getattr(pool, "_pre_ping", None),
+		)
+		return stats
+
+
+def _timed(pool_class, stats: PoolStats):
+	"""`pool_class` with every checkout timed into `stats`."""
+	class TimedPool(pool_class):
+		def _do_get(self):
+			stats.begin_wait()
+			started = time.perf_counter()
+			timed_out = False
+			try:
+				return super()._do_get()
+			except PoolTimeoutError:
+				timed_out = True
+				raise
+			finally:
+				stats.end_wait(time.perf_counter() - started, timed_out)
+	
+	# recreate() on dispose() builds the new pool from this class, keeping the stats
+	TimedPool.__name__ = TimedPool.__qualname__ = pool_class.__name__
+	return TimedPool
+
+
+def _uses_queue_pool(url: str, kwargs: Dict[str, Any]) -> bool:
+	if "poolclass" in kwargs or "pool" in kwargs:
+		return False
+	parsed = make_url(url)
+	# In-memory SQLite gets a single connection per thread, not a queue pool
+	return parsed.get_backend_name() != "sqlite" or parsed.database not in (None, "", ":memory:")
+
+
+def monitored_engine(name: str, url: str, create: Callable[..., Any], pool_class=QueuePool, **kwargs):
+	"""
+	`create(url, **kwargs)` (create_engine or create_async_engine) with the
+	pool settings from the environment, unless given in kwargs, and its stats
+	registered under `name`.
+	"""
+	stats = PoolStats(name)
+	if _uses_queue_pool(url, kwargs):
+		options = {
+			"pool_size": POOL_SIZE,
+			"max_overflow": MAX_OVERFLOW,
+			"pool_timeout": POOL_TIMEOUT,
+			"pool_recycle": POOL_RECYCLE,
+			"pool_pre_ping": POOL_PRE_PING,
+		}
+		options.update(kwargs)
+		kwargs = dict(options, poolclass=_timed(pool_class, stats))
+	
+	engine = create(url, **kwargs)
+	# Async engines fire pool events on their sync engine
+	stats.watch(getattr(engine, "sync_engine", engine))
+	_registry[name] = stats
+	return engine
+
+
+def get_pool_stats() -> List[Dict[str, Any]]:
+	return [stats.snapshot() for stats in _registry.values()]
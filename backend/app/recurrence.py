@@ -0,0 +1,86 @@
+"""
+Recurring todos.
+
+A series is stored as one todo per occurrence, but occurrences are created
+lazily: only the latest open occurrence carries the rule, and completing it
+creates the next one and hands the rule over. Storage therefore grows with
+the occurrences actually completed, not with how far the rule reaches.
+"""
+import calendar
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from app import ordering
+from app.models import RecurrenceFrequency, Todo
+
+
+def _add_months(day: date, months: int, anchor_day: int) -> date:
+	month_index = day.month - 1 + months
+	year, month = day.year + month_index // 12, month_index % 12 + 1
+	# Clamp to the end of shorter months: Jan 31 + 1 month is Feb 28/29
+	return day.replace(year=year, month=month, day=min(anchor_day, calendar.monthrange(year, month)[1]))
+
+
+def next_due_date(
+	due_date: date,
+	frequency: RecurrenceFrequency,
+	interval: int = 1,
+	anchor_day: Optional[int] = None
+) -> date:
+	"""
+	The occurrence following `due_date`. Monthly and yearly series land on
+	`anchor_day` (default: due_date's day), clamped to shorter months, so a
+	series due on the 31st goes Jan 31, Feb 28, Mar 31 rather than staying
+	on the 28th.
+	"""
+	if frequency == RecurrenceFrequency.DAILY:
+		return due_date + timedelta(days=interval)
+	if frequency == RecurrenceFrequency.WEEKLY:
+		return due_date + timedelta(weeks=interval)
+	months = interval if frequency == RecurrenceFrequency.MONTHLY else 12 * interval
+	return _add_months(due_date, months, anchor_day or due_date.day)
+
+
+def create_next_occurrence(db: Session, todo: Todo, today: Optional[date] = None) -> Optional[Todo]:
+	"""
+	Hand a completed todo's rule over to a new occurrence and add it to the session.
+	
+	The new todo is due on the first occurrence after the completed one that is
+	not in the past, so a long-overdue series does not come back overdue. Returns
+	None when the todo has no rule or the rule has run out. The caller commits.
+	"""
+	if todo.recurrence_frequency is None:
+		return None
+	
+	frequency, interval, until = todo.recurrence_frequency, todo.recurrence_interval or 1, todo.recurrence_until
+	anchor_day = todo.recurrence_anchor_day or todo.due_date.day
+	todo.recurrence_frequency = todo.recurrence_interval = todo.recurrence_until = None
+	todo.recurrence_anchor_day = None
+	
+	today = today or date.today()
+	due_date = next_due_date(todo.due_date, frequency, interval, anchor_day)
+	while due_date < today:
+		due_date = next_due_date(due_date, frequency, interval, anchor_day)
+	
+	if until is not None and due_date > until:
+		return None
+	
+	next_todo = Todo(
+		name=todo.name,
+		description=todo.description,
+		due_date=due_date,
+		priority=todo.priority,
+		list_id=todo.list_id,
+		created_by=todo.created_by,
+		parent_id=todo.parent_id,
+		position=ordering.append_key(db, todo.list_id),
+		recurrence_frequency=frequency,
+		recurrence_interval=interval,
+		recurrence_until=until,
+		recurrence_anchor_day=anchor_day,
+		tags=list(todo.tags)
+	)
+	db.add(next_todo)
+	return next_todo
@@ -0,0 +1,101 @@
+import logging
+from collections import defaultdict
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.models import Todo, TodoList, ListPermission, PermissionLevel, TodoStatus, utcnow
+
+logger = logging.getLogger(__name__)
+
+# Called once per user per scan with every todo that user should hear about
+ReminderSink = Callable[[int, List[Todo]], None]
+
+
+def log_reminder_batch(user_id: int, todos: List[Todo]) -> None:
+	logger.info(
+		"Reminder for user %s: %s",
+		user_id,
+		", ".join(f"{todo.name} (due {todo.due_date})" for todo in todos)
+	)
+
+
+def _recipients_by_list(db: Session, list_ids: List[int]) -> Dict[int, List[int]]:
+	"""List owner plus collaborators with update permission, for each list."""
+	recipients = defaultdict(set)
+	
+	for list_id, owner_id in db.query(TodoList.id, TodoList.owner_id).filter(TodoList.id.in_(list_ids)):
+		recipients[list_id].add(owner_id)
+	
+	for list_id, user_id in db.query(ListPermission.list_id, ListPermission.user_id).filter(
+		ListPermission.list_id.in_(list_ids),
+		ListPermission.permission_level == PermissionLevel.UPDATE
+	):
+		recipients[list_id].add(user_id)
+	
+	return {list_id: sorted(user_ids) for list_id, user_ids in recipients.items()}
+
+
+def scan_due_todos(
+	db: Session,
+	today: Optional[date] = None,
+	lead: timedelta = timedelta(days=1),
+	batch_size: int = 500,
+	sink: ReminderSink = log_reminder_batch
+) -> int:
+	"""
+	Send one reminder per open todo that is overdue or due within `lead`, batched per user.
+	
+	Todos are picked from the partial index of open, not-yet-reminded todos and then
+	stamped with reminder_sent_at, which acts as the per-todo high-water mark so a
+	todo is reminded once per due date: crud clears it when the todo is
+	rescheduled or reopened. On Postgres, rows are claimed with SKIP LOCKED so
+	several workers can scan concurrently. Returns the number of todos processed.
+	"""
+	today = today or date.today()
+	
+	todos = db.query(Todo).filter(
+		Todo.status != TodoStatus.COMPLETED,
+		Todo.reminder_sent_at.is_(None),
+		Todo.due_date <= today + lead
+	).order_by(Todo.due_date, Todo.id).limit(batch_size).with_for_update(skip_locked=True, of=Todo).all()
+	
+	if not todos:
+		db.rollback()
+		return 0
+	
+	recipients = _recipients_by_list(db, list({todo.list_id for todo in todos}))
+	batches = defaultdict(list)
+	for todo in todos:
+		for user_id in recipients.get(todo.list_id, []):
+			batches[user_id].append(todo)
+	
+	for user_id, user_todos in batches.items():
+		sink(user_id, user_todos)
+	
+	sent_at = utcnow()
+	# Setting updated_at to itself suppresses its onupdate: reminders are not a
+	# user-visible change and must not resurface the rows in delta sync
+	db.query(Todo).filter(Todo.id.in_([todo.id for todo in todos])).update(
+		{Todo.reminder_sent_at: sent_at, Todo.updated_at: Todo.updated_at},
+		synchronize_session=False
+	)
+	db.commit()
+	
+	return len(todos)
+
+
+def run_scan(
+	db: Session,
+	lead: timedelta = timedelta(days=1),
+	batch_size: int = 500,
+	sink: ReminderSink = log_reminder_batch
+) -> int:
+	"""Drain every pending reminder in batches of `batch_size`."""
+	total = 0
+	while True:
+		processed = scan_due_todos(db, lead=lead, batch_size=batch_size, sink=sink)
+		total += processed
+		if processed < batch_size:
+			return total
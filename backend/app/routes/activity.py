@@ -1,40 +1,71 @@
-from typing import Optional
+from datetime import date, datetime
+from typing import List, Literal, Optional
 from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app import schemas
 from app.database import get_db
 from app.auth import get_current_user
 from app.models import User
-from app.activity import get_activity_feed
+from app.activity import get_activity_feed_response
+from app.activity_digest import get_list_digest
+from app.activity_export import iter_list_activity, ndjson_chunks
 
 router = APIRouter(prefix="/activity", tags=["activity"])
 
+FeedTotal = Literal["none", "cached", "estimate"]
+
 
 @router.get("/", response_model=schemas.ActivityFeedResponse)
 def get_my_activity_feed(
-	skip: int = Query(0, ge=0, description="Number of records to skip"),
+	cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+	skip: int = Query(0, ge=0, deprecated=True, description="Offset paging for older clients; ignored when a cursor is given"),
+	limit: int = Query(50, ge=1, le=100, description="Maximum number of records to return"),
+	total: FeedTotal = Query("none", description="Include a total: none, cached (exact, cached briefly) or estimate"),
+	detail: List[str] = Query([], description="Filter on details, e.g. changes.status or permission_level=update; repeat to combine"),
+	since: Optional[datetime] = Query(None, description="Only entries created at or after this time"),
+	until: Optional[datetime] = Query(None, description="Only entries created before this time"),
+	expand: bool = Query(False, description="Rebuild full old/new values of long text changes, which are stored as diffs"),
+	current_user: User = Depends(get_current_user),
+	db: Session = Depends(get_db)
+):
+	return get_activity_feed_response(
+		db, expand=expand, cursor=cursor, skip=skip, limit=limit, total=total, detail_filters=detail,
+		since=since, until=until, user_id=current_user.id
+	)
+
+
+@router.get("/lists", response_model=schemas.ActivityFeedResponse)
+def get_my_lists_activity_feed(
+	cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
 	limit: int = Query(50, ge=1, le=100, description="Maximum number of records to return"),
+	total: FeedTotal = Query("none", description="Include a total: none, cached (exact, cached briefly) or estimate"),
+	detail: List[str] = Query([], description="Filter on details, e.g. changes.status or permission_level=update; repeat to combine"),
+	since: Optional[datetime] = Query(None, description="Only entries created at or after this time"),
+	until: Optional[datetime] = Query(None, description="Only entries created before this time"),
+	expand: bool = Query(False, description="Rebuild full old/new values of long text changes, which are stored as diffs"),
 	current_user: User = Depends(get_current_user),
 	db: Session = Depends(get_db)
 ):
-	activities, total = get_activity_feed(db, user_id=current_user.id, skip=skip, limit=limit)
-	# Parse details from JSON string to dict
-	for activity in activities:
-		if activity.details and isinstance(activity.details, str):
-			import json
-			try:
-				activity.details = json.loads(activity.details)
-			except:
-				activity.details = None
-	return schemas.ActivityFeedResponse(total=total, items=activities)
+	"""Activity by anyone on every list the current user owns or has been shared."""
+	return get_activity_feed_response(
+		db, expand=expand, cursor=cursor, limit=limit, total=total, detail_filters=detail,
+		since=since, until=until, viewer_id=current_user.id
+	)
 
 
 @router.get("/list/{list_id}", response_model=schemas.ActivityFeedResponse)
 def get_list_activity_feed(
 	list_id: int,
-	skip: int = Query(0, ge=0, description="Number of records to skip"),
+	cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+	skip: int = Query(0, ge=0, deprecated=True, description="Offset paging for older clients; ignored when a cursor is given"),
 	limit: int = Query(50, ge=1, le=100, description="Maximum number of records to return"),
+	total: FeedTotal = Query("none", description="Include a total: none, cached (exact, cached briefly) or estimate"),
+	detail: List[str] = Query([], description="Filter on details, e.g. changes.status or permission_level=update; repeat to combine"),
+	since: Optional[datetime] = Query(None, description="Only entries created at or after this time"),
+	until: Optional[datetime] = Query(None, description="Only entries created before this time"),
+	expand: bool = Query(False, description="Rebuild full old/new values of long text changes, which are stored as diffs"),
 	current_user: User = Depends(get_current_user),
 	db: Session = Depends(get_db)
 ):
@@ -42,34 +73,64 @@ def get_list_activity_feed(
 	from app.authorization import check_list_view_permission
 	check_list_view_permission(db, list_id, current_user.id)
 	
-	activities, total = get_activity_feed(db, list_id=list_id, skip=skip, limit=limit)
-	# Parse details from JSON string to dict
-	for activity in activities:
-		if activity.details and isinstance(activity.details, str):
-			import json
-			try:
-				activity.details = json.loads(activity.details)
-			except:
-				activity.details = None
-	return schemas.ActivityFeedResponse(total=total, items=activities)
+	return get_activity_feed_response(
+		db, expand=expand, cursor=cursor, skip=skip, limit=limit, total=total, detail_filters=detail,
+		since=since, until=until, list_id=list_id
+	)
+
+
+@router.get("/list/{list_id}/digest", response_model=schemas.ActivityDigestResponse)
+def get_list_activity_digest(
+	list_id: int,
+	days: int = Query(7, ge=1, le=366, description="Number of days covered, ending with `end`"),
+	end: Optional[date] = Query(None, description="Last day covered (UTC); defaults to today"),
+	top: int = Query(5, ge=1, le=50, description="Number of top contributors returned"),
+	current_user: User = Depends(get_current_user),
+	db: Session = Depends(get_db)
+):
+	from app.authorization import check_list_view_permission
+	check_list_view_permission(db, list_id, current_user.id)
+	
+	return get_list_digest(db, list_id, end=end, days=days, top=top)
+
+
+@router.get("/list/{list_id}/export")
+def export_list_activity(
+	list_id: int,
+	since: Optional[datetime] = Query(None, description="Only entries created at or after this time"),
+	until: Optional[datetime] = Query(None, description="Only entries created before this time"),
+	gzip: bool = Query(False, description="Compress the export with gzip"),
+	current_user: User = Depends(get_current_user),
+	db: Session = Depends(get_db)
+):
+	"""The list's full activity history as NDJSON, oldest first, streamed as it is read."""
+	from app.authorization import check_list_view_permission
+	check_list_view_permission(db, list_id, current_user.id)
+	
+	filename = f"activity-list-{list_id}.ndjson" + (".gz" if gzip else "")
+	return StreamingResponse(
+		ndjson_chunks(iter_list_activity(db, list_id, since=since, until=until), compress=gzip),
+		media_type="application/gzip" if gzip else "application/x-ndjson",
+		headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+	)
 
 
 @router.get("/all", response_model=schemas.ActivityFeedResponse)
 def get_all_activity_feed(
-	skip: int = Query(0, ge=0, description="Number of records to skip"),
+	cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+	skip: int = Query(0, ge=0, deprecated=True, description="Offset paging for older clients; ignored when a cursor is given"),
 	limit: int = Query(50, ge=1, le=100, description="Maximum number of records to return"),
+	total: FeedTotal = Query("none", description="Include a total: none, cached (exact, cached briefly) or estimate"),
+	detail: List[str] = Query([], description="Filter on details, e.g. changes.status or permission_level=update; repeat to combine"),
+	since: Optional[datetime] = Query(None, description="Only entries created at or after this time"),
+	until: Optional[datetime] = Query(None, description="Only entries created before this time"),
+	expand: bool = Query(False, description="Rebuild full old/new values of long text changes, which are stored as diffs"),
 	current_user: User = Depends(get_current_user),
 	db: Session = Depends(get_db)
 ):
 	# This endpoint shows all activities, not filtered by user
 	# In production, you might want to restrict this or add more filtering
-	activities, total = get_activity_feed(db, skip=skip, limit=limit)
-	# Parse details from JSON string to dict
-	for activity in activities:
-		if activity.details and isinstance(activity.details, str):
-			import json
-			try:
-				activity.details = json.loads(activity.details)
-			except:
-				activity.details = None
-	return schemas.ActivityFeedResponse(total=total, items=activities)
+	return get_activity_feed_response(
+		db, expand=expand, cursor=cursor, skip=skip, limit=limit, total=total, detail_filters=detail,
+		since=since, until=until
+	)
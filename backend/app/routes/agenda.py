@@ -0,0 +1,46 @@
+from datetime import date, timedelta
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app import crud, schemas
+from app.database import get_db
+from app.auth import get_current_user
+from app.models import User
+
+router = APIRouter(prefix="/agenda", tags=["agenda"])
+
+
+@router.get("/", response_model=schemas.AgendaResponse)
+def get_my_agenda(
+	date_from: Optional[date] = Query(None, alias="from", description="First due date to include (default: today)"),
+	date_to: Optional[date] = Query(None, alias="to", description="Last due date to include (default: 7 days after `from`)"),
+	compact: bool = Query(False, description="Return only id, list_id, name, due_date, status and priority"),
+	skip: int = Query(0, ge=0, description="Number of records to skip"),
+	limit: int = Query(100, ge=1, le=500, description="Maximum number of records to return"),
+	current_user: User = Depends(get_current_user),
+	db: Session = Depends(get_db)
+):
+	date_from = date_from or date.today()
+	date_to = date_to or date_from + timedelta(days=7)
+	
+	if date_to < date_from:
+		raise HTTPException(
+			status_code=status.HTTP_400_BAD_REQUEST,
+			detail="`to` must not be before `from`"
+		)
+	
+	rows, has_more = crud.get_agenda(
+		db,
+		user_id=current_user.id,
+		date_from=date_from,
+		date_to=date_to,
+		skip=skip,
+		limit=limit,
+		compact=compact
+	)
+	item_schema = schemas.TodoCompactResponse if compact else schemas.TodoResponse
+	return schemas.AgendaResponse(
+		items=[item_schema.model_validate(row) for row in rows],
+		has_more=has_more
+	)
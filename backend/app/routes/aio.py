@@ -0,0 +1,101 @@
+"""
+Async handlers for the busiest read endpoints.
+
+With DATABASE_MODE=async, main.py registers these routers ahead of the sync
+ones, so they serve the same paths with the same responses while waiting on
+Postgres without holding a threadpool thread. Every other endpoint keeps its
+sync handler.
+"""
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import activity, aio, crud, schemas
+from app.auth import get_current_user_async
+from app.database import get_async_db
+from app.models import User
+from app.routes.activity import FeedTotal
+
+lists_router = APIRouter(prefix="/lists", tags=["lists"])
+todos_router = APIRouter(prefix="/lists/{list_id}/todos", tags=["todos"])
+activity_router = APIRouter(prefix="/activity", tags=["activity"])
+
+
+def _user_lists(db, user_id: int, skip: int, limit: int):
+	return [crud.with_todo_count(todo_list) for todo_list in crud.get_user_lists(db, user_id=user_id, skip=skip, limit=limit)]
+
+
+def _list(db, list_id: int, user_id: int):
+	return crud.with_todo_count(crud.get_list_by_id(db, list_id=list_id, user_id=user_id))
+
+
+@lists_router.get("/", response_model=List[schemas.TodoListResponse])
+async def get_my_lists(
+	skip: int = 0,
+	limit: int = 100,
+	current_user: User = Depends(get_current_user_async),
+	db: AsyncSession = Depends(get_async_db)
+):
+	return await aio.run(
+		db, aio.serialized(_user_lists, List[schemas.TodoListResponse]),
+		user_id=current_user.id, skip=skip, limit=limit
+	)
+
+
+@lists_router.get("/{list_id}", response_model=schemas.TodoListResponse)
+async def get_list(
+	list_id: int,
+	current_user: User = Depends(get_current_user_async),
+	db: AsyncSession = Depends(get_async_db)
+):
+	return await aio.run(db, aio.serialized(_list, schemas.TodoListResponse), list_id=list_id, user_id=current_user.id)
+
+
+@todos_router.get("/", response_model=List[schemas.TodoResponse])
+async def get_todos(
+	list_id: int,
+	skip: int = 0,
+	limit: int = 100,
+	current_user: User = Depends(get_current_user_async),
+	db: AsyncSession = Depends(get_async_db)
+):
+	return await aio.run(
+		db, aio.serialized(crud.get_list_todos, List[schemas.TodoResponse]),
+		list_id=list_id, user_id=current_user.id, skip=skip, limit=limit
+	)
+
+
+@todos_router.get("/{todo_id}", response_model=schemas.TodoResponse)
+async def get_todo(
+	list_id: int,
+	todo_id: int,
+	current_user: User = Depends(get_current_user_async),
+	db: AsyncSession = Depends(get_async_db)
+):
+	return await aio.run(
+		db, aio.serialized(crud.get_list_todo, schemas.TodoResponse),
+		list_id=list_id, todo_id=todo_id, user_id=current_user.id
+	)
+
+
+@activity_router.get("/lists", response_model=schemas.ActivityFeedResponse)
+async def get_my_lists_activity_feed(
+	cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+	limit: int = Query(50, ge=1, le=100, description="Maximum number of records to return"),
+	total: FeedTotal = Query("none", description="Include a total: none, cached (exact, cached briefly) or estimate"),
+	detail: List[str] = Query([], description="Filter on details, e.g. changes.status or permission_level=update; repeat to combine"),
+	since: Optional[datetime] = Query(None, description="Only entries created at or after this time"),
+	until: Optional[datetime] = Query(None, description="Only entries created before this time"),
+	expand: bool = Query(False, description="Rebuild full old/new values of long text changes, which are stored as diffs"),
+	current_user: User = Depends(get_current_user_async),
+	db: AsyncSession = Depends(get_async_db)
+):
+	"""Activity by anyone on every list the current user owns or has been shared."""
+	return await aio.run(
+		db, activity.get_activity_feed_response, expand=expand, cursor=cursor, limit=limit, total=total,
+		detail_filters=detail, since=since, until=until, viewer_id=current_user.id
+	)
+
+
+routers = [lists_router, todos_router, activity_router]
@@ -18,11 +18,7 @@ def get_my_lists(
 ):
 	lists = crud.get_user_lists(db, user_id=current_user.id, skip=skip, limit=limit)
 	
-	# Add todo_count to each list
-	for todo_list in lists:
-		todo_list.todo_count = len(todo_list.todos)
-	
-	return lists
+	return [crud.with_todo_count(todo_list) for todo_list in lists]
 
 
 @router.get("/{list_id}", response_model=schemas.TodoListResponse)
@@ -33,9 +29,7 @@ def get_list(
 ):
 	todo_list = crud.get_list_by_id(db, list_id=list_id, user_id=current_user.id)
 	
-	todo_list.todo_count = len(todo_list.todos)
-	
-	return todo_list
+	return crud.with_todo_count(todo_list)
 
 
 @router.post("/", response_model=schemas.TodoListResponse, status_code=status.HTTP_201_CREATED)
@@ -47,9 +41,7 @@ def create_list(
 
 	new_list = crud.create_list(db, list_data=list_data, owner_id=current_user.id)
 	
-	new_list.todo_count = len(new_list.todos)
-	
-	return new_list
+	return crud.with_todo_count(new_list)
 
 
 @router.put("/{list_id}", response_model=schemas.TodoListResponse)
@@ -61,9 +53,7 @@ def update_list(
 ):
 	updated_list = crud.update_list(db, list_id=list_id, list_data=list_data, user_id=current_user.id)
 	
-	updated_list.todo_count = len(updated_list.todos)
-	
-	return updated_list
+	return crud.with_todo_count(updated_list)
 
 
 @router.delete("/{list_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,34 @@
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app import activity_writer, pool_stats, schemas
+from app.auth import get_current_user
+from app.models import User
+
+# Usernames allowed to read internal metrics; nobody when unset
+METRICS_USERNAMES = {name.strip() for name in os.getenv("METRICS_USERNAMES", "").split(",") if name.strip()}
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+def get_metrics_user(current_user: User = Depends(get_current_user)) -> User:
+	if current_user.username not in METRICS_USERNAMES:
+		raise HTTPException(
+			status_code=status.HTTP_403_FORBIDDEN,
+			detail="You do not have permission to read metrics"
+		)
+	return current_user
+
+
+@router.get("/activity-writer", response_model=schemas.ActivityWriterStats)
+def get_activity_writer_stats(current_user: User = Depends(get_metrics_user)):
+	writer = activity_writer.get_writer()
+	if writer is None:
+		return schemas.ActivityWriterStats(mode="sync")
+	return schemas.ActivityWriterStats(mode="buffered", **writer.stats())
+
+
+@router.get("/db-pool", response_model=schemas.DbPoolMetrics)
+def get_db_pool_stats(current_user: User = Depends(get_metrics_user)):
+	return schemas.DbPoolMetrics(pools=pool_stats.get_pool_stats())
@@ -0,0 +1,42 @@
+from typing import List
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app import schemas
+from app.database import get_db
+from app.auth import get_current_user
+from app.models import User
+from app.search import autocomplete_tags, autocomplete_todos, search_todos
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get("/todos", response_model=List[schemas.TodoResponse])
+def search_my_todos(
+	q: str = Query(..., min_length=1, max_length=200, description="Search terms"),
+	skip: int = Query(0, ge=0, description="Number of records to skip"),
+	limit: int = Query(50, ge=1, le=100, description="Maximum number of records to return"),
+	current_user: User = Depends(get_current_user),
+	db: Session = Depends(get_db)
+):
+	return search_todos(db, user_id=current_user.id, q=q, skip=skip, limit=limit)
+
+
+@router.get("/autocomplete/tags", response_model=List[schemas.TagResponse])
+def autocomplete_my_tags(
+	q: str = Query(..., min_length=1, max_length=100, description="Partially typed tag name"),
+	limit: int = Query(10, ge=1, le=50, description="Maximum number of suggestions"),
+	current_user: User = Depends(get_current_user),
+	db: Session = Depends(get_db)
+):
+	return autocomplete_tags(db, user_id=current_user.id, q=q, limit=limit)
+
+
+@router.get("/autocomplete/todos", response_model=List[schemas.TodoCompactResponse])
+def autocomplete_my_todos(
+	q: str = Query(..., min_length=1, max_length=200, description="Partially typed todo name"),
+	limit: int = Query(10, ge=1, le=50, description="Maximum number of suggestions"),
+	current_user: User = Depends(get_current_user),
+	db: Session = Depends(get_db)
+):
+	return autocomplete_todos(db, user_id=current_user.id, q=q, limit=limit)
@@ -1,22 +1,51 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
 from app import crud, schemas
 from app.database import get_db
 from app.auth import get_current_user
 from app.models import User
+from app.tag_stats import get_tag_usage_counts
 
 router = APIRouter(prefix="/tags", tags=["tags"])
 
 
-@router.get("/", response_model=List[schemas.TagResponse])
+@router.get("/", response_model=Union[List[schemas.TagUsageResponse], List[schemas.TagResponse]])
 def get_my_tags(
+	with_counts: bool = Query(False, description="Include total and open todo counts per tag"),
 	current_user: User = Depends(get_current_user),
 	db: Session = Depends(get_db)
 ):
 	tags = crud.get_user_tags(db, user_id=current_user.id)
-	return tags
+	
+	if not with_counts:
+		return [schemas.TagResponse.model_validate(tag) for tag in tags]
+	
+	counts = get_tag_usage_counts(db, user_id=current_user.id)
+	items = []
+	for tag in tags:
+		total_count, open_count = counts.get(tag.id, (0, 0))
+		items.append(schemas.TagUsageResponse(
+			**schemas.TagResponse.model_validate(tag).model_dump(),
+			total_count=total_count,
+			open_count=open_count
+		))
+	return items
+
+
+@router.get("/{tag_id}/todos", response_model=schemas.TodoKeysetPage)
+def get_tag_todos(
+	tag_id: int,
+	after: Optional[int] = Query(None, description="Cursor from the previous page"),
+	limit: int = Query(50, ge=1, le=100, description="Maximum number of records to return"),
+	current_user: User = Depends(get_current_user),
+	db: Session = Depends(get_db)
+):
+	todos, next_cursor = crud.get_tag_todos(
+		db, tag_id=tag_id, user_id=current_user.id, after_id=after, limit=limit
+	)
+	return schemas.TodoKeysetPage(items=todos, next_cursor=next_cursor)
 
 
 @router.post("/", response_model=schemas.TagResponse, status_code=status.HTTP_201_CREATED)
@@ -29,6 +58,16 @@ def create_tag(
 	return new_tag
 
 
+@router.post("/{tag_id}/merge", response_model=schemas.TagResponse)
+def merge_tags(
+	tag_id: int,
+	merge_data: schemas.TagMerge,
+	current_user: User = Depends(get_current_user),
+	db: Session = Depends(get_db)
+):
+	return crud.merge_tags(db, tag_id=tag_id, merge_data=merge_data, user_id=current_user.id)
+
+
 @router.put("/{tag_id}", response_model=schemas.TagResponse)
 def update_tag(
 	tag_id: int,
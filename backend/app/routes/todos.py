@@ -1,15 +1,30 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 
-from app import crud, schemas
-from app.database import get_db
+from app import crud, ordering, schemas
+from app.database import get_db, SessionLocal
 from app.auth import get_current_user
 from app.models import User
 
 router = APIRouter(prefix="/lists/{list_id}/todos", tags=["todos"])
 
 
+def rebalance_list_positions(list_id: int):
+	db = SessionLocal()
+	try:
+		ordering.rebalance_positions(db, list_id)
+	finally:
+		db.close()
+
+
+def schedule_rebalances(background_tasks: BackgroundTasks, db: Session):
+	"""Re-space, after the response, every list this request gave a long position key."""
+	for list_id in ordering.lists_to_rebalance(db):
+		background_tasks.add_task(rebalance_list_positions, list_id)
+
+
 @router.get("/", response_model=List[schemas.TodoResponse])
 def get_todos(
 	list_id: int,
@@ -22,6 +37,24 @@ def get_todos(
 	return todos
 
 
+@router.get("/changes", response_model=schemas.TodoChangesResponse)
+def get_todo_changes(
+	list_id: int,
+	since: Optional[datetime] = Query(None, description="Cursor returned by the previous sync"),
+	current_user: User = Depends(get_current_user),
+	db: Session = Depends(get_db)
+):
+	changed, deleted, cursor, full_resync = crud.get_todo_changes(
+		db, list_id=list_id, user_id=current_user.id, since=since
+	)
+	return schemas.TodoChangesResponse(
+		cursor=cursor,
+		full_resync=full_resync,
+		changed=changed,
+		deleted=deleted
+	)
+
+
 @router.get("/{todo_id}", response_model=schemas.TodoResponse)
 def get_todo(
 	list_id: int,
@@ -29,33 +62,52 @@ def get_todo(
 	current_user: User = Depends(get_current_user),
 	db: Session = Depends(get_db)
 ):
-	todo = crud.get_todo_by_id(db, todo_id=todo_id, user_id=current_user.id)
-	
-	if todo.list_id != list_id:
-		raise HTTPException(
-			status_code=status.HTTP_404_NOT_FOUND,
-			detail="Todo not found in this list"
-		)
-	
-	return todo
+	return crud.get_list_todo(db, list_id=list_id, todo_id=todo_id, user_id=current_user.id)
+
+
+@router.get("/{todo_id}/subtree", response_model=schemas.TodoTreeNode)
+def get_todo_subtree(
+	list_id: int,
+	todo_id: int,
+	max_depth: int = Query(crud.MAX_SUBTASK_DEPTH, ge=0, le=crud.MAX_SUBTASK_DEPTH, description="Levels of subtasks to include"),
+	current_user: User = Depends(get_current_user),
+	db: Session = Depends(get_db)
+):
+	return crud.get_todo_subtree(db, list_id=list_id, todo_id=todo_id, user_id=current_user.id, max_depth=max_depth)
 
 
 @router.post("/", response_model=schemas.TodoResponse, status_code=status.HTTP_201_CREATED)
 def create_todo(
 	list_id: int,
 	todo_data: schemas.TodoCreate,
+	background_tasks: BackgroundTasks,
 	current_user: User = Depends(get_current_user),
 	db: Session = Depends(get_db)
 ):
 	new_todo = crud.create_todo(db, list_id=list_id, todo_data=todo_data, user_id=current_user.id)
+	schedule_rebalances(background_tasks, db)
 	return new_todo
 
 
+@router.post("/move", response_model=List[schemas.TodoResponse])
+def move_todos_to_list(
+	list_id: int,
+	move_data: schemas.TodoBulkMove,
+	background_tasks: BackgroundTasks,
+	current_user: User = Depends(get_current_user),
+	db: Session = Depends(get_db)
+):
+	moved = crud.move_todos_to_list(db, list_id=list_id, move_data=move_data, user_id=current_user.id)
+	schedule_rebalances(background_tasks, db)
+	return moved
+
+
 @router.put("/{todo_id}", response_model=schemas.TodoResponse)
 def update_todo(
 	list_id: int,
 	todo_id: int,
 	todo_data: schemas.TodoUpdate,
+	background_tasks: BackgroundTasks,
 	current_user: User = Depends(get_current_user),
 	db: Session = Depends(get_db)
 ):
@@ -68,9 +120,60 @@ def update_todo(
 		)
 	
 	updated_todo = crud.update_todo(db, todo_id=todo_id, todo_data=todo_data, user_id=current_user.id)
+	# Completing a recurring todo appends its next occurrence
+	schedule_rebalances(background_tasks, db)
 	return updated_todo
 
 
+@router.patch("/{todo_id}", response_model=schemas.TodoResponse)
+def patch_todo(
+	list_id: int,
+	todo_id: int,
+	todo_data: schemas.TodoUpdate,
+	background_tasks: BackgroundTasks,
+	current_user: User = Depends(get_current_user),
+	db: Session = Depends(get_db)
+):
+	patched = crud.patch_todo(db, todo_id=todo_id, todo_data=todo_data, user_id=current_user.id, list_id=list_id)
+	schedule_rebalances(background_tasks, db)
+	return patched
+
+
+@router.put("/{todo_id}/position", response_model=schemas.TodoResponse)
+def move_todo(
+	list_id: int,
+	todo_id: int,
+	move_data: schemas.TodoMove,
+	background_tasks: BackgroundTasks,
+	current_user: User = Depends(get_current_user),
+	db: Session = Depends(get_db)
+):
+	todo = crud.move_todo(db, list_id=list_id, todo_id=todo_id, move_data=move_data, user_id=current_user.id)
+	schedule_rebalances(background_tasks, db)
+	return todo
+
+
+@router.put("/{todo_id}/recurrence", response_model=schemas.TodoResponse)
+def set_todo_recurrence(
+	list_id: int,
+	todo_id: int,
+	rule: schemas.RecurrenceRule,
+	current_user: User = Depends(get_current_user),
+	db: Session = Depends(get_db)
+):
+	return crud.set_todo_recurrence(db, list_id=list_id, todo_id=todo_id, rule=rule, user_id=current_user.id)
+
+
+@router.delete("/{todo_id}/recurrence", response_model=schemas.TodoResponse)
+def stop_todo_recurrence(
+	list_id: int,
+	todo_id: int,
+	current_user: User = Depends(get_current_user),
+	db: Session = Depends(get_db)
+):
+	return crud.set_todo_recurrence(db, list_id=list_id, todo_id=todo_id, rule=None, user_id=current_user.id)
+
+
 @router.delete("/{todo_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_todo(
 	list_id: int,
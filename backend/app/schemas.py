@@ -1,7 +1,7 @@
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
+from pydantic import AliasChoices, BaseModel, Field, ConfigDict, EmailStr
 from datetime import date, datetime
-from typing import Optional, List
-from app.models import TodoStatus, TodoPriority, PermissionLevel
+from typing import Dict, Optional, List, Union
+from app.models import TodoStatus, TodoPriority, PermissionLevel, RecurrenceFrequency
 
 class UserBase(BaseModel):
 	email: EmailStr = Field(..., description="User's email address")
@@ -102,13 +102,22 @@ class TagUpdate(BaseModel):
 	color: Optional[str] = Field(None, pattern='^#[0-9A-Fa-f]{6}$')
 
 
+class TagMerge(BaseModel):
+	source_tag_ids: List[int] = Field(..., min_length=1, description="Tags to fold into the target and delete")
+
+
 class TagResponse(TagBase):
 	id: int
-	created_by: int
+	created_by: int = Field(..., validation_alias=AliasChoices("created_by", "user_id"))
 	created_at: datetime
 
 	model_config = ConfigDict(from_attributes=True)
 
+
+class TagUsageResponse(TagResponse):
+	total_count: int = Field(0, description="Todos carrying this tag")
+	open_count: int = Field(0, description="Todos carrying this tag that are not completed")
+
 class TodoBase(BaseModel):
 	name: str = Field(..., min_length=1, max_length=255, description="Name of the TODO")
 	description: Optional[str] = Field(None, description="Description of the TODO")
@@ -118,14 +127,23 @@ class TodoBase(BaseModel):
 	priority: TodoPriority = Field(TodoPriority.MEDIUM, description="Priority of the TODO")
 
 
+class RecurrenceRule(BaseModel):
+	frequency: RecurrenceFrequency = Field(..., description="How often the todo repeats")
+	interval: int = Field(1, ge=1, le=365, description="Repeat every `interval` periods")
+	until: Optional[date] = Field(None, description="Last date an occurrence may fall on")
+
+
 class TodoCreate(TodoBase):
 	tag_ids: Optional[List[int]] = Field(default_factory=list, description="List of tag IDs to assign")
+	parent_id: Optional[int] = Field(None, description="Todo in the same list to nest this one under as a subtask")
+	recurrence: Optional[RecurrenceRule] = Field(None, description="Repeat this todo; the next occurrence is created when it is completed")
 
 
 class TodoUpdate(BaseModel):
 	name: Optional[str] = Field(None, min_length=1, max_length=255)
 	description: Optional[str] = None
 	color: Optional[str] = None
+	due_date: Optional[date] = None
 	status: Optional[TodoStatus] = None
 	priority: Optional[TodoPriority] = None
 	tag_ids: Optional[List[int]] = None
@@ -134,12 +152,31 @@ class TodoUpdate(BaseModel):
 class TodoResponse(TodoBase):
 	id: int
 	list_id: int
+	parent_id: Optional[int] = None
+	position: Optional[str] = None
+	recurrence: Optional[RecurrenceRule] = None
 	created_at: datetime
 	updated_at: Optional[datetime] = None
 	tags: List[TagResponse] = []
 
 	model_config = ConfigDict(from_attributes=True)
 
+
+class TodoTreeNode(TodoResponse):
+	depth: int = Field(0, description="Levels below the requested todo")
+	child_count: int = Field(0, description="Direct subtasks")
+	completed_child_count: int = Field(0, description="Direct subtasks that are completed")
+	children: List["TodoTreeNode"] = []
+
+class TodoMove(BaseModel):
+	after_id: Optional[int] = Field(None, description="Todo to place this one after; omit to move it to the top")
+
+
+class TodoBulkMove(BaseModel):
+	todo_ids: List[int] = Field(..., min_length=1, max_length=500, description="Todos to move; their subtasks move with them")
+	target_list_id: int = Field(..., description="List to move the todos to")
+
+
 class TodoListListResponse(BaseModel):
 	total: int
 	items: List[TodoListResponse]
@@ -161,6 +198,34 @@ class TodoListResponsePaginated(BaseModel):
 	total: int
 	items: List[TodoResponse]
 
+
+class TodoCompactResponse(BaseModel):
+	id: int
+	list_id: int
+	name: str
+	due_date: date
+	status: TodoStatus
+	priority: TodoPriority
+
+	model_config = ConfigDict(from_attributes=True)
+
+
+class AgendaResponse(BaseModel):
+	items: List[Union[TodoResponse, TodoCompactResponse]]
+	has_more: bool
+
+
+class TodoKeysetPage(BaseModel):
+	items: List[TodoResponse]
+	next_cursor: Optional[int] = Field(None, description="Pass as `after` to fetch the next page; null on the last page")
+
+
+class TodoChangesResponse(BaseModel):
+	cursor: datetime = Field(..., description="Pass back as `since` on the next sync")
+	full_resync: bool = Field(False, description="True when `changed` holds the whole list and local state should be replaced")
+	changed: List[TodoResponse]
+	deleted: List[int]
+
 class Token(BaseModel):
 	access_token: str
 	token_type: str = "bearer"
@@ -187,5 +252,83 @@ class ActivityLogResponse(BaseModel):
 
 
 class ActivityFeedResponse(BaseModel):
-	total: int
+	total: Optional[int] = Field(None, description="Only present when requested; may be cached or estimated")
+	next_cursor: Optional[str] = Field(None, description="Pass as `cursor` to fetch the next page; null on the last page")
 	items: List[ActivityLogResponse]
+
+
+class ActivityDigestDay(BaseModel):
+	day: date
+	count: int
+
+
+class ActivityDigestContributor(BaseModel):
+	user_id: int
+	username: str
+	count: int
+
+
+class ActivityDigestResponse(BaseModel):
+	list_id: int
+	start: date
+	end: date
+	total: int = 0
+	by_action_type: Dict[str, int] = Field(default_factory=dict)
+	by_entity_type: Dict[str, int] = Field(default_factory=dict)
+	days: List[ActivityDigestDay] = Field(default_factory=list, description="Days with activity, oldest first")
+	top_contributors: List[ActivityDigestContributor] = Field(default_factory=list)
+
+
+class ActivityWriterStats(BaseModel):
+	mode: str = Field(..., description="'sync' writes entries in the mutation's transaction, 'buffered' in background batches")
+	running: bool = False
+	queue_depth: int = 0
+	max_queue_size: int = 0
+	batch_size: int = 0
+	flush_interval_ms: int = 0
+	overflow_policy: Optional[str] = None
+	submitted: int = 0
+	written: int = 0
+	dropped: int = Field(0, description="Entries dropped because the queue was full")
+	discarded: int = Field(0, description="Entries whose list or user was deleted before they were written")
+	failed: int = 0
+	written_on_overflow: int = Field(0, description="Entries written synchronously because the queue was full")
+	batches: int = 0
+	last_batch_size: int = 0
+	max_batch_size: int = 0
+	avg_batch_size: float = 0
+
+
+class PoolWaitBucket(BaseModel):
+	le_ms: Optional[float] = Field(None, description="Upper bound in milliseconds; null for the last, unbounded bucket")
+	count: int = Field(..., description="Checkouts that waited at most le_ms (cumulative)")
+
+
+class PoolWaitHistogram(BaseModel):
+	count: int = 0
+	avg: float = 0
+	max: float = 0
+	buckets: List[PoolWaitBucket] = Field(default_factory=list)
+
+
+class DbPoolStats(BaseModel):
+	name: str = Field(..., description="'sync', or 'async' for the engine used in DATABASE_MODE=async")
+	pool_class: Optional[str] = None
+	size: Optional[int] = None
+	max_overflow: Optional[int] = None
+	timeout: Optional[float] = None
+	recycle: Optional[int] = None
+	pre_ping: Optional[bool] = None
+	checked_in: Optional[int] = None
+	checked_out: Optional[int] = None
+	overflow: Optional[int] = Field(None, description="Connections open beyond size; negative while the pool is still filling")
+	waiting: int = Field(0, description="Checkouts in progress right now")
+	connects: int = 0
+	checkouts: int = 0
+	timeouts: int = Field(0, description="Checkouts that gave up after the pool timeout")
+	invalidated: int = 0
+	wait_ms: PoolWaitHistogram = Field(default_factory=PoolWaitHistogram, description="Time spent getting a connection from the pool")
+
+
+class DbPoolMetrics(BaseModel):
+	pools: List[DbPoolStats] = Field(default_factory=list)
@@ -0,0 +1,97 @@
+from typing import List
+from sqlalchemy import Float, Integer, case, func, literal_column, text
+from sqlalchemy.orm import Session
+
+from app.models import Tag, Todo
+from app.authorization import viewable_list_ids
+
+
+def _fts5_match_expression(q: str) -> str:
+	# Quote every term so user input can never be parsed as FTS5 query syntax;
+	# the trailing * turns each term into a prefix match for type-as-you-search.
+	terms = [term.replace('"', '""') for term in q.split()]
+	return " ".join(f'"{term}"*' for term in terms)
+
+
+def _tsquery_expression(q: str) -> str:
+	# Postgres counterpart of the FTS5 expression: every term quoted as a
+	# lexeme and marked :* for a prefix match, all of them required.
+	terms = [term.replace("\\", "\\\\").replace("'", "''") for term in q.split()]
+	return " & ".join(f"'{term}':*" for term in terms)
+
+
+def _escape_like(q: str) -> str:
+	return q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _name_match(db: Session, column, q: str):
+	"""
+	Filter and ordering for type-ahead on a name column. Postgres matches
+	anywhere in the name through the pg_trgm index, prefix hits first and then
+	by similarity; SQLite falls back to a case-insensitive prefix scan.
+	"""
+	escaped = _escape_like(q)
+	if db.get_bind().dialect.name == "postgresql":
+		prefix_hit = case((column.ilike(f"{escaped}%", escape="\\"), 0), else_=1)
+		return (
+			column.ilike(f"%{escaped}%", escape="\\"),
+			(prefix_hit, func.similarity(column, q).desc(), column)
+		)
+	return column.like(f"{escaped}%", escape="\\"), (column,)
+
+
+def search_todos(
+	db: Session,
+	user_id: int,
+	q: str,
+	skip: int = 0,
+	limit: int = 50
+) -> List[Todo]:
+	"""Full-text search over todo names and descriptions in every list the user can view, best match first."""
+	if not q or not q.strip():
+		return []
+	
+	query = db.query(Todo).filter(Todo.list_id.in_(viewable_list_ids(user_id)))
+	
+	if db.get_bind().dialect.name == "postgresql":
+		search_vector = literal_column("todos.search_vector")
+		ts_query = func.to_tsquery("english", _tsquery_expression(q))
+		rank = func.ts_rank(search_vector, ts_query)
+		query = query.filter(search_vector.op("@@")(ts_query)).order_by(rank.desc(), Todo.id)
+	else:
+		# bm25() returns lower values for better matches; name hits weigh more than description hits
+		matches = text(
+			"SELECT rowid AS todo_id, bm25(todos_fts, 10.0, 1.0) AS rank "
+			"FROM todos_fts WHERE todos_fts MATCH :match"
+		).bindparams(match=_fts5_match_expression(q)).columns(todo_id=Integer, rank=Float).subquery()
+		query = query.join(matches, matches.c.todo_id == Todo.id).order_by(matches.c.rank, Todo.id)
+	
+	return query.offset(skip).limit(limit).all()
+
+
+def autocomplete_tags(db: Session, user_id: int, q: str, limit: int = 10) -> List[Tag]:
+	"""Top matches among the user's own tags for a partially typed name."""
+	q = q.strip()
+	if not q:
+		return []
+	
+	condition, ordering = _name_match(db, Tag.name, q)
+	return db.query(Tag).filter(
+		Tag.user_id == user_id,
+		condition
+	).order_by(*ordering, Tag.id).limit(limit).all()
+
+
+def autocomplete_todos(db: Session, user_id: int, q: str, limit: int = 10) -> list:
+	"""Top matches by name among todos in every list the user can view, as compact rows."""
+	q = q.strip()
+	if not q:
+		return []
+	
+	condition, ordering = _name_match(db, Todo.name, q)
+	return db.query(
+		Todo.id, Todo.list_id, Todo.name, Todo.due_date, Todo.status, Todo.priority
+	).filter(
+		Todo.list_id.in_(viewable_list_ids(user_id)),
+		condition
+	).order_by(*ordering, Todo.id).limit(limit).all()
@@ -0,0 +1,92 @@
+import threading
+import time
+from typing import Dict, Iterable, Tuple
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from app.models import Tag, Todo, TodoStatus, todo_tags
+
+# Counts are per tag owner and only change when tag links or the status of a
+# tagged todo change, so they are cached per user and dropped explicitly by the
+# writers once their transaction commits. The TTL bounds staleness across
+# worker processes.
+CACHE_TTL_SECONDS = 60.0
+
+# Session.info key holding tag owners whose counts the current transaction changes
+PENDING_KEY = "pending_tag_counts"
+
+_cache: Dict[int, Tuple[float, Dict[int, Tuple[int, int]]]] = {}
+# Bumped on every invalidation, so a count read while a write commits is not cached
+_generations: Dict[int, int] = {}
+_lock = threading.Lock()
+
+
+def get_tag_usage_counts(db: Session, user_id: int) -> Dict[int, Tuple[int, int]]:
+	"""{tag_id: (total_todos, open_todos)} for the user's tags that are in use."""
+	now = time.monotonic()
+	with _lock:
+		cached = _cache.get(user_id)
+		generation = _generations.get(user_id, 0)
+	if cached and now - cached[0] < CACHE_TTL_SECONDS:
+		return cached[1]
+	
+	rows = db.query(
+		todo_tags.c.tag_id,
+		func.count(),
+		func.count().filter(Todo.status != TodoStatus.COMPLETED)
+	).join(
+		Todo, Todo.id == todo_tags.c.todo_id
+	).join(
+		Tag, Tag.id == todo_tags.c.tag_id
+	).filter(
+		Tag.user_id == user_id
+	).group_by(todo_tags.c.tag_id).all()
+	
+	counts = {tag_id: (total, open_count) for tag_id, total, open_count in rows}
+	with _lock:
+		if _generations.get(user_id, 0) == generation:
+			_cache[user_id] = (now, counts)
+	return counts
+
+
+def invalidate_tag_counts(user_ids: Iterable[int]) -> None:
+	with _lock:
+		for user_id in user_ids:
+			_cache.pop(user_id, None)
+			_generations[user_id] = _generations.get(user_id, 0) + 1
+
+
+def invalidate_for_tags(tags: Iterable[Tag]) -> None:
+	"""Drop cached counts for the owners of the given tags."""
+	invalidate_tag_counts({tag.user_id for tag in tags})
+
+
+def invalidate_on_commit(db: Session, user_ids: Iterable[int]) -> None:
+	"""
+	Drop cached counts for these users once the session commits. Dropping
+	them earlier would let a concurrent read cache the pre-commit counts.
+	"""
+	db.info.setdefault(PENDING_KEY, set()).update(user_ids)
+
+
+def invalidate_for_tags_on_commit(db: Session, tags: Iterable[Tag]) -> None:
+	invalidate_on_commit(db, {tag.user_id for tag in tags})
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_pending(session: Session):
+	user_ids = session.info.pop(PENDING_KEY, None)
+	if user_ids:
+		invalidate_tag_counts(user_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session: Session):
+	session.info.pop(PENDING_KEY, None)
+
+
+def clear_cache() -> None:
+	with _lock:
+		_cache.clear()
+		_generations.clear()
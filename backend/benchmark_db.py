@@ -0,0 +1,77 @@
+"""
+Load test for comparing DATABASE_MODE=sync and DATABASE_MODE=async.
+
+Logs in once, then sends REQUESTS authenticated GETs to PATH with CONCURRENCY
+requests in flight, and prints throughput, latency percentiles and errors.
+Start the API in each mode against the same database and run:
+
+	python benchmark_db.py --url http://localhost:8000 --username alice --password secret \
+		--path /lists/ --concurrency 200 --requests 5000
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+
+def _percentile(sorted_values, fraction):
+	if not sorted_values:
+		return 0.0
+	return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+async def _login(client: httpx.AsyncClient, username: str, password: str) -> str:
+	response = await client.post("/auth/login", json={"username": username, "password": password})
+	response.raise_for_status()
+	return response.json()["access_token"]
+
+
+async def run(url: str, username: str, password: str, path: str, concurrency: int, requests: int):
+	limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+	async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+		token = await _login(client, username, password)
+		headers = {"Authorization": f"Bearer {token}"}
+		
+		latencies, errors = [], {}
+		remaining = iter(range(requests))
+		
+		async def worker():
+			for _ in remaining:
+				started = time.perf_counter()
+				try:
+					response = await client.get(path, headers=headers)
+					outcome = None if response.status_code == 200 else str(response.status_code)
+				except httpx.HTTPError as exc:
+					outcome = type(exc).__name__
+				latencies.append(time.perf_counter() - started)
+				if outcome:
+					errors[outcome] = errors.get(outcome, 0) + 1
+		
+		started = time.perf_counter()
+		await asyncio.gather(*(worker() for _ in range(concurrency)))
+		elapsed = time.perf_counter() - started
+	
+	latencies.sort()
+	print(f"{requests} requests to {path}, {concurrency} concurrent, in {elapsed:.2f}s")
+	print(f"throughput: {requests / elapsed:.1f} req/s")
+	for label, fraction in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+		print(f"{label}: {_percentile(latencies, fraction) * 1000:.1f} ms")
+	print(f"errors: {sum(errors.values())}" + (f" {errors}" if errors else ""))
+
+
+def main():
+	parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+	parser.add_argument("--url", default="http://localhost:8000")
+	parser.add_argument("--username", required=True)
+	parser.add_argument("--password", required=True)
+	parser.add_argument("--path", default="/lists/")
+	parser.add_argument("--concurrency", type=int, default=100)
+	parser.add_argument("--requests", type=int, default=2000)
+	args = parser.parse_args()
+	
+	asyncio.run(run(args.url, args.username, args.password, args.path, args.concurrency, args.requests))
+
+
+if __name__ == "__main__":
+	main()
@@ -1,21 +1,40 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.database import engine, Base
+from app.database import DATABASE_MODE, async_engine, engine, Base
+from app import activity_retention, activity_writer
 from app.routes.auth import router as auth_router
 from app.routes.lists import router as lists_router
 from app.routes.todos import router as todos_router
 from app.routes.permissions import router as permissions_router
 from app.routes.tags import router as tags_router
 from app.routes.activity import router as activity_router
+from app.routes.search import router as search_router
+from app.routes.agenda import router as agenda_router
+from app.routes.metrics import router as metrics_router
+from app.routes.aio import routers as aio_routers
 
 Base.metadata.create_all(bind=engine)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+	activity_retention.prepare_partitions()
+	activity_writer.start_writer()
+	yield
+	# Drain buffered activity entries before the process exits
+	activity_writer.stop_writer()
+	if async_engine is not None:
+		await async_engine.dispose()
+
+
 app = FastAPI(
 	title="TODO List API",
 	description="A RESTful API for managing TODO lists",
 	version="2.0.0",
 	docs_url="/docs",
-	redoc_url="/redoc"
+	redoc_url="/redoc",
+	lifespan=lifespan
 )
 
 app.add_middleware(
@@ -26,12 +45,20 @@ app.add_middleware(
 	allow_headers=["*"],
 )
 
+if DATABASE_MODE == "async":
+	# Registered first, so these async handlers take over their paths from the sync routers
+	for router in aio_routers:
+		app.include_router(router)
+
 app.include_router(auth_router)
 app.include_router(lists_router)
 app.include_router(todos_router)
 app.include_router(permissions_router)
 app.include_router(tags_router)
 app.include_router(activity_router)
+app.include_router(search_router)
+app.include_router(agenda_router)
+app.include_router(metrics_router)
 
 
 @app.get("/", tags=["root"])
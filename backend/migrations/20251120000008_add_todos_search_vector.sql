@@ -0,0 +1,25 @@
+-- public.todos full-text search
+
+-- Weighted tsvector over name (A) and description (B), kept current by trigger
+-- and indexed with GIN for GET /search/todos.
+
+ALTER TABLE public.todos ADD COLUMN IF NOT EXISTS search_vector tsvector;
+
+CREATE OR REPLACE FUNCTION public.todos_search_vector_update() RETURNS trigger AS $$
+BEGIN
+	NEW.search_vector :=
+		setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') ||
+		setweight(to_tsvector('english', coalesce(NEW.description, '')), 'B');
+	RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS set_todos_search_vector ON public.todos;
+CREATE TRIGGER set_todos_search_vector BEFORE INSERT OR UPDATE OF name, description
+	ON public.todos FOR EACH ROW EXECUTE FUNCTION public.todos_search_vector_update();
+
+UPDATE public.todos SET search_vector =
+	setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+	setweight(to_tsvector('english', coalesce(description, '')), 'B');
+
+CREATE INDEX IF NOT EXISTS idx_todos_search_vector ON public.todos USING gin (search_vector);
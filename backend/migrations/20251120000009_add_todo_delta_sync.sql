@@ -0,0 +1,21 @@
+-- public.todos delta sync
+
+-- updated_at is now set on insert too, so (list_id, updated_at) can serve
+-- GET /lists/{list_id}/todos/changes as a range scan.
+
+ALTER TABLE public.todos ALTER COLUMN updated_at SET DEFAULT CURRENT_TIMESTAMP;
+UPDATE public.todos SET updated_at = created_at WHERE updated_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_todos_list_id_updated_at ON public.todos USING btree (list_id, updated_at);
+
+-- public.todo_deletions definition (tombstones for deleted todos)
+
+CREATE TABLE public.todo_deletions (
+	id serial4 NOT NULL,
+	todo_id int4 NOT NULL,
+	list_id int4 NOT NULL,
+	deleted_at timestamptz DEFAULT CURRENT_TIMESTAMP NOT NULL,
+	CONSTRAINT todo_deletions_pkey PRIMARY KEY (id),
+	CONSTRAINT fk_todo_deletions_list FOREIGN KEY (list_id) REFERENCES public.todo_lists(id) ON DELETE CASCADE
+);
+CREATE INDEX idx_todo_deletions_list_id_deleted_at ON public.todo_deletions USING btree (list_id, deleted_at);
@@ -0,0 +1,6 @@
+-- public.todos agenda index
+
+-- Open todos by list and due date for GET /agenda. Completed todos are left
+-- out of the index since the agenda never returns them.
+
+CREATE INDEX IF NOT EXISTS idx_todos_list_id_due_date_open ON public.todos USING btree (list_id, due_date) WHERE ((status)::text <> 'Completed'::text);
@@ -0,0 +1,9 @@
+-- public.todos due-date reminders
+
+-- reminder_sent_at marks a todo as reminded so the scanner never notifies it
+-- twice. The partial index only holds open todos still awaiting a reminder,
+-- so each scan reads just the candidates instead of the whole table.
+
+ALTER TABLE public.todos ADD COLUMN IF NOT EXISTS reminder_sent_at timestamptz NULL;
+
+CREATE INDEX IF NOT EXISTS idx_todos_due_date_pending_reminder ON public.todos USING btree (due_date) WHERE (((status)::text <> 'Completed'::text) AND (reminder_sent_at IS NULL));
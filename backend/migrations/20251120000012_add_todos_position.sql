@@ -0,0 +1,18 @@
+-- public.todos manual ordering
+
+-- Fractional ordering keys (base-62, compared byte-wise, hence COLLATE "C").
+-- Moving a todo rewrites only its own key; (list_id, position) serves ordered
+-- reads and neighbour lookups.
+
+ALTER TABLE public.todos ADD COLUMN IF NOT EXISTS "position" varchar(255) COLLATE "C" NULL;
+
+-- Seed existing rows in id order with fixed-width keys. A trailing '1' keeps
+-- each key from ending in '0', which the key scheme relies on.
+UPDATE public.todos t SET "position" = ranked.key
+FROM (
+	SELECT id, lpad((row_number() OVER (PARTITION BY list_id ORDER BY id))::text, 6, '0') || '1' AS key
+	FROM public.todos
+) ranked
+WHERE t.id = ranked.id AND t."position" IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_todos_list_id_position ON public.todos USING btree (list_id, "position");
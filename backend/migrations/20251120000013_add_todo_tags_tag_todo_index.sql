@@ -0,0 +1,8 @@
+-- public.todo_tags tag lookup index
+
+-- (tag_id, todo_id) lets GET /tags/{tag_id}/todos walk a tag's todos in id
+-- order straight from the index, keyset-paginated. It supersedes the
+-- single-column tag_id index.
+
+CREATE INDEX IF NOT EXISTS idx_todo_tags_tag_id_todo_id ON public.todo_tags USING btree (tag_id, todo_id);
+DROP INDEX IF EXISTS public.idx_todo_tags_tag_id;
@@ -0,0 +1,10 @@
+-- public.tags / public.todos trigram name indexes
+
+-- Autocomplete matches names by substring (ILIKE '%q%'), which the existing
+-- btree indexes cannot serve. pg_trgm GIN indexes can, and also provide
+-- similarity() for ranking the top matches.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_tags_name_trgm ON public.tags USING gin (name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_todos_name_trgm ON public.todos USING gin (name gin_trgm_ops);
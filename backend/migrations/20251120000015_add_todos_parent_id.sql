@@ -0,0 +1,12 @@
+-- public.todos subtasks
+
+-- parent_id nests a todo under another todo in the same list. Deleting a
+-- todo deletes its subtasks. (list_id, parent_id) serves both the recursive
+-- subtree walk and the per-parent child counts.
+
+ALTER TABLE public.todos ADD COLUMN IF NOT EXISTS parent_id int4 NULL;
+
+ALTER TABLE public.todos DROP CONSTRAINT IF EXISTS fk_todos_parent;
+ALTER TABLE public.todos ADD CONSTRAINT fk_todos_parent FOREIGN KEY (parent_id) REFERENCES public.todos(id) ON DELETE CASCADE;
+
+CREATE INDEX IF NOT EXISTS idx_todos_list_id_parent_id ON public.todos USING btree (list_id, parent_id);
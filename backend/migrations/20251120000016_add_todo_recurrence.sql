@@ -0,0 +1,13 @@
+-- public.todos recurrence rules
+
+-- A recurring series keeps one row per occurrence, created lazily: only the
+-- latest open occurrence carries the rule, and completing it creates the
+-- next occurrence. No index is needed; the rule is only read from a todo
+-- that is already loaded.
+
+ALTER TABLE public.todos ADD COLUMN IF NOT EXISTS recurrence_frequency varchar(20) NULL;
+ALTER TABLE public.todos ADD COLUMN IF NOT EXISTS recurrence_interval int4 NULL;
+ALTER TABLE public.todos ADD COLUMN IF NOT EXISTS recurrence_until date NULL;
+
+ALTER TABLE public.todos DROP CONSTRAINT IF EXISTS valid_recurrence_frequency;
+ALTER TABLE public.todos ADD CONSTRAINT valid_recurrence_frequency CHECK (((recurrence_frequency)::text = ANY ((ARRAY['daily'::character varying, 'weekly'::character varying, 'monthly'::character varying, 'yearly'::character varying])::text[])));
@@ -0,0 +1,12 @@
+-- public.activity_logs feed indexes
+
+-- The activity feed pages by keyset on (created_at, id), newest first, for a
+-- user or a list. These composite indexes return each page straight from the
+-- index and replace the single-column user_id and list_id indexes, which
+-- they cover.
+
+CREATE INDEX IF NOT EXISTS idx_activity_logs_user_id_created_at ON public.activity_logs USING btree (user_id, created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_activity_logs_list_id_created_at ON public.activity_logs USING btree (list_id, created_at DESC, id DESC);
+
+DROP INDEX IF EXISTS public.idx_activity_logs_user_id;
+DROP INDEX IF EXISTS public.idx_activity_logs_list_id;
@@ -0,0 +1,19 @@
+-- public.activity_logs details as jsonb
+
+-- Activity details are stored and returned as JSON documents. Databases that
+-- were created with a text column are converted in place; the GIN index
+-- (jsonb_path_ops) serves the feed's containment (@>) and jsonpath (@?)
+-- details filters.
+
+DO $$
+BEGIN
+	IF EXISTS (
+		SELECT 1 FROM information_schema.columns
+		WHERE table_schema = 'public' AND table_name = 'activity_logs'
+			AND column_name = 'details' AND data_type <> 'jsonb'
+	) THEN
+		ALTER TABLE public.activity_logs ALTER COLUMN details TYPE jsonb USING details::jsonb;
+	END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_activity_logs_details ON public.activity_logs USING gin (details jsonb_path_ops);
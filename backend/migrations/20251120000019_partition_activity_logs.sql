@@ -0,0 +1,93 @@
+-- public.activity_logs monthly partitions and public.activity_daily_rollups
+
+-- activity_logs becomes a table partitioned by month on created_at, with one
+-- partition per month named activity_logs_YYYY_MM. Feed queries bounded on
+-- created_at only touch the partitions they need, and old months are removed
+-- by detaching and dropping their partition instead of a large DELETE. The
+-- primary key has to include the partition key, so it becomes (id, created_at);
+-- ids still come from the same sequence and stay unique.
+--
+-- Before a month is dropped its entries are rolled up into
+-- activity_daily_rollups, one row per day, user, list, action and entity type.
+-- The retention worker (activity_retention_worker.py) does both and keeps
+-- partitions created a few months ahead; this migration creates partitions
+-- for every month with existing entries and the next three months.
+
+CREATE TABLE IF NOT EXISTS public.activity_daily_rollups (
+	id serial4 NOT NULL,
+	"day" date NOT NULL,
+	user_id int4 NOT NULL,
+	list_id int4 NULL,
+	action_type varchar(50) NOT NULL,
+	entity_type varchar(50) NOT NULL,
+	count int4 NOT NULL,
+	CONSTRAINT activity_daily_rollups_pkey PRIMARY KEY (id),
+	CONSTRAINT activity_daily_rollups_list_id_fkey FOREIGN KEY (list_id) REFERENCES public.todo_lists(id) ON DELETE CASCADE,
+	CONSTRAINT activity_daily_rollups_user_id_fkey FOREIGN KEY (user_id) REFERENCES public.users(id) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS idx_activity_daily_rollups_user_id_day ON public.activity_daily_rollups USING btree (user_id, "day");
+CREATE INDEX IF NOT EXISTS idx_activity_daily_rollups_list_id_day ON public.activity_daily_rollups USING btree (list_id, "day");
+
+DO $$
+DECLARE
+	first_month date;
+	month date;
+BEGIN
+	IF EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'public.activity_logs'::regclass) THEN
+		RETURN;
+	END IF;
+
+	-- Month boundaries are UTC whatever the server's time zone, matching app.activity_retention
+	SET LOCAL TimeZone = 'UTC';
+
+	ALTER TABLE public.activity_logs RENAME TO activity_logs_unpartitioned;
+	ALTER TABLE public.activity_logs_unpartitioned RENAME CONSTRAINT activity_logs_pkey TO activity_logs_unpartitioned_pkey;
+	DROP INDEX IF EXISTS public.idx_activity_logs_action_type;
+	DROP INDEX IF EXISTS public.idx_activity_logs_created_at;
+	DROP INDEX IF EXISTS public.idx_activity_logs_entity_type;
+	DROP INDEX IF EXISTS public.idx_activity_logs_todo_id;
+	DROP INDEX IF EXISTS public.idx_activity_logs_user_id_created_at;
+	DROP INDEX IF EXISTS public.idx_activity_logs_list_id_created_at;
+	DROP INDEX IF EXISTS public.idx_activity_logs_details;
+
+	CREATE TABLE public.activity_logs (
+		id int4 NOT NULL DEFAULT nextval('public.activity_logs_id_seq'::regclass),
+		user_id int4 NOT NULL,
+		list_id int4 NULL,
+		todo_id int4 NULL,
+		action_type varchar(50) NOT NULL,
+		entity_type varchar(50) NOT NULL,
+		entity_id int4 NULL,
+		details jsonb NULL,
+		created_at timestamptz DEFAULT CURRENT_TIMESTAMP NOT NULL,
+		CONSTRAINT activity_logs_pkey PRIMARY KEY (id, created_at),
+		CONSTRAINT activity_logs_list_id_fkey FOREIGN KEY (list_id) REFERENCES public.todo_lists(id) ON DELETE CASCADE,
+		CONSTRAINT activity_logs_todo_id_fkey FOREIGN KEY (todo_id) REFERENCES public.todos(id) ON DELETE SET NULL,
+		CONSTRAINT activity_logs_user_id_fkey FOREIGN KEY (user_id) REFERENCES public.users(id) ON DELETE CASCADE
+	) PARTITION BY RANGE (created_at);
+	ALTER SEQUENCE public.activity_logs_id_seq OWNED BY public.activity_logs.id;
+
+	CREATE INDEX idx_activity_logs_action_type ON public.activity_logs USING btree (action_type);
+	CREATE INDEX idx_activity_logs_created_at ON public.activity_logs USING btree (created_at DESC);
+	CREATE INDEX idx_activity_logs_entity_type ON public.activity_logs USING btree (entity_type);
+	CREATE INDEX idx_activity_logs_todo_id ON public.activity_logs USING btree (todo_id);
+	CREATE INDEX idx_activity_logs_user_id_created_at ON public.activity_logs USING btree (user_id, created_at DESC, id DESC);
+	CREATE INDEX idx_activity_logs_list_id_created_at ON public.activity_logs USING btree (list_id, created_at DESC, id DESC);
+	CREATE INDEX idx_activity_logs_details ON public.activity_logs USING gin (details jsonb_path_ops);
+
+	SELECT date_trunc('month', coalesce(min(created_at), now()))::date INTO first_month FROM public.activity_logs_unpartitioned;
+	month := first_month;
+	WHILE month <= (date_trunc('month', now()) + interval '3 months')::date LOOP
+		EXECUTE format(
+			'CREATE TABLE IF NOT EXISTS public.%I PARTITION OF public.activity_logs FOR VALUES FROM (%L) TO (%L)',
+			'activity_logs_' || to_char(month, 'YYYY_MM'), month, (month + interval '1 month')::date
+		);
+		month := (month + interval '1 month')::date;
+	END LOOP;
+
+	INSERT INTO public.activity_logs (id, user_id, list_id, todo_id, action_type, entity_type, entity_id, details, created_at)
+	SELECT id, user_id, list_id, todo_id, action_type, entity_type, entity_id, details, coalesce(created_at, now())
+	FROM public.activity_logs_unpartitioned;
+
+	DROP TABLE public.activity_logs_unpartitioned;
+END $$;
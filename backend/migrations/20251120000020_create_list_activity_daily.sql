@@ -0,0 +1,27 @@
+-- public.list_activity_daily definition
+
+-- Per-list, per-day activity counts by user, action type and entity type,
+-- upserted in the same transaction as the activity entries they count. The
+-- activity digest endpoint reads only from this table. Days are UTC. Existing
+-- entries are counted once here.
+
+CREATE TABLE IF NOT EXISTS public.list_activity_daily (
+	id serial4 NOT NULL,
+	list_id int4 NOT NULL,
+	"day" date NOT NULL,
+	user_id int4 NOT NULL,
+	action_type varchar(50) NOT NULL,
+	entity_type varchar(50) NOT NULL,
+	count int4 DEFAULT 0 NOT NULL,
+	CONSTRAINT list_activity_daily_pkey PRIMARY KEY (id),
+	CONSTRAINT list_activity_daily_list_id_fkey FOREIGN KEY (list_id) REFERENCES public.todo_lists(id) ON DELETE CASCADE,
+	CONSTRAINT list_activity_daily_user_id_fkey FOREIGN KEY (user_id) REFERENCES public.users(id) ON DELETE CASCADE
+);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_list_activity_daily ON public.list_activity_daily USING btree (list_id, "day", user_id, action_type, entity_type);
+
+INSERT INTO public.list_activity_daily (list_id, "day", user_id, action_type, entity_type, count)
+SELECT list_id, (created_at AT TIME ZONE 'UTC')::date, user_id, action_type, entity_type, count(*)
+FROM public.activity_logs
+WHERE list_id IS NOT NULL
+GROUP BY list_id, (created_at AT TIME ZONE 'UTC')::date, user_id, action_type, entity_type
+ON CONFLICT (list_id, "day", user_id, action_type, entity_type) DO NOTHING;
@@ -0,0 +1,11 @@
+-- public.todos recurrence anchor day
+
+-- Monthly and yearly occurrences are computed from the day of month the
+-- series started on rather than from the previous, possibly clamped,
+-- occurrence, so a series due on the 31st returns to the 31st after February.
+-- Existing series are anchored on their current occurrence's day.
+
+ALTER TABLE public.todos ADD COLUMN IF NOT EXISTS recurrence_anchor_day int4 NULL;
+
+UPDATE public.todos SET recurrence_anchor_day = EXTRACT(DAY FROM due_date)::int4
+WHERE recurrence_frequency IS NOT NULL AND recurrence_anchor_day IS NULL;
@@ -62,6 +62,20 @@ MIGRATIONS=(
     "20251120000005_create_list_permissions.sql"
     "20251120000006_create_tags.sql"
     "20251120000007_create_todo_tags.sql"
+    "20251120000008_add_todos_search_vector.sql"
+    "20251120000009_add_todo_delta_sync.sql"
+    "20251120000010_add_todos_agenda_index.sql"
+    "20251120000011_add_todo_reminders.sql"
+    "20251120000012_add_todos_position.sql"
+    "20251120000013_add_todo_tags_tag_todo_index.sql"
+    "20251120000014_add_name_trigram_indexes.sql"
+    "20251120000015_add_todos_parent_id.sql"
+    "20251120000016_add_todo_recurrence.sql"
+    "20251120000017_add_activity_feed_indexes.sql"
+    "20251120000018_convert_activity_details_jsonb.sql"
+    "20251120000019_partition_activity_logs.sql"
+    "20251120000020_create_list_activity_daily.sql"
+    "20251120000021_add_todo_recurrence_anchor.sql"
 )
 
 FAILED=0
@@ -0,0 +1,55 @@
+"""
+Due-date reminder worker.
+
+Runs as its own process against the same database as the API:
+
+	python reminder_worker.py
+"""
+import logging
+import os
+import signal
+import threading
+from datetime import timedelta
+
+from app.database import SessionLocal
+from app.reminders import run_scan
+
+SCAN_INTERVAL_SECONDS = float(os.getenv("REMINDER_SCAN_INTERVAL_SECONDS", "60"))
+LEAD_DAYS = int(os.getenv("REMINDER_LEAD_DAYS", "1"))
+BATCH_SIZE = int(os.getenv("REMINDER_BATCH_SIZE", "500"))
+
+logger = logging.getLogger("reminder_worker")
+
+stop_event = threading.Event()
+
+
+def _stop(signum, frame):
+	logger.info("Received signal %s, stopping after the current scan", signum)
+	stop_event.set()
+
+
+def main():
+	logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+	signal.signal(signal.SIGTERM, _stop)
+	signal.signal(signal.SIGINT, _stop)
+	
+	logger.info(
+		"Scanning every %ss for todos due within %s day(s)",
+		SCAN_INTERVAL_SECONDS, LEAD_DAYS
+	)
+	while not stop_event.is_set():
+		db = SessionLocal()
+		try:
+			processed = run_scan(db, lead=timedelta(days=LEAD_DAYS), batch_size=BATCH_SIZE)
+			if processed:
+				logger.info("Sent reminders for %s todo(s)", processed)
+		except Exception:
+			logger.exception("Reminder scan failed")
+			db.rollback()
+		finally:
+			db.close()
+		stop_event.wait(SCAN_INTERVAL_SECONDS)
+
+
+if __name__ == "__main__":
+	main()
@@ -9,6 +9,7 @@ from sqlalchemy.pool import StaticPool
 from passlib.context import CryptContext
 
 from app.database import Base
+from app import activity, tag_stats
 from app.models import User, TodoList, Todo, Tag, ListPermission, TodoStatus, TodoPriority, PermissionLevel
 
 # Use in-memory SQLite for testing
@@ -28,6 +29,8 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 def db_session():
     """Create a fresh database session for each test."""
     Base.metadata.create_all(bind=engine)
+    tag_stats.clear_cache()
+    activity.clear_total_cache()
     session = TestingSessionLocal()
     try:
         yield session
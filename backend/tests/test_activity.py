@@ -0,0 +1,412 @@
+"""
+Unit tests for activity logging.
+Tests cover how activity entries are written alongside the changes they record,
+in the mutation's transaction or through the buffered writer, and feed paging.
+"""
+import pytest
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import psycopg2
+from sqlalchemy.orm import sessionmaker
+
+from app import activity, activity_writer, crud, schemas
+from app.activity import get_activity_feed
+from app.activity_writer import ActivityWriter, _resolve_deleted_references
+from app.models import ActivityLog, ListActivityDaily, TodoStatus
+
+
+@pytest.fixture
+def commit_counter(db_session):
+    """Count commits issued on the test session."""
+    commits = []
+    listener = lambda session: commits.append(session)
+    event.listen(db_session, "after_commit", listener)
+    yield commits
+    event.remove(db_session, "after_commit", listener)
+
+
+def _row(user_id, list_id=None, todo_id=None):
+    return {
+        "user_id": user_id, "list_id": list_id, "todo_id": todo_id, "action_type": "created",
+        "entity_type": "todo", "entity_id": todo_id, "details": None, "created_at": None
+    }
+
+
+@pytest.fixture
+def make_writer(db_session):
+    """Build writers that write through the test database; the first one is installed as the active writer."""
+    session_factory = sessionmaker(bind=db_session.get_bind(), autoflush=False)
+    writers = []
+    
+    def _make(**kwargs):
+        writer = ActivityWriter(session_factory, **kwargs)
+        if not writers:
+            activity_writer._writer = writer
+        writers.append(writer)
+        return writer
+    
+    yield _make
+    activity_writer._writer = None
+    for writer in writers:
+        writer.stop()
+
+
+class TestActivityTransaction:
+    """Tests for activity entries sharing the mutation's transaction."""
+    
+    def test_create_todo_commits_once(self, db_session, test_user1, test_list, test_tag, commit_counter):
+        """Test creating a tagged todo and its activity entry takes one commit."""
+        todo_data = schemas.TodoCreate(name="New", due_date=date.today(), tag_ids=[test_tag.id])
+        
+        todo = crud.create_todo(db_session, test_list.id, todo_data, test_user1.id)
+        
+        assert len(commit_counter) == 1
+        assert [t.id for t in todo.tags] == [test_tag.id]
+        log = db_session.query(ActivityLog).filter(ActivityLog.todo_id == todo.id).one()
+        assert log.action_type == "created"
+    
+    def test_update_todo_commits_once(self, db_session, test_user1, test_todo, commit_counter):
+        """Test a status change and its activity entry take one commit."""
+        crud.update_todo(db_session, test_todo.id, schemas.TodoUpdate(status=TodoStatus.COMPLETED), test_user1.id)
+        
+        assert len(commit_counter) == 1
+        assert db_session.query(ActivityLog).filter(ActivityLog.action_type == "status_changed").count() == 1
+    
+    def test_list_changes_commit_once(self, db_session, test_user1, test_user2, commit_counter):
+        """Test list and sharing changes each take one commit."""
+        todo_list = crud.create_list(db_session, schemas.TodoListCreate(name="Groceries"), test_user1.id)
+        crud.update_list(db_session, todo_list.id, schemas.TodoListUpdate(name="Shopping"), test_user1.id)
+        crud.create_permission(
+            db_session, todo_list.id,
+            schemas.ListPermissionCreate(user_identifier=test_user2.username, permission_level="view"),
+            test_user1.id
+        )
+        
+        assert len(commit_counter) == 3
+        assert db_session.query(ActivityLog).filter(ActivityLog.list_id == todo_list.id).count() == 3
+    
+    def test_rollback_discards_activity(self, db_session, test_user1, test_list):
+        """Test an entry logged in a transaction that rolls back is not kept."""
+        activity.log_todo_created(db_session, test_user1.id, 999, test_list.id, "Never saved")
+        db_session.rollback()
+        
+        assert db_session.query(ActivityLog).count() == 0
+
+
+
+class TestActivityCoalescing:
+    """Tests for merging rapid successive updates into one entry."""
+    
+    def _update(self, db_session, todo_id, user_id, **fields):
+        return crud.update_todo(db_session, todo_id, schemas.TodoUpdate(**fields), user_id)
+    
+    def _updates(self, db_session):
+        return db_session.query(ActivityLog).filter(ActivityLog.action_type == "updated").order_by(ActivityLog.id).all()
+    
+    def test_rapid_updates_merge(self, db_session, test_user1, test_todo):
+        """Test successive updates keep the first old and the last new value of each field."""
+        original = test_todo.description
+        self._update(db_session, test_todo.id, test_user1.id, description="D")
+        self._update(db_session, test_todo.id, test_user1.id, description="Do")
+        self._update(db_session, test_todo.id, test_user1.id, description="Done", name="Renamed")
+        
+        [log] = self._updates(db_session)
+        assert log.details["changes"] == {
+            "description": {"old": original, "new": "Done"},
+            "name": {"old": "Test Todo", "new": "Renamed"},
+        }
+        assert log.details["name"] == "Renamed"
+        assert log.details["coalesced"] == 3
+    
+    def test_window_expiry_starts_new_entry(self, db_session, test_user1, test_todo):
+        """Test an update after the window writes a new entry."""
+        self._update(db_session, test_todo.id, test_user1.id, description="A")
+        first = self._updates(db_session)[0]
+        first.created_at = datetime.now(timezone.utc) - timedelta(seconds=activity.COALESCE_SECONDS + 1)
+        db_session.commit()
+        
+        self._update(db_session, test_todo.id, test_user1.id, description="B")
+        
+        assert len(self._updates(db_session)) == 2
+    
+    def test_other_user_or_action_breaks_the_run(self, db_session, test_user1, test_user2, test_todo, test_permission_update):
+        """Test updates are only merged into the entity's latest entry by the same user."""
+        self._update(db_session, test_todo.id, test_user1.id, description="A")
+        self._update(db_session, test_todo.id, test_user2.id, description="B")
+        self._update(db_session, test_todo.id, test_user1.id, status=TodoStatus.IN_PROGRESS)
+        self._update(db_session, test_todo.id, test_user1.id, description="C")
+        
+        assert [log.user_id for log in self._updates(db_session)] == [test_user1.id, test_user2.id, test_user1.id]
+    
+    def test_list_updates_merge(self, db_session, test_user1, test_list):
+        """Test list updates are merged too."""
+        for name in ("A", "AB", "ABC"):
+            crud.update_list(db_session, test_list.id, schemas.TodoListUpdate(name=name), test_user1.id)
+        
+        [log] = self._updates(db_session)
+        assert log.details["changes"]["name"] == {"old": "Test List", "new": "ABC"}
+    
+    def test_disabled(self, db_session, test_user1, test_todo, monkeypatch):
+        """Test a window of 0 writes every update."""
+        monkeypatch.setattr(activity, "COALESCE_SECONDS", 0)
+        self._update(db_session, test_todo.id, test_user1.id, description="A")
+        self._update(db_session, test_todo.id, test_user1.id, description="B")
+        
+        assert len(self._updates(db_session)) == 2
+
+
+class TestBufferedActivityWriter:
+    """Tests for the buffered activity writer."""
+    
+    def test_entries_queued_on_commit(self, db_session, test_user1, test_list, make_writer):
+        """Test entries wait for the commit and are written when the writer flushes."""
+        writer = make_writer()
+        todo = crud.create_todo(db_session, test_list.id, schemas.TodoCreate(name="New", due_date=date.today()), test_user1.id)
+        
+        assert writer.stats()["queue_depth"] == 1
+        assert db_session.query(ActivityLog).count() == 0
+        
+        writer.flush()
+        
+        log = db_session.query(ActivityLog).one()
+        assert (log.todo_id, log.action_type, log.details_dict) == (todo.id, "created", {"name": "New"})
+        assert log.created_at is not None
+    
+    def test_flushed_entries_update_daily_counts(self, db_session, test_user1, test_list, make_writer):
+        """Test the daily counts are updated when the writer writes, not when entries are queued."""
+        writer = make_writer()
+        activity.log_todo_created(db_session, test_user1.id, 1, test_list.id, "Queued")
+        db_session.commit()
+        
+        assert db_session.query(ListActivityDaily).count() == 0
+        
+        writer.flush()
+        
+        assert db_session.query(ListActivityDaily).one().count == 1
+    
+    def test_rollback_discards_queued_entries(self, db_session, test_user1, test_list, make_writer):
+        """Test entries from a rolled back transaction are never queued."""
+        writer = make_writer()
+        
+        activity.log_todo_created(db_session, test_user1.id, 1, test_list.id, "Never saved")
+        db_session.rollback()
+        
+        assert writer.stats()["submitted"] == 0
+    
+    def test_flush_writes_in_batches(self, db_session, test_user1, make_writer):
+        """Test queued entries are written with at most batch_size per insert."""
+        writer = make_writer(batch_size=4)
+        writer.submit([_row(test_user1.id) for _ in range(10)])
+        
+        writer.flush()
+        
+        stats = writer.stats()
+        assert (stats["written"], stats["batches"], stats["max_batch_size"], stats["last_batch_size"]) == (10, 3, 4, 2)
+        assert db_session.query(ActivityLog).count() == 10
+    
+    def test_overflow_drop(self, db_session, test_user1, make_writer):
+        """Test the drop policy discards entries that do not fit in the queue."""
+        writer = make_writer(max_queue_size=3, overflow_policy="drop")
+        writer.submit([_row(test_user1.id) for _ in range(5)])
+        
+        assert (writer.stats()["queue_depth"], writer.stats()["dropped"]) == (3, 2)
+    
+    def test_overflow_write(self, db_session, test_user1, make_writer):
+        """Test the write policy inserts overflowing entries synchronously."""
+        writer = make_writer(max_queue_size=3, overflow_policy="write")
+        writer.submit([_row(test_user1.id) for _ in range(5)])
+        
+        assert writer.stats()["written_on_overflow"] == 2
+        assert db_session.query(ActivityLog).count() == 2
+    
+    def test_stop_drains_queue(self, db_session, test_user1, make_writer):
+        """Test stopping a running writer writes everything still queued."""
+        writer = make_writer(flush_interval_ms=60000)
+        writer.start()
+        writer.submit([_row(test_user1.id) for _ in range(3)])
+        
+        writer.stop()
+        
+        assert not writer.running
+        assert writer.stats()["written"] == 3
+        assert db_session.query(ActivityLog).count() == 3
+    
+    def test_deleted_references_follow_foreign_key_rules(self, db_session, test_user1, test_list):
+        """Test entries for deleted lists are dropped and deleted todos are unlinked."""
+        rows = [_row(test_user1.id, test_list.id, todo_id=999), _row(test_user1.id, list_id=999)]
+        
+        resolved = _resolve_deleted_references(db_session, rows)
+        
+        assert [(r["list_id"], r["todo_id"]) for r in resolved] == [(test_list.id, None)]
+    
+    def test_unknown_overflow_policy(self, make_writer):
+        """Test an unknown overflow policy is rejected."""
+        with pytest.raises(ValueError):
+            make_writer(overflow_policy="ignore")
+
+
+
+class TestActivityFeed:
+    """Tests for the keyset-paginated activity feed."""
+    
+    def _log(self, db_session, user_id, list_id=None, count=1, created_at=None):
+        logs = [
+            ActivityLog(user_id=user_id, list_id=list_id, action_type="created", entity_type="todo", created_at=created_at)
+            for _ in range(count)
+        ]
+        db_session.add_all(logs)
+        db_session.commit()
+        return logs
+    
+    def test_cursor_pages_cover_feed_once(self, db_session, test_user1):
+        """Test following cursors returns every entry once, newest first, even with equal timestamps."""
+        same_time = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        self._log(db_session, test_user1.id, count=5, created_at=same_time)
+        self._log(db_session, test_user1.id, count=2)
+        
+        seen, cursor = [], None
+        while True:
+            page, cursor, _ = get_activity_feed(db_session, user_id=test_user1.id, cursor=cursor, limit=3)
+            seen.extend(page)
+            if cursor is None:
+                break
+        
+        assert len(seen) == 7
+        assert len({a.id for a in seen}) == 7
+        keys = [(a.created_at, a.id) for a in seen]
+        assert keys == sorted(keys, reverse=True)
+    
+    def test_last_page_has_no_cursor(self, db_session, test_user1):
+        """Test a page that reaches the end returns no cursor."""
+        self._log(db_session, test_user1.id, count=3)
+        
+        page, cursor, _ = get_activity_feed(db_session, user_id=test_user1.id, limit=3)
+        
+        assert len(page) == 3
+        assert cursor is None
+    
+    def test_list_filter(self, db_session, test_user1, test_list):
+        """Test the list feed only returns entries of that list."""
+        self._log(db_session, test_user1.id, list_id=test_list.id, count=2)
+        self._log(db_session, test_user1.id)
+        
+        page, _, _ = get_activity_feed(db_session, list_id=test_list.id)
+        
+        assert [a.list_id for a in page] == [test_list.id, test_list.id]
+    
+    def test_total_is_optional_and_cached(self, db_session, test_user1):
+        """Test the total is omitted by default and briefly cached when requested."""
+        self._log(db_session, test_user1.id, count=2)
+        
+        assert get_activity_feed(db_session, user_id=test_user1.id)[2] is None
+        assert get_activity_feed(db_session, user_id=test_user1.id, total="cached")[2] == 2
+        
+        self._log(db_session, test_user1.id)
+        assert get_activity_feed(db_session, user_id=test_user1.id, total="cached")[2] == 2
+        assert get_activity_feed(db_session, user_id=test_user1.id, total="estimate")[2] == 2
+    
+    def test_total_cache_is_bounded(self, db_session, test_user1, monkeypatch):
+        """Test cached totals are capped in number and expired entries are pruned on insert."""
+        monkeypatch.setattr(activity, "FEED_TOTAL_CACHE_SIZE", 2)
+        self._log(db_session, test_user1.id)
+        
+        for day in (1, 2, 3):
+            get_activity_feed(db_session, user_id=test_user1.id, total="cached", since=datetime(2025, 1, day))
+        
+        assert [key[4].day for key in activity._total_cache] == [2, 3]
+        
+        for key, (cached_at, total) in activity._total_cache.items():
+            activity._total_cache[key] = (cached_at - activity.FEED_TOTAL_CACHE_SECONDS, total)
+        get_activity_feed(db_session, user_id=test_user1.id, total="cached")
+        
+        assert [key[4] for key in activity._total_cache] == [None]
+    
+    def test_estimate_sends_filter_values_as_parameters(self, db_session):
+        """Test the Postgres EXPLAIN binds detail filter values instead of inlining them into the SQL."""
+        sent = []
+        
+        def exec_driver_sql(sql, params):
+            sent.append((sql, params))
+            return SimpleNamespace(scalar=lambda: [{"Plan": {"Plan Rows": 7}}])
+        
+        postgres = SimpleNamespace(
+            get_bind=lambda: SimpleNamespace(dialect=psycopg2.dialect()),
+            connection=lambda: SimpleNamespace(exec_driver_sql=exec_driver_sql)
+        )
+        condition = activity._detail_condition(postgres, *activity.parse_detail_filter("note=see :ref"))
+        
+        assert activity._estimated_total(postgres, db_session.query(ActivityLog).filter(condition), ()) == 7
+        
+        sql, params = sent[0]
+        assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT")
+        assert ":ref" not in sql
+        assert '{"note": "see :ref"}' in params.values()
+    
+    def test_skip_without_cursor(self, db_session, test_user1):
+        """Test offset paging still works for clients that send skip."""
+        self._log(db_session, test_user1.id, count=3)
+        
+        page, _, _ = get_activity_feed(db_session, user_id=test_user1.id, skip=2)
+        
+        assert len(page) == 1
+    
+    def test_invalid_cursor(self, db_session, test_user1):
+        """Test a malformed cursor is rejected."""
+        with pytest.raises(ValueError):
+            get_activity_feed(db_session, user_id=test_user1.id, cursor="not-a-cursor")
+    
+    def test_details_stored_as_document(self, db_session, test_user1):
+        """Test details round-trip as a dict without re-parsing."""
+        log = activity.log_activity(db_session, test_user1.id, "created", "todo", None, details={"count": 3})
+        db_session.commit()
+        db_session.expire(log)
+        
+        assert log.details == {"count": 3}
+        assert log.details_dict == {"count": 3}
+    
+    def test_detail_filters(self, db_session, test_user1, test_list):
+        """Test details filters match on key presence and on values."""
+        activity.log_activity(db_session, test_user1.id, "updated", "todo", None, list_id=test_list.id, details={"changes": {"status": {"old": "a", "new": "b"}}})
+        activity.log_activity(db_session, test_user1.id, "shared", "list", test_list.id, list_id=test_list.id, details={"permission_level": "update", "count": 5})
+        activity.log_activity(db_session, test_user1.id, "shared", "list", test_list.id, list_id=test_list.id, details={"permission_level": "view", "count": 2})
+        db_session.commit()
+        
+        def actions(*filters):
+            page, _, _ = get_activity_feed(db_session, list_id=test_list.id, detail_filters=filters)
+            return [(a.action_type, (a.details or {}).get("permission_level")) for a in page]
+        
+        assert actions("changes.status") == [("updated", None)]
+        assert actions("permission_level=update") == [("shared", "update")]
+        assert actions("count=2") == [("shared", "view")]
+        assert actions("permission_level", "count=5") == [("shared", "update")]
+        assert actions("changes.name") == []
+    
+    def test_invalid_detail_filter(self, db_session, test_user1):
+        """Test a filter with an empty key is rejected."""
+        with pytest.raises(ValueError):
+            get_activity_feed(db_session, user_id=test_user1.id, detail_filters=["changes..status"])
+    
+    def test_time_range(self, db_session, test_user1):
+        """Test since is inclusive, until exclusive, and both combine with cursors."""
+        for day in (1, 2, 3, 4):
+            self._log(db_session, test_user1.id, created_at=datetime(2025, 1, day, tzinfo=timezone.utc))
+        since, until = datetime(2025, 1, 2, tzinfo=timezone.utc), datetime(2025, 1, 4, tzinfo=timezone.utc)
+        
+        page, cursor, _ = get_activity_feed(db_session, user_id=test_user1.id, since=since, until=until, limit=1)
+        rest, _, _ = get_activity_feed(db_session, user_id=test_user1.id, since=since, until=until, cursor=cursor)
+        
+        assert [a.created_at.day for a in page + rest] == [3, 2]
+    
+    def test_viewer_feed_covers_owned_and_shared_lists(self, db_session, test_user1, test_user2, test_list, test_list2, test_permission_view):
+        """Test the viewer feed shows anyone's activity on lists the viewer owns or was shared, and nothing else."""
+        private_list = crud.create_list(db_session, schemas.TodoListCreate(name="Private"), test_user1.id)
+        self._log(db_session, test_user1.id, list_id=test_list.id, count=2)
+        self._log(db_session, test_user2.id, list_id=test_list2.id)
+        self._log(db_session, test_user1.id, list_id=private_list.id)
+        self._log(db_session, test_user2.id)
+        
+        page, cursor, _ = get_activity_feed(db_session, viewer_id=test_user2.id, limit=2)
+        rest, _, _ = get_activity_feed(db_session, viewer_id=test_user2.id, cursor=cursor)
+        
+        assert sorted(a.list_id for a in page + rest) == sorted([test_list.id, test_list.id, test_list2.id])
@@ -0,0 +1,118 @@
+"""
+Unit tests for diff-based storage of long text changes.
+Tests cover encoding changes, rebuilding old values and expanding feed entries.
+"""
+import pytest
+from datetime import datetime, timedelta, timezone
+
+from app import activity, activity_diff, crud, schemas
+from app.activity_diff import compact_change, expand_changes, is_diff, old_value
+from app.models import ActivityLog
+
+LONG_TEXT = " ".join(f"word{i}" for i in range(100))
+
+
+def _edit(text, index, replacement):
+    words = text.split(" ")
+    words[index] = replacement
+    return " ".join(words)
+
+
+def _update_description(db_session, todo_id, user_id, description):
+    return crud.update_todo(db_session, todo_id, schemas.TodoUpdate(description=description), user_id)
+
+
+def _updates(db_session):
+    return db_session.query(ActivityLog).filter(ActivityLog.action_type == "updated").order_by(ActivityLog.id).all()
+
+
+class TestCompactChange:
+    """Tests for encoding a single change."""
+    
+    def test_short_text_kept_in_full(self):
+        """Test changes below the length threshold are stored as old/new."""
+        change = {"old": "a", "new": "b"}
+        
+        assert compact_change(change) == change
+    
+    def test_long_text_round_trip(self):
+        """Test a long edit is stored as a small diff that rebuilds the old text."""
+        new = _edit(LONG_TEXT, 50, "changed")
+        
+        stored = compact_change({"old": LONG_TEXT, "new": new})
+        
+        assert is_diff(stored)
+        assert len(str(stored)) < len(LONG_TEXT)
+        assert old_value(stored, new) == LONG_TEXT
+    
+    def test_compressed_above_threshold(self, monkeypatch):
+        """Test large diffs are compressed and still rebuild."""
+        monkeypatch.setattr(activity_diff, "COMPRESS_MIN_BYTES", 10)
+        new = _edit(_edit(LONG_TEXT, 10, "x"), 90, "y")
+        
+        stored = compact_change({"old": LONG_TEXT, "new": new})
+        
+        assert "diff_z" in stored
+        assert old_value(stored, new) == LONG_TEXT
+    
+    def test_mismatched_new_value(self):
+        """Test rebuilding from the wrong new text fails instead of guessing."""
+        stored = compact_change({"old": LONG_TEXT, "new": _edit(LONG_TEXT, 1, "x")})
+        
+        assert old_value(stored, _edit(LONG_TEXT, 1, "y")) is None
+    
+    def test_unrelated_texts_kept_in_full(self):
+        """Test a rewrite that a diff would not shrink is stored as old/new."""
+        change = {"old": "a" * 300, "new": "b" * 300}
+        
+        assert compact_change(change) == change
+
+
+class TestExpandChanges:
+    """Tests for rebuilding full values of stored entries."""
+    
+    @pytest.fixture(autouse=True)
+    def no_coalescing(self, monkeypatch):
+        monkeypatch.setattr(activity, "COALESCE_SECONDS", 0)
+    
+    def test_history_rebuilt_from_current_value(self, db_session, test_user1, test_todo):
+        """Test every diff-stored change of a todo is rebuilt in full."""
+        versions = [LONG_TEXT, _edit(LONG_TEXT, 3, "three"), _edit(_edit(LONG_TEXT, 3, "three"), 70, "seventy")]
+        for description in versions:
+            _update_description(db_session, test_todo.id, test_user1.id, description)
+        
+        logs = _updates(db_session)
+        expanded = expand_changes(db_session, logs)
+        
+        assert not is_diff(logs[0].details["changes"]["description"])
+        assert is_diff(logs[1].details["changes"]["description"]) and is_diff(logs[2].details["changes"]["description"])
+        assert expanded[logs[1].id]["changes"]["description"] == {"old": versions[0], "new": versions[1]}
+        assert expanded[logs[2].id]["changes"]["description"] == {"old": versions[1], "new": versions[2]}
+    
+    def test_coalesced_diffs_merge(self, db_session, test_user1, test_todo, monkeypatch):
+        """Test merging an update into a diff-stored entry keeps the first old value."""
+        _update_description(db_session, test_todo.id, test_user1.id, LONG_TEXT)
+        monkeypatch.setattr(activity, "COALESCE_SECONDS", 30)
+        first, last = _edit(LONG_TEXT, 5, "five"), _edit(_edit(LONG_TEXT, 5, "five"), 6, "six")
+        _updates(db_session)[0].created_at = datetime.now(timezone.utc) - timedelta(minutes=5)
+        db_session.commit()
+        _update_description(db_session, test_todo.id, test_user1.id, first)
+        _update_description(db_session, test_todo.id, test_user1.id, last)
+        
+        log = _updates(db_session)[-1]
+        assert log.details["coalesced"] == 2
+        assert is_diff(log.details["changes"]["description"])
+        
+        expanded = expand_changes(db_session, [log])
+        assert expanded[log.id]["changes"]["description"] == {"old": LONG_TEXT, "new": last}
+    
+    def test_broken_chain_returns_stored_change(self, db_session, test_user1, test_todo):
+        """Test a change made without an activity entry leaves older diffs as stored."""
+        _update_description(db_session, test_todo.id, test_user1.id, LONG_TEXT)
+        _update_description(db_session, test_todo.id, test_user1.id, _edit(LONG_TEXT, 1, "one"))
+        test_todo.description = "Edited elsewhere"
+        db_session.commit()
+        
+        log = _updates(db_session)[-1]
+        
+        assert is_diff(expand_changes(db_session, [log])[log.id]["changes"]["description"])
@@ -0,0 +1,89 @@
+"""
+Unit tests for the per-list daily activity digest.
+Tests cover keeping the daily counts up to date and reading digests from them.
+"""
+from datetime import date, datetime, timedelta, timezone
+
+from app import activity, activity_digest, crud, schemas
+from app.activity_digest import get_list_digest
+from app.models import ListActivityDaily
+
+
+def _rows(user_id, list_id, day, action_type="created", entity_type="todo", count=1):
+    created_at = datetime(day.year, day.month, day.day, 12, tzinfo=timezone.utc)
+    return [
+        {"list_id": list_id, "created_at": created_at, "user_id": user_id, "action_type": action_type, "entity_type": entity_type}
+        for _ in range(count)
+    ]
+
+
+class TestDailyCounts:
+    """Tests for updating the daily counts as entries are written."""
+    
+    def test_logged_activity_is_counted(self, db_session, test_user1, test_list):
+        """Test entries logged through crud update the counts in the same commit."""
+        todo = crud.create_todo(db_session, test_list.id, schemas.TodoCreate(name="A", due_date=date.today()), test_user1.id)
+        crud.create_todo(db_session, test_list.id, schemas.TodoCreate(name="B", due_date=date.today()), test_user1.id)
+        crud.update_todo(db_session, todo.id, schemas.TodoUpdate(name="A2"), test_user1.id)
+        
+        counts = {(r.action_type, r.entity_type): r.count for r in db_session.query(ListActivityDaily)}
+        
+        assert counts == {("created", "todo"): 2, ("updated", "todo"): 1}
+    
+    def test_counts_accumulate(self, db_session, test_user1, test_list):
+        """Test repeated batches add to the existing row instead of adding rows."""
+        today = date.today()
+        activity_digest.record(db_session, _rows(test_user1.id, test_list.id, today, count=2))
+        activity_digest.record(db_session, _rows(test_user1.id, test_list.id, today, count=3))
+        db_session.commit()
+        
+        assert db_session.query(ListActivityDaily).one().count == 5
+    
+    def test_entries_without_list_are_skipped(self, db_session, test_user1):
+        """Test entries that do not belong to a list are not counted."""
+        activity.log_activity(db_session, test_user1.id, "created", "tag", 1)
+        db_session.commit()
+        
+        assert db_session.query(ListActivityDaily).count() == 0
+
+
+class TestListDigest:
+    """Tests for reading a digest."""
+    
+    def test_digest_window_and_breakdowns(self, db_session, test_user1, test_user2, test_list):
+        """Test the digest sums the window by action, entity and day and ranks contributors."""
+        end = date(2025, 3, 10)
+        activity_digest.record(db_session, _rows(test_user1.id, test_list.id, end, count=3))
+        activity_digest.record(db_session, _rows(test_user2.id, test_list.id, end - timedelta(days=2), "updated", count=4))
+        activity_digest.record(db_session, _rows(test_user2.id, test_list.id, end - timedelta(days=6), "shared", "list"))
+        activity_digest.record(db_session, _rows(test_user1.id, test_list.id, end - timedelta(days=7), count=10))
+        db_session.commit()
+        
+        digest = get_list_digest(db_session, test_list.id, end=end, days=7)
+        
+        assert digest["start"] == date(2025, 3, 4)
+        assert digest["total"] == 8
+        assert digest["by_action_type"] == {"created": 3, "updated": 4, "shared": 1}
+        assert digest["by_entity_type"] == {"todo": 7, "list": 1}
+        assert [d["day"] for d in digest["days"]] == [date(2025, 3, 4), date(2025, 3, 8), date(2025, 3, 10)]
+        assert [(c["username"], c["count"]) for c in digest["top_contributors"]] == [
+            (test_user2.username, 5), (test_user1.username, 3)
+        ]
+    
+    def test_top_limits_contributors(self, db_session, test_user1, test_user2, test_list):
+        """Test only the `top` most active users are returned."""
+        today = date.today()
+        activity_digest.record(db_session, _rows(test_user1.id, test_list.id, today, count=2))
+        activity_digest.record(db_session, _rows(test_user2.id, test_list.id, today))
+        db_session.commit()
+        
+        digest = get_list_digest(db_session, test_list.id, end=today, top=1)
+        
+        assert [c["user_id"] for c in digest["top_contributors"]] == [test_user1.id]
+    
+    def test_empty_digest(self, db_session, test_list):
+        """Test a list without activity gets an empty digest."""
+        digest = get_list_digest(db_session, test_list.id)
+        
+        assert digest["total"] == 0
+        assert digest["days"] == [] and digest["top_contributors"] == []
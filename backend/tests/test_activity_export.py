@@ -0,0 +1,74 @@
+"""
+Unit tests for the streaming activity export.
+Tests cover reading a list's history and encoding it as (gzipped) NDJSON.
+"""
+import gzip
+import json
+from datetime import datetime, timezone
+
+from app import activity_export
+from app.activity_export import iter_list_activity, ndjson_chunks
+from app.models import ActivityLog
+
+
+def _log(db_session, user_id, list_id, day):
+    db_session.add(ActivityLog(
+        user_id=user_id, list_id=list_id, action_type="created", entity_type="todo",
+        details={"day": day}, created_at=datetime(2025, 1, day, tzinfo=timezone.utc)
+    ))
+    db_session.commit()
+
+
+class TestIterListActivity:
+    """Tests for reading a list's history."""
+    
+    def test_whole_history_oldest_first(self, db_session, test_user1, test_list, test_list2):
+        """Test every entry of the list is read, oldest first, in small fetches."""
+        for day in (3, 1, 2):
+            _log(db_session, test_user1.id, test_list.id, day)
+        _log(db_session, test_user1.id, test_list2.id, 4)
+        
+        records = list(iter_list_activity(db_session, test_list.id, fetch_size=2))
+        
+        assert [r["details"] for r in records] == [{"day": 1}, {"day": 2}, {"day": 3}]
+    
+    def test_time_range(self, db_session, test_user1, test_list):
+        """Test since and until bound the export."""
+        for day in (1, 2, 3):
+            _log(db_session, test_user1.id, test_list.id, day)
+        
+        records = list(iter_list_activity(
+            db_session, test_list.id,
+            since=datetime(2025, 1, 2, tzinfo=timezone.utc), until=datetime(2025, 1, 3, tzinfo=timezone.utc)
+        ))
+        
+        assert [r["details"] for r in records] == [{"day": 2}]
+
+
+class TestNdjsonChunks:
+    """Tests for encoding records."""
+    
+    def test_one_document_per_line_in_chunks(self, monkeypatch):
+        """Test records become NDJSON lines split over several chunks."""
+        monkeypatch.setattr(activity_export, "CHUNK_BYTES", 40)
+        records = [{"id": i, "created_at": datetime(2025, 1, 1, tzinfo=timezone.utc)} for i in range(5)]
+        
+        chunks = list(ndjson_chunks(records))
+        
+        assert len(chunks) > 1
+        lines = b"".join(chunks).decode().splitlines()
+        assert [json.loads(line)["id"] for line in lines] == [0, 1, 2, 3, 4]
+        assert json.loads(lines[0])["created_at"] == "2025-01-01T00:00:00+00:00"
+    
+    def test_gzip(self):
+        """Test the compressed stream is a valid gzip file."""
+        records = [{"id": i} for i in range(100)]
+        
+        data = gzip.decompress(b"".join(ndjson_chunks(records, compress=True)))
+        
+        assert len(data.splitlines()) == 100
+    
+    def test_empty_export(self):
+        """Test an empty history produces no data, or an empty gzip file."""
+        assert b"".join(ndjson_chunks([])) == b""
+        assert gzip.decompress(b"".join(ndjson_chunks([], compress=True))) == b""
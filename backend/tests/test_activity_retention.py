@@ -0,0 +1,76 @@
+"""
+Unit tests for activity retention.
+Tests cover the retention cutoff and rolling old entries up into daily counts.
+"""
+from datetime import date, datetime, timezone
+
+from app.activity_retention import apply_retention, ensure_partitions, retention_cutoff
+from app.models import ActivityDailyRollup, ActivityLog
+
+
+def _log(db_session, user_id, created_at, list_id=None, action_type="created", count=1):
+    db_session.add_all([
+        ActivityLog(user_id=user_id, list_id=list_id, action_type=action_type, entity_type="todo", created_at=created_at)
+        for _ in range(count)
+    ])
+    db_session.commit()
+
+
+class TestRetentionCutoff:
+    """Tests for the start of the retention window."""
+    
+    def test_cutoff_is_start_of_month(self):
+        """Test the cutoff falls on the first of the month, `months` back."""
+        assert retention_cutoff(date(2025, 3, 17), 12) == datetime(2024, 3, 1, tzinfo=timezone.utc)
+        assert retention_cutoff(date(2025, 3, 17), 3) == datetime(2024, 12, 1, tzinfo=timezone.utc)
+
+
+class TestApplyRetention:
+    """Tests for rolling up and removing old activity."""
+    
+    def test_old_entries_rolled_up_and_removed(self, db_session, test_user1, test_list):
+        """Test entries before the cutoff become per-day counts and newer ones are kept."""
+        _log(db_session, test_user1.id, datetime(2024, 1, 5, 9, tzinfo=timezone.utc), test_list.id, count=3)
+        _log(db_session, test_user1.id, datetime(2024, 1, 5, 18, tzinfo=timezone.utc), test_list.id, action_type="updated")
+        _log(db_session, test_user1.id, datetime(2024, 2, 20, tzinfo=timezone.utc))
+        _log(db_session, test_user1.id, datetime(2024, 3, 1, tzinfo=timezone.utc), count=2)
+        
+        result = apply_retention(db_session, today=date(2025, 3, 17), months=12)
+        
+        assert result["deleted"] == 5
+        assert result["dropped_partitions"] == []
+        assert db_session.query(ActivityLog).count() == 2
+        rollups = {
+            (r.day, r.list_id, r.action_type): r.count
+            for r in db_session.query(ActivityDailyRollup)
+        }
+        assert rollups == {
+            (date(2024, 1, 5), test_list.id, "created"): 3,
+            (date(2024, 1, 5), test_list.id, "updated"): 1,
+            (date(2024, 2, 20), None, "created"): 1,
+        }
+    
+    def test_utc_day_and_cutoff_boundaries(self, db_session, test_user1):
+        """Test entries around midnight UTC land on their UTC day and side of the cutoff."""
+        _log(db_session, test_user1.id, datetime(2024, 2, 29, 23, 30, tzinfo=timezone.utc))
+        _log(db_session, test_user1.id, datetime(2024, 3, 1, 0, 30, tzinfo=timezone.utc))
+        
+        result = apply_retention(db_session, today=date(2025, 3, 17), months=12)
+        
+        assert result["deleted"] == 1
+        assert db_session.query(ActivityLog).one().created_at.replace(tzinfo=timezone.utc) == datetime(2024, 3, 1, 0, 30, tzinfo=timezone.utc)
+        assert [(r.day, r.count) for r in db_session.query(ActivityDailyRollup)] == [(date(2024, 2, 29), 1)]
+    
+    def test_repeated_runs_count_once(self, db_session, test_user1):
+        """Test a second run finds nothing left to roll up."""
+        _log(db_session, test_user1.id, datetime(2024, 1, 5, tzinfo=timezone.utc), count=2)
+        
+        apply_retention(db_session, today=date(2025, 3, 17), months=12)
+        result = apply_retention(db_session, today=date(2025, 3, 17), months=12)
+        
+        assert result["rolled_up"] == 0
+        assert db_session.query(ActivityDailyRollup).one().count == 2
+    
+    def test_partitions_skipped_without_partitioned_table(self, db_session):
+        """Test partition upkeep is a no-op where the table is not partitioned."""
+        assert ensure_partitions(db_session) == []
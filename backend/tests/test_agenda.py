@@ -0,0 +1,87 @@
+"""
+Unit tests for the cross-list agenda.
+Tests cover the due date window, completion filter, list visibility and pagination.
+"""
+import pytest
+from datetime import date, timedelta
+
+from app import crud, schemas
+from app.models import TodoStatus
+
+
+def _create(db_session, list_id, user_id, name, due_in_days, status=TodoStatus.NOT_STARTED):
+    todo_data = schemas.TodoCreate(
+        name=name,
+        due_date=date.today() + timedelta(days=due_in_days),
+        status=status
+    )
+    return crud.create_todo(db_session, list_id, todo_data, user_id)
+
+
+class TestGetAgenda:
+    """Tests for the agenda across all accessible lists."""
+    
+    def test_agenda_window_and_order(self, db_session, test_user1, test_list):
+        """Test only todos due inside the window are returned, soonest first."""
+        later = _create(db_session, test_list.id, test_user1.id, "Later", 5)
+        sooner = _create(db_session, test_list.id, test_user1.id, "Sooner", 1)
+        _create(db_session, test_list.id, test_user1.id, "Outside", 30)
+        _create(db_session, test_list.id, test_user1.id, "Overdue", -1)
+        
+        rows, has_more = crud.get_agenda(
+            db_session, test_user1.id, date.today(), date.today() + timedelta(days=7)
+        )
+        
+        assert [t.id for t in rows] == [sooner.id, later.id]
+        assert has_more is False
+    
+    def test_agenda_excludes_completed(self, db_session, test_user1, test_list):
+        """Test completed todos are left out."""
+        _create(db_session, test_list.id, test_user1.id, "Done", 1, TodoStatus.COMPLETED)
+        open_todo = _create(db_session, test_list.id, test_user1.id, "Open", 1, TodoStatus.IN_PROGRESS)
+        
+        rows, _ = crud.get_agenda(db_session, test_user1.id, date.today(), date.today() + timedelta(days=7))
+        
+        assert [t.id for t in rows] == [open_todo.id]
+    
+    def test_agenda_spans_owned_and_shared_lists(self, db_session, test_user1, test_user2, test_list, test_list2, test_permission_view):
+        """Test the agenda merges owned lists with lists shared with the user."""
+        shared = _create(db_session, test_list.id, test_user1.id, "Shared", 2)
+        owned = _create(db_session, test_list2.id, test_user2.id, "Owned", 3)
+        
+        rows, _ = crud.get_agenda(db_session, test_user2.id, date.today(), date.today() + timedelta(days=7))
+        
+        assert [t.id for t in rows] == [shared.id, owned.id]
+    
+    def test_agenda_excludes_inaccessible_lists(self, db_session, test_user1, test_user3, test_list):
+        """Test todos in lists the user cannot view are not returned."""
+        _create(db_session, test_list.id, test_user1.id, "Private", 1)
+        
+        rows, _ = crud.get_agenda(db_session, test_user3.id, date.today(), date.today() + timedelta(days=7))
+        
+        assert rows == []
+    
+    def test_agenda_pagination(self, db_session, test_user1, test_list):
+        """Test skip/limit paging with has_more."""
+        for i in range(5):
+            _create(db_session, test_list.id, test_user1.id, f"Todo {i}", i)
+        window = (date.today(), date.today() + timedelta(days=7))
+        
+        page1, more1 = crud.get_agenda(db_session, test_user1.id, *window, skip=0, limit=3)
+        page2, more2 = crud.get_agenda(db_session, test_user1.id, *window, skip=3, limit=3)
+        
+        assert len(page1) == 3 and more1 is True
+        assert len(page2) == 2 and more2 is False
+    
+    def test_agenda_compact_rows(self, db_session, test_user1, test_list):
+        """Test compact mode returns plain column rows."""
+        todo = _create(db_session, test_list.id, test_user1.id, "Compact", 1)
+        
+        rows, _ = crud.get_agenda(
+            db_session, test_user1.id, date.today(), date.today() + timedelta(days=7), compact=True
+        )
+        item = schemas.TodoCompactResponse.model_validate(rows[0])
+        
+        assert item.id == todo.id
+        assert item.list_id == test_list.id
+        assert item.due_date == todo.due_date
@@ -0,0 +1,162 @@
+"""
+Unit tests for the async data layer and async route handlers.
+Tests run the sync crud functions on an AsyncSession (aiosqlite on a temporary
+database file) and call the async endpoints through a small app.
+"""
+import asyncio
+from datetime import date
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app import aio, crud, schemas
+from app.auth import get_current_user_async
+from app.database import Base, async_database_url, get_async_db
+from app.models import ActivityLog, Todo, TodoList, TodoPriority, TodoStatus, User
+from app.routes.aio import routers
+
+pytest.importorskip("aiosqlite")
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+
+
+@pytest.fixture
+def seeded(tmp_path):
+    """A database file with one user, list and todo, and an async session factory for it."""
+    url = f"sqlite:///{tmp_path / 'aio.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine, expire_on_commit=False)()
+    
+    user = User(email="aio@example.com", username="aio", password_hash="x", full_name="Aio", is_active=True)
+    other = User(email="other@example.com", username="other", password_hash="x", full_name="Other", is_active=True)
+    session.add_all([user, other])
+    session.commit()
+    todo_list = TodoList(name="Async List", description="", color="#3B82F6", owner_id=user.id, is_archived=False)
+    session.add(todo_list)
+    session.commit()
+    todo = Todo(
+        name="Async Todo", description="", due_date=date(2025, 1, 31), status=TodoStatus.NOT_STARTED,
+        priority=TodoPriority.MEDIUM, list_id=todo_list.id, created_by=user.id
+    )
+    session.add(todo)
+    session.add(ActivityLog(
+        user_id=user.id, list_id=todo_list.id, action_type="created", entity_type="list",
+        entity_id=todo_list.id, details={"name": "Async List"}
+    ))
+    session.commit()
+    session.close()
+    
+    # NullPool: each test drives the engine from its own event loop
+    async_engine = create_async_engine(async_database_url(url), poolclass=NullPool)
+    yield {
+        "sessions": async_sessionmaker(async_engine, autoflush=False),
+        "user": user,
+        "other": other,
+        "list": todo_list,
+        "todo": todo,
+    }
+    asyncio.run(async_engine.dispose())
+    engine.dispose()
+
+
+class TestAsyncDatabaseUrl:
+    """Tests for deriving the async driver URL."""
+    
+    def test_postgres_uses_asyncpg(self):
+        """Test plain and psycopg2 Postgres URLs switch to asyncpg."""
+        assert async_database_url("postgresql://u:p@db:5432/todo") == "postgresql+asyncpg://u:p@db:5432/todo"
+        assert async_database_url("postgresql+psycopg2://u:p@db/todo") == "postgresql+asyncpg://u:p@db/todo"
+    
+    def test_sqlite_uses_aiosqlite(self):
+        """Test SQLite URLs switch to aiosqlite and unknown drivers are kept."""
+        assert async_database_url("sqlite:///todo.db") == "sqlite+aiosqlite:///todo.db"
+        assert async_database_url("postgresql+asyncpg://db/todo") == "postgresql+asyncpg://db/todo"
+
+
+class TestAsyncModules:
+    """Tests for running the sync data layer on an AsyncSession."""
+    
+    def test_run(self, seeded):
+        """Test run() calls the sync crud function on the async session and returns its result."""
+        async def fetch():
+            async with seeded["sessions"]() as db:
+                return await aio.run(db, crud.get_list_todos, list_id=seeded["list"].id, user_id=seeded["user"].id)
+        
+        todos = asyncio.run(fetch())
+        
+        assert [todo.name for todo in todos] == ["Async Todo"]
+    
+    def test_run_raises_http_errors(self, seeded):
+        """Test HTTP errors raised by the sync function reach the caller."""
+        async def fetch():
+            async with seeded["sessions"]() as db:
+                return await aio.run(db, crud.get_list_by_id, list_id=seeded["list"].id, user_id=seeded["other"].id)
+        
+        with pytest.raises(HTTPException) as exc_info:
+            asyncio.run(fetch())
+        
+        assert exc_info.value.status_code == 403
+    
+    def test_serialized_loads_relationships_in_run_sync(self, seeded):
+        """Test serialized() validates the result, lazy loads included, before run_sync returns."""
+        async def fetch():
+            async with seeded["sessions"]() as db:
+                return await aio.run(
+                    db, aio.serialized(crud.get_list_todos, list[schemas.TodoResponse]),
+                    list_id=seeded["list"].id, user_id=seeded["user"].id
+                )
+        
+        result = asyncio.run(fetch())
+        
+        assert isinstance(result[0], schemas.TodoResponse)
+        assert result[0].tags == []
+
+
+class TestAsyncRoutes:
+    """Tests for the async handlers."""
+    
+    @pytest.fixture
+    def client(self, seeded):
+        app = FastAPI()
+        for router in routers:
+            app.include_router(router)
+        
+        async def override_get_async_db():
+            async with seeded["sessions"]() as db:
+                yield db
+        
+        app.dependency_overrides[get_async_db] = override_get_async_db
+        app.dependency_overrides[get_current_user_async] = lambda: seeded["user"]
+        return TestClient(app)
+    
+    def test_get_my_lists(self, client, seeded):
+        """Test lists are returned with their todo counts."""
+        response = client.get("/lists/")
+        
+        assert response.status_code == 200
+        assert [(item["name"], item["todo_count"]) for item in response.json()] == [("Async List", 1)]
+    
+    def test_get_todo_in_other_list(self, client, seeded):
+        """Test a todo requested under the wrong list is not found."""
+        response = client.get(f"/lists/{seeded['list'].id + 1}/todos/{seeded['todo'].id}")
+        
+        assert response.status_code == 404
+    
+    def test_get_todos(self, client, seeded):
+        """Test a list's todos are returned."""
+        response = client.get(f"/lists/{seeded['list'].id}/todos/")
+        
+        assert response.status_code == 200
+        assert [item["name"] for item in response.json()] == ["Async Todo"]
+    
+    def test_activity_feed(self, client, seeded):
+        """Test the feed across the caller's lists, and a bad cursor being rejected."""
+        response = client.get("/activity/lists")
+        
+        assert response.status_code == 200
+        assert [item["details"] for item in response.json()["items"]] == [{"name": "Async List"}]
+        assert client.get("/activity/lists", params={"cursor": "bogus"}).status_code == 400
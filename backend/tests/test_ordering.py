@@ -0,0 +1,177 @@
+"""
+Unit tests for manual todo ordering with fractional position keys.
+Tests cover key generation, moves and rebalancing.
+"""
+import pytest
+from datetime import date
+from fastapi import HTTPException
+
+from app import crud, schemas
+from app.models import Todo
+from app.ordering import REBALANCE_KEY_LENGTH, key_between, lists_to_rebalance, spaced_keys, rebalance_positions
+
+
+def _create(db_session, list_id, user_id, name):
+    return crud.create_todo(db_session, list_id, schemas.TodoCreate(name=name, due_date=date.today()), user_id)
+
+
+def _names(db_session, list_id, user_id):
+    return [t.name for t in crud.get_list_todos(db_session, list_id, user_id)]
+
+
+class TestKeyBetween:
+    """Tests for fractional key generation."""
+    
+    def test_key_sorts_between_bounds(self):
+        """Test generated keys sort strictly between their neighbours."""
+        assert "F" < key_between("F", "G") < "G"
+        assert "a" < key_between("a", "a1") < "a1"
+        assert key_between(None, "1") < "1"
+        assert key_between("zz", None) > "zz"
+    
+    def test_keys_never_end_in_zero(self):
+        """Test keys stay valid midpoints after repeated inserts at one spot."""
+        low, high = "V", "W"
+        for _ in range(200):
+            high = key_between(low, high)
+            assert not high.endswith("0")
+            assert low < high
+    
+    def test_appends_grow_slowly(self):
+        """Test key length grows logarithmically with the number of appends."""
+        key, lengths = None, {}
+        for count in range(1, 250001):
+            next_key = key_between(key, None)
+            assert key is None or next_key > key
+            key = next_key
+            lengths[count] = len(key)
+        
+        assert lengths[30] == 1
+        assert lengths[1000] == 3
+        assert lengths[10000] == 5
+        assert lengths[250000] == 7
+    
+    def test_append_after_legacy_key(self):
+        """Test appending after a long run of "z" from before levels does not double the key."""
+        legacy = "z" * 20 + "V"
+        
+        assert legacy < key_between(legacy, None) == "z" * 20 + "W"
+    
+    def test_invalid_bounds(self):
+        """Test bounds in the wrong order are rejected."""
+        with pytest.raises(ValueError):
+            key_between("b", "a")
+    
+    def test_spaced_keys(self):
+        """Test evenly spaced keys are ordered, unique and short."""
+        keys = spaced_keys(1000)
+        
+        assert keys == sorted(keys)
+        assert len(set(keys)) == 1000
+        assert max(len(k) for k in keys) == 2
+
+
+class TestMoveTodo:
+    """Tests for moving todos within a list."""
+    
+    def test_new_todos_append(self, db_session, test_user1, test_list):
+        """Test todos are listed in creation order by default."""
+        for name in ["A", "B", "C"]:
+            _create(db_session, test_list.id, test_user1.id, name)
+        
+        assert _names(db_session, test_list.id, test_user1.id) == ["A", "B", "C"]
+    
+    def test_move_between(self, db_session, test_user1, test_list):
+        """Test moving a todo after another rewrites only its own key."""
+        a, b, c = (_create(db_session, test_list.id, test_user1.id, name) for name in ["A", "B", "C"])
+        positions = {t.id: t.position for t in (a, b)}
+        
+        crud.move_todo(db_session, test_list.id, c.id, schemas.TodoMove(after_id=a.id), test_user1.id)
+        
+        assert _names(db_session, test_list.id, test_user1.id) == ["A", "C", "B"]
+        assert {t.id: t.position for t in db_session.query(Todo).filter(Todo.id.in_(positions))} == positions
+    
+    def test_move_to_top(self, db_session, test_user1, test_list):
+        """Test omitting after_id moves the todo first."""
+        _create(db_session, test_list.id, test_user1.id, "A")
+        b = _create(db_session, test_list.id, test_user1.id, "B")
+        
+        crud.move_todo(db_session, test_list.id, b.id, schemas.TodoMove(), test_user1.id)
+        
+        assert _names(db_session, test_list.id, test_user1.id) == ["B", "A"]
+    
+    def test_move_to_end(self, db_session, test_user1, test_list):
+        """Test moving after the last todo."""
+        a = _create(db_session, test_list.id, test_user1.id, "A")
+        b = _create(db_session, test_list.id, test_user1.id, "B")
+        
+        crud.move_todo(db_session, test_list.id, a.id, schemas.TodoMove(after_id=b.id), test_user1.id)
+        
+        assert _names(db_session, test_list.id, test_user1.id) == ["B", "A"]
+    
+    def test_unpositioned_todos_sort_last(self, db_session, test_user1, test_list):
+        """Test todos without a position are listed after positioned ones, in id order."""
+        a, b, c = (_create(db_session, test_list.id, test_user1.id, name) for name in ["A", "B", "C"])
+        a.position = b.position = None
+        db_session.commit()
+        
+        assert _names(db_session, test_list.id, test_user1.id) == ["C", "A", "B"]
+    
+    def test_move_after_unpositioned_todo(self, db_session, test_user1, test_list):
+        """Test moving next to a todo without a position places the todo right after it."""
+        a, b, c = (_create(db_session, test_list.id, test_user1.id, name) for name in ["A", "B", "C"])
+        a.position = b.position = None
+        db_session.commit()
+        
+        crud.move_todo(db_session, test_list.id, c.id, schemas.TodoMove(after_id=a.id), test_user1.id)
+        
+        assert _names(db_session, test_list.id, test_user1.id) == ["A", "C", "B"]
+        assert db_session.query(Todo).filter(Todo.position.is_(None)).count() == 0
+    
+    def test_move_after_todo_in_other_list(self, db_session, test_user1, test_list, test_todo):
+        """Test the anchor todo must be in the same list."""
+        other_list = crud.create_list(db_session, schemas.TodoListCreate(name="Other"), test_user1.id)
+        other = _create(db_session, other_list.id, test_user1.id, "Elsewhere")
+        
+        with pytest.raises(HTTPException) as exc_info:
+            crud.move_todo(db_session, test_list.id, test_todo.id, schemas.TodoMove(after_id=other.id), test_user1.id)
+        
+        assert exc_info.value.status_code == 404
+    
+    def test_move_with_view_permission_fails(self, db_session, test_user2, test_list, test_todo, test_permission_view):
+        """Test user with view permission cannot reorder."""
+        with pytest.raises(HTTPException) as exc_info:
+            crud.move_todo(db_session, test_list.id, test_todo.id, schemas.TodoMove(), test_user2.id)
+        
+        assert exc_info.value.status_code == 403
+
+
+class TestRebalancePositions:
+    """Tests for re-spacing position keys."""
+    
+    def test_long_keys_flag_list(self, db_session, test_user1, test_list):
+        """Test a write that produces a long key flags its list for a rebalance."""
+        a = _create(db_session, test_list.id, test_user1.id, "A")
+        
+        assert lists_to_rebalance(db_session) == set()
+        
+        a.position = "z" * REBALANCE_KEY_LENGTH + "V"
+        db_session.commit()
+        _create(db_session, test_list.id, test_user1.id, "B")
+        
+        assert lists_to_rebalance(db_session) == {test_list.id}
+        assert lists_to_rebalance(db_session) == set()
+    
+    def test_rebalance_keeps_order_and_shortens_keys(self, db_session, test_user1, test_list):
+        """Test rebalancing preserves order while shortening keys."""
+        a = _create(db_session, test_list.id, test_user1.id, "A")
+        b = _create(db_session, test_list.id, test_user1.id, "B")
+        for _ in range(40):
+            crud.move_todo(db_session, test_list.id, b.id, schemas.TodoMove(), test_user1.id)
+            crud.move_todo(db_session, test_list.id, a.id, schemas.TodoMove(), test_user1.id)
+        order = _names(db_session, test_list.id, test_user1.id)
+        
+        assert rebalance_positions(db_session, test_list.id) == 2
+        
+        assert _names(db_session, test_list.id, test_user1.id) == order
+        assert all(len(t.position) == 1 for t in crud.get_list_todos(db_session, test_list.id, test_user1.id))
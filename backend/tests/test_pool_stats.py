@@ -0,0 +1,136 @@
+"""
+Unit tests for connection pool settings and statistics.
+Tests cover the checkout wait histogram and engines built by monitored_engine.
+"""
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app import pool_stats
+from app.pool_stats import PoolStats, monitored_engine
+from app.routes import metrics
+from app.routes.metrics import get_db_pool_stats, get_metrics_user
+
+
+@pytest.fixture
+def file_engine(tmp_path):
+    """A monitored engine on a SQLite file with a single pooled connection."""
+    engine = monitored_engine(
+        "test", f"sqlite:///{tmp_path / 'pool.db'}", create_engine,
+        pool_size=1, max_overflow=0, pool_timeout=0.05, pool_pre_ping=False
+    )
+    yield engine
+    engine.dispose()
+    pool_stats._registry.pop("test", None)
+
+
+def _snapshot(name):
+    return next(stats for stats in pool_stats.get_pool_stats() if stats["name"] == name)
+
+
+class TestPoolStats:
+    """Tests for the wait counters."""
+    
+    def test_wait_histogram_is_cumulative(self):
+        """Test waits land in the first bucket at or above them, counted cumulatively."""
+        stats = PoolStats("histogram")
+        for seconds in (0.0005, 0.003, 0.003, 20):
+            stats.begin_wait()
+            stats.end_wait(seconds)
+        
+        snapshot = stats.snapshot()
+        buckets = {bucket["le_ms"]: bucket["count"] for bucket in snapshot["wait_ms"]["buckets"]}
+        
+        assert buckets[1] == 1
+        assert buckets[5] == 3
+        assert buckets[10000] == 3
+        assert buckets[None] == 4
+        assert snapshot["wait_ms"]["count"] == 4
+        assert snapshot["wait_ms"]["max"] == 20000
+        assert snapshot["waiting"] == 0
+    
+    def test_waiting_counts_checkouts_in_progress(self):
+        """Test a checkout is waiting until it ends, and timeouts are counted."""
+        stats = PoolStats("waiting")
+        stats.begin_wait()
+        assert stats.snapshot()["waiting"] == 1
+        
+        stats.end_wait(0.1, timed_out=True)
+        
+        assert stats.snapshot()["waiting"] == 0
+        assert stats.snapshot()["timeouts"] == 1
+
+
+class TestMonitoredEngine:
+    """Tests for engines built with pool settings and stats."""
+    
+    def test_settings_applied(self, file_engine):
+        """Test the pool uses the given settings and reports them."""
+        snapshot = _snapshot("test")
+        
+        assert snapshot["pool_class"] == "QueuePool"
+        assert snapshot["size"] == 1
+        assert snapshot["max_overflow"] == 0
+        assert snapshot["timeout"] == 0.05
+        assert snapshot["pre_ping"] is False
+        assert snapshot["recycle"] == pool_stats.POOL_RECYCLE
+    
+    def test_exhausted_pool(self, file_engine):
+        """Test a checkout from an exhausted pool times out and is counted."""
+        with file_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            assert _snapshot("test")["checked_out"] == 1
+            
+            with pytest.raises(PoolTimeoutError):
+                file_engine.connect()
+        
+        snapshot = _snapshot("test")
+        assert snapshot["checked_out"] == 0
+        assert snapshot["checked_in"] == 1
+        assert snapshot["connects"] == 1
+        assert snapshot["checkouts"] == 1
+        assert snapshot["timeouts"] == 1
+        assert snapshot["wait_ms"]["count"] == 2
+        assert snapshot["wait_ms"]["max"] >= 50
+    
+    def test_stats_survive_dispose(self, file_engine):
+        """Test the stats follow the engine's new pool after dispose()."""
+        with file_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        file_engine.dispose()
+        with file_engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        
+        snapshot = _snapshot("test")
+        assert snapshot["connects"] == 2
+        assert snapshot["wait_ms"]["count"] == 2
+    
+    def test_in_memory_sqlite_keeps_its_pool(self):
+        """Test in-memory SQLite is left on its default pool, without pool settings."""
+        engine = monitored_engine("memory", "sqlite:///:memory:", create_engine)
+        try:
+            assert _snapshot("memory")["pool_class"] == "SingletonThreadPool"
+        finally:
+            engine.dispose()
+            pool_stats._registry.pop("memory", None)
+
+
+class TestDbPoolEndpoint:
+    """Tests for GET /metrics/db-pool."""
+    
+    def test_requires_metrics_user(self, test_user1, test_user2, monkeypatch):
+        """Test only users listed in METRICS_USERNAMES may read metrics."""
+        monkeypatch.setattr(metrics, "METRICS_USERNAMES", {test_user1.username})
+        
+        assert get_metrics_user(current_user=test_user1) is test_user1
+        with pytest.raises(HTTPException) as exc_info:
+            get_metrics_user(current_user=test_user2)
+        
+        assert exc_info.value.status_code == 403
+    
+    def test_reports_app_engine(self, test_user1):
+        """Test the application's sync engine is reported."""
+        response = get_db_pool_stats(current_user=test_user1)
+        
+        assert "sync" in [pool.name for pool in response.pools]
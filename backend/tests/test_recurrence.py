@@ -0,0 +1,137 @@
+"""
+Unit tests for recurring todos.
+Tests cover date arithmetic and lazy creation of the next occurrence.
+"""
+import pytest
+from datetime import date, timedelta
+from fastapi import HTTPException
+
+from app import crud, schemas
+from app.models import RecurrenceFrequency, Todo, TodoStatus
+from app.recurrence import next_due_date
+
+
+def _create_recurring(db_session, list_id, user_id, due_date, frequency=RecurrenceFrequency.WEEKLY, until=None, tag_ids=None):
+    todo_data = schemas.TodoCreate(
+        name="Water plants",
+        due_date=due_date,
+        tag_ids=tag_ids or [],
+        recurrence=schemas.RecurrenceRule(frequency=frequency, until=until)
+    )
+    return crud.create_todo(db_session, list_id, todo_data, user_id)
+
+
+def _complete(db_session, todo_id, user_id):
+    return crud.update_todo(db_session, todo_id, schemas.TodoUpdate(status=TodoStatus.COMPLETED), user_id)
+
+
+class TestNextDueDate:
+    """Tests for stepping a rule forward."""
+    
+    def test_daily_and_weekly(self):
+        """Test day-based frequencies honour the interval."""
+        assert next_due_date(date(2025, 1, 30), RecurrenceFrequency.DAILY, 3) == date(2025, 2, 2)
+        assert next_due_date(date(2025, 1, 30), RecurrenceFrequency.WEEKLY, 2) == date(2025, 2, 13)
+    
+    def test_monthly_clamps_to_month_end(self):
+        """Test a month-end date is clamped in shorter months."""
+        assert next_due_date(date(2025, 1, 31), RecurrenceFrequency.MONTHLY) == date(2025, 2, 28)
+        assert next_due_date(date(2025, 11, 15), RecurrenceFrequency.MONTHLY, 3) == date(2026, 2, 15)
+    
+    def test_monthly_returns_to_anchor_day(self):
+        """Test a clamped occurrence steps back to the series' anchor day."""
+        assert next_due_date(date(2025, 2, 28), RecurrenceFrequency.MONTHLY, anchor_day=31) == date(2025, 3, 31)
+        assert next_due_date(date(2025, 3, 31), RecurrenceFrequency.MONTHLY, anchor_day=31) == date(2025, 4, 30)
+        assert next_due_date(date(2025, 2, 28), RecurrenceFrequency.YEARLY, 3, anchor_day=29) == date(2028, 2, 29)
+    
+    def test_yearly_leap_day(self):
+        """Test a leap day falls back to Feb 28 in common years."""
+        assert next_due_date(date(2024, 2, 29), RecurrenceFrequency.YEARLY) == date(2025, 2, 28)
+
+
+class TestRecurringTodos:
+    """Tests for creating occurrences when a recurring todo is completed."""
+    
+    def test_completing_creates_next_occurrence(self, db_session, test_user1, test_list, test_tag):
+        """Test completion creates one new occurrence that inherits the rule and tags."""
+        today = date.today()
+        todo = _create_recurring(db_session, test_list.id, test_user1.id, today, tag_ids=[test_tag.id])
+        
+        completed = _complete(db_session, todo.id, test_user1.id)
+        
+        assert completed.recurrence is None
+        next_todo = db_session.query(Todo).filter(Todo.id != completed.id).one()
+        assert next_todo.due_date == today + timedelta(weeks=1)
+        assert next_todo.status == TodoStatus.NOT_STARTED
+        assert next_todo.recurrence["frequency"] == RecurrenceFrequency.WEEKLY
+        assert [t.id for t in next_todo.tags] == [test_tag.id]
+    
+    def test_only_one_open_occurrence(self, db_session, test_user1, test_list):
+        """Test reopening and re-completing an occurrence does not create another."""
+        todo = _create_recurring(db_session, test_list.id, test_user1.id, date.today())
+        _complete(db_session, todo.id, test_user1.id)
+        crud.update_todo(db_session, todo.id, schemas.TodoUpdate(status=TodoStatus.IN_PROGRESS), test_user1.id)
+        _complete(db_session, todo.id, test_user1.id)
+        
+        assert db_session.query(Todo).count() == 2
+    
+    def test_month_end_series_does_not_drift(self, db_session, test_user1, test_list):
+        """Test a series due on the 31st comes back to the 31st after a short month."""
+        todo = _create_recurring(db_session, test_list.id, test_user1.id, date(2099, 1, 31), RecurrenceFrequency.MONTHLY)
+        
+        due_dates = [todo.due_date]
+        for _ in range(3):
+            _complete(db_session, todo.id, test_user1.id)
+            todo = db_session.query(Todo).filter(Todo.status != TodoStatus.COMPLETED).one()
+            due_dates.append(todo.due_date)
+        
+        assert due_dates == [date(2099, 1, 31), date(2099, 2, 28), date(2099, 3, 31), date(2099, 4, 30)]
+    
+    def test_overdue_series_skips_missed_occurrences(self, db_session, test_user1, test_list):
+        """Test the next occurrence is never created in the past."""
+        today = date.today()
+        todo = _create_recurring(db_session, test_list.id, test_user1.id, today - timedelta(days=30), RecurrenceFrequency.DAILY)
+        
+        _complete(db_session, todo.id, test_user1.id)
+        
+        next_todo = db_session.query(Todo).filter(Todo.id != todo.id).one()
+        assert next_todo.due_date == today
+    
+    def test_rule_ends_at_until(self, db_session, test_user1, test_list):
+        """Test no occurrence is created past the rule's end date."""
+        today = date.today()
+        todo = _create_recurring(db_session, test_list.id, test_user1.id, today, until=today + timedelta(days=3))
+        
+        _complete(db_session, todo.id, test_user1.id)
+        
+        assert db_session.query(Todo).count() == 1
+    
+    def test_patch_completion_creates_next_occurrence(self, db_session, test_user1, test_list):
+        """Test completing through PATCH also hands the rule over."""
+        todo = _create_recurring(db_session, test_list.id, test_user1.id, date.today())
+        
+        patched = crud.patch_todo(db_session, todo.id, schemas.TodoUpdate(status=TodoStatus.COMPLETED), test_user1.id)
+        
+        assert patched.recurrence is None
+        assert db_session.query(Todo).filter(Todo.recurrence_frequency.isnot(None)).count() == 1
+    
+    def test_set_and_stop_recurrence(self, db_session, test_user1, test_list, test_todo):
+        """Test a rule can be added to and removed from an existing todo."""
+        rule = schemas.RecurrenceRule(frequency=RecurrenceFrequency.MONTHLY, interval=2)
+        
+        todo = crud.set_todo_recurrence(db_session, test_list.id, test_todo.id, rule, test_user1.id)
+        assert todo.recurrence == {"frequency": RecurrenceFrequency.MONTHLY, "interval": 2, "until": None}
+        
+        todo = crud.set_todo_recurrence(db_session, test_list.id, test_todo.id, None, test_user1.id)
+        assert todo.recurrence is None
+        _complete(db_session, todo.id, test_user1.id)
+        assert db_session.query(Todo).count() == 1
+    
+    def test_set_recurrence_view_permission_fails(self, db_session, test_user2, test_list, test_todo, test_permission_view):
+        """Test users with view permission cannot change a rule."""
+        rule = schemas.RecurrenceRule(frequency=RecurrenceFrequency.DAILY)
+        
+        with pytest.raises(HTTPException) as exc_info:
+            crud.set_todo_recurrence(db_session, test_list.id, test_todo.id, rule, test_user2.id)
+        
+        assert exc_info.value.status_code == 403
@@ -0,0 +1,145 @@
+"""
+Unit tests for the due-date reminder scanner.
+Tests cover the scan window, per-user batching, notifying each todo once and
+reminding again after a todo is rescheduled or reopened.
+"""
+import pytest
+from datetime import date, timedelta
+
+from app import crud, schemas
+from app.models import Todo, TodoStatus, TodoPriority
+from app.reminders import scan_due_todos, run_scan
+
+
+def _add_todo(db_session, todo_list, user, name, due_in_days, status=TodoStatus.NOT_STARTED):
+    todo = Todo(
+        name=name,
+        due_date=date.today() + timedelta(days=due_in_days),
+        status=status,
+        priority=TodoPriority.MEDIUM,
+        list_id=todo_list.id,
+        created_by=user.id
+    )
+    db_session.add(todo)
+    db_session.commit()
+    return todo
+
+
+class Collector:
+    """Reminder sink that records every batch it receives."""
+    
+    def __init__(self):
+        self.batches = {}
+    
+    def __call__(self, user_id, todos):
+        self.batches.setdefault(user_id, []).extend(todo.name for todo in todos)
+
+
+class TestScanDueTodos:
+    """Tests for a single reminder scan."""
+    
+    def test_scan_picks_due_and_overdue(self, db_session, test_user1, test_list):
+        """Test todos due within the lead time or overdue are reminded."""
+        _add_todo(db_session, test_list, test_user1, "Overdue", -3)
+        _add_todo(db_session, test_list, test_user1, "Due tomorrow", 1)
+        _add_todo(db_session, test_list, test_user1, "Next week", 7)
+        sink = Collector()
+        
+        processed = scan_due_todos(db_session, sink=sink)
+        
+        assert processed == 2
+        assert sink.batches == {test_user1.id: ["Overdue", "Due tomorrow"]}
+    
+    def test_scan_skips_completed(self, db_session, test_user1, test_list):
+        """Test completed todos are never reminded."""
+        _add_todo(db_session, test_list, test_user1, "Done", 0, TodoStatus.COMPLETED)
+        sink = Collector()
+        
+        assert scan_due_todos(db_session, sink=sink) == 0
+        assert sink.batches == {}
+    
+    def test_scan_notifies_each_todo_once(self, db_session, test_user1, test_list):
+        """Test a reminded todo is not picked up by later scans."""
+        todo = _add_todo(db_session, test_list, test_user1, "Due today", 0)
+        updated_at = todo.updated_at
+        sink = Collector()
+        
+        scan_due_todos(db_session, sink=sink)
+        scan_due_todos(db_session, sink=sink)
+        
+        assert sink.batches == {test_user1.id: ["Due today"]}
+        db_session.refresh(todo)
+        assert todo.reminder_sent_at is not None
+        assert todo.updated_at == updated_at
+    
+    def test_scan_batches_per_collaborator(self, db_session, test_user1, test_user2, test_list, test_permission_update):
+        """Test the owner and update collaborators each get one batch."""
+        _add_todo(db_session, test_list, test_user1, "First", 0)
+        _add_todo(db_session, test_list, test_user1, "Second", 0)
+        sink = Collector()
+        
+        scan_due_todos(db_session, sink=sink)
+        
+        assert sink.batches == {
+            test_user1.id: ["First", "Second"],
+            test_user2.id: ["First", "Second"],
+        }
+    
+    def test_scan_skips_view_only_collaborators(self, db_session, test_user1, test_user2, test_list, test_permission_view):
+        """Test view-only collaborators are not reminded."""
+        _add_todo(db_session, test_list, test_user1, "Due", 0)
+        sink = Collector()
+        
+        scan_due_todos(db_session, sink=sink)
+        
+        assert list(sink.batches) == [test_user1.id]
+
+
+class TestRunScan:
+    """Tests for draining all pending reminders."""
+    
+    def test_run_scan_drains_in_batches(self, db_session, test_user1, test_list):
+        """Test every pending todo is processed across several batches."""
+        for i in range(5):
+            _add_todo(db_session, test_list, test_user1, f"Todo {i}", 0)
+        sink = Collector()
+        
+        assert run_scan(db_session, batch_size=2, sink=sink) == 5
+        assert len(sink.batches[test_user1.id]) == 5
+
+
+class TestReminderReset:
+    """Tests for reminding again after a todo is rescheduled or reopened."""
+    
+    def _reminded(self, db_session, todo_list, user, status=TodoStatus.NOT_STARTED):
+        todo = _add_todo(db_session, todo_list, user, "Due today", 0, status)
+        todo.reminder_sent_at = todo.created_at
+        db_session.commit()
+        return todo
+    
+    def test_rescheduled_todo_is_reminded_again(self, db_session, test_user1, test_list):
+        """Test moving the due date through PUT makes the todo due a new reminder."""
+        todo = self._reminded(db_session, test_list, test_user1)
+        crud.update_todo(db_session, todo.id, schemas.TodoUpdate(due_date=date.today() + timedelta(days=1)), test_user1.id)
+        sink = Collector()
+        
+        assert scan_due_todos(db_session, sink=sink) == 1
+        assert sink.batches == {test_user1.id: ["Due today"]}
+    
+    def test_reopened_todo_is_reminded_again(self, db_session, test_user1, test_list):
+        """Test reopening a completed todo through PATCH makes it due a new reminder."""
+        todo = self._reminded(db_session, test_list, test_user1, TodoStatus.COMPLETED)
+        
+        patched = crud.patch_todo(db_session, todo.id, schemas.TodoUpdate(status=TodoStatus.IN_PROGRESS), test_user1.id)
+        
+        assert patched.reminder_sent_at is None
+        assert scan_due_todos(db_session, sink=Collector()) == 1
+    
+    def test_other_updates_keep_the_reminder(self, db_session, test_user1, test_list):
+        """Test unrelated changes and unchanged due dates do not remind again."""
+        todo = self._reminded(db_session, test_list, test_user1)
+        
+        crud.patch_todo(db_session, todo.id, schemas.TodoUpdate(name="Renamed", due_date=todo.due_date), test_user1.id)
+        crud.update_todo(db_session, todo.id, schemas.TodoUpdate(status=TodoStatus.IN_PROGRESS), test_user1.id)
+        
+        assert scan_due_todos(db_session, sink=Collector()) == 0
@@ -0,0 +1,130 @@
+"""
+Unit tests for full-text todo search.
+Tests cover matching, ranking, index maintenance and list visibility,
+plus name autocomplete for tags and todos.
+"""
+import pytest
+from datetime import date
+
+from app import crud, schemas
+from app.models import Tag
+from app.search import _tsquery_expression, autocomplete_tags, autocomplete_todos, search_todos
+
+
+def _create(db_session, list_id, user_id, name, description=None):
+    todo_data = schemas.TodoCreate(name=name, description=description, due_date=date.today())
+    return crud.create_todo(db_session, list_id, todo_data, user_id)
+
+
+class TestSearchTodos:
+    """Tests for searching todos across accessible lists."""
+    
+    def test_search_matches_name_and_description(self, db_session, test_user1, test_list):
+        """Test terms are matched in both name and description."""
+        by_name = _create(db_session, test_list.id, test_user1.id, "Buy groceries")
+        by_description = _create(db_session, test_list.id, test_user1.id, "Errands", "pick up groceries on the way")
+        _create(db_session, test_list.id, test_user1.id, "Write report")
+        
+        results = search_todos(db_session, test_user1.id, "groceries")
+        
+        assert {t.id for t in results} == {by_name.id, by_description.id}
+    
+    def test_search_ranks_name_matches_first(self, db_session, test_user1, test_list):
+        """Test a match in the name outranks a match in the description."""
+        by_description = _create(db_session, test_list.id, test_user1.id, "Errands", "call the dentist")
+        by_name = _create(db_session, test_list.id, test_user1.id, "Dentist appointment")
+        
+        results = search_todos(db_session, test_user1.id, "dentist")
+        
+        assert [t.id for t in results] == [by_name.id, by_description.id]
+    
+    def test_search_prefix_match(self, db_session, test_user1, test_list):
+        """Test partial words match as prefixes."""
+        todo = _create(db_session, test_list.id, test_user1.id, "Quarterly planning")
+        
+        results = search_todos(db_session, test_user1.id, "quart")
+        
+        assert [t.id for t in results] == [todo.id]
+    
+    def test_search_reflects_updates_and_deletes(self, db_session, test_user1, test_list):
+        """Test the search index follows renamed and deleted todos."""
+        todo = _create(db_session, test_list.id, test_user1.id, "Old title")
+        crud.update_todo(db_session, todo.id, schemas.TodoUpdate(name="Fresh title"), test_user1.id)
+        
+        assert search_todos(db_session, test_user1.id, "old") == []
+        assert [t.id for t in search_todos(db_session, test_user1.id, "fresh")] == [todo.id]
+        
+        crud.delete_todo(db_session, todo.id, test_user1.id)
+        
+        assert search_todos(db_session, test_user1.id, "fresh") == []
+    
+    def test_search_includes_shared_lists(self, db_session, test_user2, test_list, test_todo, test_permission_view):
+        """Test todos in lists shared with the user are searchable."""
+        results = search_todos(db_session, test_user2.id, "test")
+        
+        assert [t.id for t in results] == [test_todo.id]
+    
+    def test_search_excludes_inaccessible_lists(self, db_session, test_user2, test_todo):
+        """Test todos in lists the user cannot view are never returned."""
+        assert search_todos(db_session, test_user2.id, "test") == []
+    
+    def test_search_query_syntax_is_escaped(self, db_session, test_user1, test_list):
+        """Test FTS operators in user input are treated as plain text."""
+        _create(db_session, test_list.id, test_user1.id, "Plain todo")
+        
+        assert search_todos(db_session, test_user1.id, 'NOT "AND (') == []
+    
+    def test_postgres_query_matches_prefixes(self):
+        """Test the Postgres tsquery quotes every term as a required prefix, like the FTS5 one."""
+        assert _tsquery_expression("quart plan") == "'quart':* & 'plan':*"
+        assert _tsquery_expression("it's a\\b !") == "'it''s':* & 'a\\\\b':* & '!':*"
+    
+    def test_search_blank_query(self, db_session, test_user1, test_todo):
+        """Test a blank query returns nothing."""
+        assert search_todos(db_session, test_user1.id, "   ") == []
+
+
+
+class TestAutocomplete:
+    """Tests for tag and todo name autocomplete."""
+    
+    def test_autocomplete_tags_prefix(self, db_session, test_user1, test_user2):
+        """Test tag suggestions match the typed prefix case-insensitively and only for the owner."""
+        for name, user in (("Work", test_user1), ("workout", test_user1), ("Home", test_user1), ("work", test_user2)):
+            db_session.add(Tag(name=name, user_id=user.id))
+        db_session.commit()
+        
+        results = autocomplete_tags(db_session, test_user1.id, "wor")
+        
+        assert [t.name for t in results] == ["Work", "workout"]
+    
+    def test_autocomplete_tags_limit(self, db_session, test_user1):
+        """Test at most limit suggestions are returned."""
+        for i in range(5):
+            db_session.add(Tag(name=f"tag{i}", user_id=test_user1.id))
+        db_session.commit()
+        
+        assert len(autocomplete_tags(db_session, test_user1.id, "tag", limit=3)) == 3
+    
+    def test_autocomplete_escapes_wildcards(self, db_session, test_user1):
+        """Test LIKE wildcards in the query are matched literally."""
+        db_session.add_all([Tag(name="100% done", user_id=test_user1.id), Tag(name="1000", user_id=test_user1.id)])
+        db_session.commit()
+        
+        assert [t.name for t in autocomplete_tags(db_session, test_user1.id, "100%")] == ["100% done"]
+        assert autocomplete_tags(db_session, test_user1.id, "_") == []
+    
+    def test_autocomplete_todos_visible_lists(self, db_session, test_user1, test_user2, test_list, test_list2, test_permission_view):
+        """Test todo suggestions cover owned and shared lists but not others."""
+        shared = _create(db_session, test_list.id, test_user1.id, "Pay rent")
+        own = _create(db_session, test_list2.id, test_user2.id, "Pay bills")
+        _create(db_session, test_list2.id, test_user2.id, "Call mom")
+        
+        results = autocomplete_todos(db_session, test_user2.id, "pay")
+        
+        assert [(r.id, r.list_id) for r in results] == [(own.id, test_list2.id), (shared.id, test_list.id)]
+        assert autocomplete_todos(db_session, test_user1.id, "pay bills") == []
+    
+    def test_autocomplete_blank_query(self, db_session, test_user1, test_todo):
+        """Test a blank query returns nothing."""
+        assert autocomplete_todos(db_session, test_user1.id, "  ") == []
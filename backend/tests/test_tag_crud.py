@@ -0,0 +1,186 @@
+"""
+Unit tests for Tag operations.
+Tests cover tag usage counts, cache invalidation, listing todos by tag and merging tags.
+"""
+import pytest
+from datetime import date
+from fastapi import HTTPException
+
+from app import crud, schemas
+from app.models import TodoStatus
+from app.tag_stats import get_tag_usage_counts, invalidate_on_commit
+
+
+def _create(db_session, list_id, user_id, name, tag_ids, status=TodoStatus.NOT_STARTED):
+    todo_data = schemas.TodoCreate(name=name, due_date=date.today(), status=status, tag_ids=tag_ids)
+    return crud.create_todo(db_session, list_id, todo_data, user_id)
+
+
+class TestTagUsageCounts:
+    """Tests for per-tag total and open todo counts."""
+    
+    def test_counts_total_and_open(self, db_session, test_user1, test_list, test_tag):
+        """Test totals include completed todos while open counts do not."""
+        _create(db_session, test_list.id, test_user1.id, "Open", [test_tag.id])
+        _create(db_session, test_list.id, test_user1.id, "Done", [test_tag.id], TodoStatus.COMPLETED)
+        
+        counts = get_tag_usage_counts(db_session, test_user1.id)
+        
+        assert counts == {test_tag.id: (2, 1)}
+    
+    def test_unused_tags_are_absent(self, db_session, test_user1, test_tag):
+        """Test tags without todos have no entry."""
+        assert get_tag_usage_counts(db_session, test_user1.id) == {}
+    
+    def test_counts_are_per_owner(self, db_session, test_user1, test_user2, test_list, test_tag):
+        """Test another user's counts do not include this user's tags."""
+        _create(db_session, test_list.id, test_user1.id, "Tagged", [test_tag.id])
+        
+        assert get_tag_usage_counts(db_session, test_user2.id) == {}
+    
+    def test_cache_invalidated_on_link_change(self, db_session, test_user1, test_list, test_todo, test_tag):
+        """Test relinking tags through update_todo refreshes cached counts."""
+        assert get_tag_usage_counts(db_session, test_user1.id) == {}
+        
+        crud.update_todo(db_session, test_todo.id, schemas.TodoUpdate(tag_ids=[test_tag.id]), test_user1.id)
+        assert get_tag_usage_counts(db_session, test_user1.id) == {test_tag.id: (1, 1)}
+        
+        crud.update_todo(db_session, test_todo.id, schemas.TodoUpdate(tag_ids=[]), test_user1.id)
+        assert get_tag_usage_counts(db_session, test_user1.id) == {}
+    
+    def test_cache_invalidated_on_status_change(self, db_session, test_user1, test_list, test_tag):
+        """Test completing a tagged todo refreshes the open count."""
+        todo = _create(db_session, test_list.id, test_user1.id, "Tagged", [test_tag.id])
+        assert get_tag_usage_counts(db_session, test_user1.id) == {test_tag.id: (1, 1)}
+        
+        crud.patch_todo(db_session, todo.id, schemas.TodoUpdate(status=TodoStatus.COMPLETED), test_user1.id)
+        
+        assert get_tag_usage_counts(db_session, test_user1.id) == {test_tag.id: (1, 0)}
+    
+    def test_cache_invalidated_on_delete(self, db_session, test_user1, test_list, test_tag):
+        """Test deleting a tagged todo refreshes counts."""
+        todo = _create(db_session, test_list.id, test_user1.id, "Tagged", [test_tag.id])
+        assert get_tag_usage_counts(db_session, test_user1.id) == {test_tag.id: (1, 1)}
+        
+        crud.delete_todo(db_session, todo.id, test_user1.id)
+        
+        assert get_tag_usage_counts(db_session, test_user1.id) == {}
+    
+    def test_cache_invalidated_only_after_commit(self, db_session, test_user1, test_list, test_tag):
+        """Test counts cached while a write is in flight are dropped when it commits, not before."""
+        todo = _create(db_session, test_list.id, test_user1.id, "Tagged", [test_tag.id])
+        assert get_tag_usage_counts(db_session, test_user1.id) == {test_tag.id: (1, 1)}
+        
+        invalidate_on_commit(db_session, [test_user1.id])
+        todo.status = TodoStatus.COMPLETED
+        db_session.flush()
+        
+        assert get_tag_usage_counts(db_session, test_user1.id) == {test_tag.id: (1, 1)}
+        
+        db_session.commit()
+        
+        assert get_tag_usage_counts(db_session, test_user1.id) == {test_tag.id: (1, 0)}
+    
+    def test_tag_response_reports_owner(self, test_tag, test_user1):
+        """Test tag responses expose the owning user as created_by."""
+        response = schemas.TagResponse.model_validate(test_tag)
+        
+        assert response.created_by == test_user1.id
+
+
+class TestGetTagTodos:
+    """Tests for listing todos by tag across lists."""
+    
+    def test_tag_todos_across_lists(self, db_session, test_user1, test_list, test_tag):
+        """Test todos from every accessible list are returned in id order."""
+        other_list = crud.create_list(db_session, schemas.TodoListCreate(name="Other"), test_user1.id)
+        first = _create(db_session, test_list.id, test_user1.id, "First", [test_tag.id])
+        _create(db_session, test_list.id, test_user1.id, "Untagged", [])
+        second = _create(db_session, other_list.id, test_user1.id, "Second", [test_tag.id])
+        
+        todos, next_cursor = crud.get_tag_todos(db_session, test_tag.id, test_user1.id)
+        
+        assert [t.id for t in todos] == [first.id, second.id]
+        assert next_cursor is None
+    
+    def test_tag_todos_keyset_pages(self, db_session, test_user1, test_list, test_tag):
+        """Test paging with the returned cursor visits every todo once."""
+        created = [_create(db_session, test_list.id, test_user1.id, f"Todo {i}", [test_tag.id]) for i in range(5)]
+        
+        page1, cursor = crud.get_tag_todos(db_session, test_tag.id, test_user1.id, limit=2)
+        page2, cursor = crud.get_tag_todos(db_session, test_tag.id, test_user1.id, after_id=cursor, limit=2)
+        page3, cursor = crud.get_tag_todos(db_session, test_tag.id, test_user1.id, after_id=cursor, limit=2)
+        
+        assert [t.id for t in page1 + page2 + page3] == [t.id for t in created]
+        assert cursor is None
+    
+    def test_tag_todos_only_viewable_lists(self, db_session, test_user1, test_user2, test_list, test_tag):
+        """Test todos in lists the caller cannot view are excluded."""
+        _create(db_session, test_list.id, test_user1.id, "Private", [test_tag.id])
+        
+        todos, _ = crud.get_tag_todos(db_session, test_tag.id, test_user2.id)
+        
+        assert todos == []
+    
+    def test_tag_todos_unknown_tag(self, db_session, test_user1):
+        """Test an unknown tag is a 404."""
+        with pytest.raises(HTTPException) as exc_info:
+            crud.get_tag_todos(db_session, 99999, test_user1.id)
+        
+        assert exc_info.value.status_code == 404
+
+
+class TestMergeTags:
+    """Tests for merging tags into a target."""
+    
+    def _tag(self, db_session, user_id, name):
+        return crud.create_tag(db_session, schemas.TagCreate(name=name), user_id)
+    
+    def test_merge_relabels_and_deletes_sources(self, db_session, test_user1, test_list, test_tag):
+        """Test todos move to the target tag and sources disappear."""
+        dup = self._tag(db_session, test_user1.id, "important")
+        only_dup = _create(db_session, test_list.id, test_user1.id, "Only dup", [dup.id])
+        both = _create(db_session, test_list.id, test_user1.id, "Both", [test_tag.id, dup.id])
+        
+        result = crud.merge_tags(db_session, test_tag.id, schemas.TagMerge(source_tag_ids=[dup.id]), test_user1.id)
+        
+        assert result.id == test_tag.id
+        assert [t.id for t in crud.get_user_tags(db_session, test_user1.id)] == [test_tag.id]
+        todos, _ = crud.get_tag_todos(db_session, test_tag.id, test_user1.id)
+        assert [t.id for t in todos] == [only_dup.id, both.id]
+        db_session.expire_all()
+        assert [t.id for t in crud.get_todo_by_id(db_session, both.id, test_user1.id).tags] == [test_tag.id]
+    
+    def test_merge_multiple_sources(self, db_session, test_user1, test_list, test_tag):
+        """Test several sources merge in one call and counts follow."""
+        sources = [self._tag(db_session, test_user1.id, name) for name in ["imp", "IMPORTANT"]]
+        for source in sources:
+            _create(db_session, test_list.id, test_user1.id, source.name, [source.id])
+        get_tag_usage_counts(db_session, test_user1.id)
+        
+        crud.merge_tags(db_session, test_tag.id, schemas.TagMerge(source_tag_ids=[s.id for s in sources]), test_user1.id)
+        
+        assert get_tag_usage_counts(db_session, test_user1.id) == {test_tag.id: (2, 2)}
+    
+    def test_merge_into_itself(self, db_session, test_user1, test_tag):
+        """Test merging a tag into itself is rejected."""
+        with pytest.raises(HTTPException) as exc_info:
+            crud.merge_tags(db_session, test_tag.id, schemas.TagMerge(source_tag_ids=[test_tag.id]), test_user1.id)
+        
+        assert exc_info.value.status_code == 400
+    
+    def test_merge_unknown_source(self, db_session, test_user1, test_tag):
+        """Test an unknown source tag is a 404."""
+        with pytest.raises(HTTPException) as exc_info:
+            crud.merge_tags(db_session, test_tag.id, schemas.TagMerge(source_tag_ids=[99999]), test_user1.id)
+        
+        assert exc_info.value.status_code == 404
+    
+    def test_merge_other_users_tag(self, db_session, test_user1, test_user2, test_tag):
+        """Test tags owned by someone else cannot be merged."""
+        foreign = self._tag(db_session, test_user2.id, "theirs")
+        
+        with pytest.raises(HTTPException) as exc_info:
+            crud.merge_tags(db_session, test_tag.id, schemas.TagMerge(source_tag_ids=[foreign.id]), test_user1.id)
+        
+        assert exc_info.value.status_code == 403
@@ -3,11 +3,11 @@ Unit tests for Todo Item CRUD operations.
 Tests cover creation, reading, updating, and deleting todo items with proper authorization.
 """
 import pytest
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta, timezone
 from fastapi import HTTPException
 
 from app import crud, schemas
-from app.models import Todo, TodoStatus, TodoPriority
+from app.models import ActivityLog, Todo, TodoStatus, TodoPriority
 
 
 class TestGetListTodos:
@@ -383,3 +383,370 @@ class TestDeleteTodo:
         from app.models import Tag
         existing_tag = db_session.query(Tag).filter(Tag.id == test_tag.id).first()
         assert existing_tag is not None
+
+
+class TestGetTodoChanges:
+    """Tests for the delta-sync feed of a list."""
+    
+    def test_initial_sync_returns_everything(self, db_session, test_user1, test_list, test_todo):
+        """Test syncing without a cursor returns the whole list."""
+        changed, deleted, cursor, full_resync = crud.get_todo_changes(db_session, test_list.id, test_user1.id)
+        
+        assert full_resync is True
+        assert [t.id for t in changed] == [test_todo.id]
+        assert deleted == []
+        assert cursor == test_todo.updated_at
+    
+    def test_changes_since_cursor(self, db_session, test_user1, test_list, test_todo):
+        """Test only todos touched after the cursor are returned."""
+        _, _, cursor, _ = crud.get_todo_changes(db_session, test_list.id, test_user1.id)
+        
+        # Move the untouched todo behind the cursor and its safety window
+        test_todo.updated_at = cursor - crud.TODO_SYNC_SAFETY_WINDOW - timedelta(seconds=5)
+        db_session.commit()
+        
+        new_todo = crud.create_todo(
+            db_session, test_list.id,
+            schemas.TodoCreate(name="Fresh", due_date=date.today()),
+            test_user1.id
+        )
+        
+        changed, deleted, next_cursor, full_resync = crud.get_todo_changes(
+            db_session, test_list.id, test_user1.id, since=cursor
+        )
+        
+        assert full_resync is False
+        assert [t.id for t in changed] == [new_todo.id]
+        assert deleted == []
+        assert next_cursor >= cursor
+    
+    def test_late_commit_within_safety_window(self, db_session, test_user1, test_list, test_todo):
+        """Test a change stamped before the cursor but committed after the sync is still sent."""
+        _, _, cursor, _ = crud.get_todo_changes(db_session, test_list.id, test_user1.id)
+        
+        # Written before the previous sync read the list, committed after it
+        late = crud.create_todo(
+            db_session, test_list.id,
+            schemas.TodoCreate(name="Late", due_date=date.today()),
+            test_user1.id
+        )
+        late.updated_at = cursor - timedelta(seconds=1)
+        db_session.commit()
+        
+        changed, _, _, full_resync = crud.get_todo_changes(db_session, test_list.id, test_user1.id, since=cursor)
+        
+        assert full_resync is False
+        assert late.id in [t.id for t in changed]
+    
+    def test_deleted_todos_are_tombstoned(self, db_session, test_user1, test_list, test_todo):
+        """Test deletions are reported by id."""
+        _, _, cursor, _ = crud.get_todo_changes(db_session, test_list.id, test_user1.id)
+        todo_id = test_todo.id
+        
+        crud.delete_todo(db_session, todo_id, test_user1.id)
+        
+        changed, deleted, _, _ = crud.get_todo_changes(db_session, test_list.id, test_user1.id, since=cursor)
+        
+        assert changed == []
+        assert deleted == [todo_id]
+    
+    def test_tag_changes_bump_updated_at(self, db_session, test_user1, test_list, test_todo, test_tag):
+        """Test relinking tags surfaces the todo as changed."""
+        test_todo.updated_at = test_todo.updated_at - timedelta(minutes=1)
+        db_session.commit()
+        _, _, cursor, _ = crud.get_todo_changes(db_session, test_list.id, test_user1.id)
+        
+        crud.update_todo(db_session, test_todo.id, schemas.TodoUpdate(tag_ids=[test_tag.id]), test_user1.id)
+        
+        changed, _, _, _ = crud.get_todo_changes(db_session, test_list.id, test_user1.id, since=cursor + timedelta(seconds=1))
+        
+        assert [t.id for t in changed] == [test_todo.id]
+    
+    def test_tag_rename_and_delete_bump_updated_at(self, db_session, test_user1, test_list, test_todo, test_tag):
+        """Test renaming or deleting a tag surfaces the todos that carry it as changed."""
+        crud.update_todo(db_session, test_todo.id, schemas.TodoUpdate(tag_ids=[test_tag.id]), test_user1.id)
+        
+        for change in (
+            lambda: crud.update_tag(db_session, test_tag.id, schemas.TagUpdate(name="renamed"), test_user1.id),
+            lambda: crud.delete_tag(db_session, test_tag.id, test_user1.id),
+        ):
+            # Move the todo behind the cursor and its safety window
+            cursor = datetime.now(timezone.utc)
+            test_todo.updated_at = cursor - crud.TODO_SYNC_SAFETY_WINDOW - timedelta(minutes=1)
+            db_session.commit()
+            
+            change()
+            db_session.expire_all()
+            
+            changed, _, _, _ = crud.get_todo_changes(db_session, test_list.id, test_user1.id, since=cursor)
+            
+            assert [t.id for t in changed] == [test_todo.id]
+        
+        assert changed[0].tags == []
+    
+    def test_stale_cursor_forces_full_resync(self, db_session, test_user1, test_list, test_todo):
+        """Test a cursor older than tombstone retention triggers a full resync."""
+        stale = datetime.now(timezone.utc) - crud.TODO_TOMBSTONE_RETENTION - timedelta(days=1)
+        
+        changed, deleted, _, full_resync = crud.get_todo_changes(db_session, test_list.id, test_user1.id, since=stale)
+        
+        assert full_resync is True
+        assert [t.id for t in changed] == [test_todo.id]
+    
+    def test_prune_todo_deletions(self, db_session, test_user1, test_list, test_todo):
+        """Test tombstones past retention are pruned."""
+        crud.delete_todo(db_session, test_todo.id, test_user1.id)
+        
+        assert crud.prune_todo_deletions(db_session) == 0
+        assert crud.prune_todo_deletions(db_session, older_than=timedelta(seconds=-1)) == 1
+    
+    def test_changes_without_permission(self, db_session, test_user2, test_list):
+        """Test user without permission cannot sync the list."""
+        with pytest.raises(HTTPException) as exc_info:
+            crud.get_todo_changes(db_session, test_list.id, test_user2.id)
+        
+        assert exc_info.value.status_code == 403
+
+
+class TestPatchTodo:
+    """Tests for minimal-write todo patches."""
+    
+    def _activity_count(self, db_session, todo_id):
+        from app.models import ActivityLog
+        return db_session.query(ActivityLog).filter(ActivityLog.todo_id == todo_id).count()
+    
+    def test_patch_changed_fields(self, db_session, test_user1, test_todo):
+        """Test only changed fields are written and logged."""
+        update_data = schemas.TodoUpdate(name="Patched", description=test_todo.description)
+        
+        result = crud.patch_todo(db_session, test_todo.id, update_data, test_user1.id)
+        
+        assert result.name == "Patched"
+        assert result.description == "A test todo item"
+        from app.models import ActivityLog
+        log = db_session.query(ActivityLog).filter(ActivityLog.todo_id == test_todo.id).one()
+        assert list(log.details_dict["changes"]) == ["name"]
+    
+    def test_patch_noop_skips_write_and_activity(self, db_session, test_user1, test_todo):
+        """Test a patch matching the stored values changes nothing."""
+        updated_at = test_todo.updated_at
+        update_data = schemas.TodoUpdate(name=test_todo.name, status=test_todo.status)
+        
+        result = crud.patch_todo(db_session, test_todo.id, update_data, test_user1.id)
+        
+        assert result.updated_at == updated_at
+        assert self._activity_count(db_session, test_todo.id) == 0
+    
+    def test_patch_status_logs_status_change(self, db_session, test_user1, test_todo):
+        """Test a status change is logged as such."""
+        update_data = schemas.TodoUpdate(status=TodoStatus.COMPLETED)
+        
+        result = crud.patch_todo(db_session, test_todo.id, update_data, test_user1.id)
+        
+        assert result.status == TodoStatus.COMPLETED
+        from app.models import ActivityLog
+        log = db_session.query(ActivityLog).filter(ActivityLog.todo_id == test_todo.id).one()
+        assert log.action_type == "status_changed"
+        assert log.details_dict["old_status"] == "Not Started"
+        assert log.details_dict["new_status"] == "Completed"
+    
+    def test_patch_status_with_other_fields_logs_every_change(self, db_session, test_user1, test_todo):
+        """Test fields patched together with the status are logged too."""
+        update_data = schemas.TodoUpdate(status=TodoStatus.IN_PROGRESS, name="Renamed", priority=TodoPriority.HIGH)
+        
+        crud.patch_todo(db_session, test_todo.id, update_data, test_user1.id)
+        
+        from app.models import ActivityLog
+        logs = {log.action_type: log.details_dict for log in db_session.query(ActivityLog).filter(ActivityLog.todo_id == test_todo.id)}
+        assert logs["status_changed"]["new_status"] == "In Progress"
+        assert logs["updated"]["changes"] == {
+            "name": {"old": "Test Todo", "new": "Renamed"},
+            "priority": {"old": "Medium", "new": "High"},
+        }
+    
+    def test_patch_result_is_persisted(self, db_session, test_user1, test_todo):
+        """Test the returned values match what was stored."""
+        crud.patch_todo(db_session, test_todo.id, schemas.TodoUpdate(priority=TodoPriority.HIGHEST), test_user1.id)
+        
+        stored = db_session.query(Todo).filter(Todo.id == test_todo.id).one()
+        assert stored.priority == TodoPriority.HIGHEST
+    
+    def test_patch_tags(self, db_session, test_user1, test_todo, test_tag):
+        """Test tags are relinked only when the set differs."""
+        result = crud.patch_todo(db_session, test_todo.id, schemas.TodoUpdate(tag_ids=[test_tag.id]), test_user1.id)
+        assert [t.id for t in result.tags] == [test_tag.id]
+        
+        updated_at = db_session.query(Todo.updated_at).filter(Todo.id == test_todo.id).scalar()
+        result = crud.patch_todo(db_session, test_todo.id, schemas.TodoUpdate(tag_ids=[test_tag.id]), test_user1.id)
+        
+        assert result.updated_at == updated_at
+    
+    def test_patch_wrong_list(self, db_session, test_user1, test_todo):
+        """Test patching through another list's URL is rejected."""
+        with pytest.raises(HTTPException) as exc_info:
+            crud.patch_todo(db_session, test_todo.id, schemas.TodoUpdate(name="X"), test_user1.id, list_id=99999)
+        
+        assert exc_info.value.status_code == 404
+    
+    def test_patch_with_view_permission_fails(self, db_session, test_user2, test_todo, test_permission_view):
+        """Test user with view permission cannot patch todo."""
+        with pytest.raises(HTTPException) as exc_info:
+            crud.patch_todo(db_session, test_todo.id, schemas.TodoUpdate(name="X"), test_user2.id)
+        
+        assert exc_info.value.status_code == 403
+
+
+class TestTodoSubtree:
+    """Tests for subtasks and subtree retrieval."""
+    
+    def _subtask(self, db_session, list_id, user_id, parent_id, name, status=TodoStatus.NOT_STARTED):
+        todo_data = schemas.TodoCreate(name=name, due_date=date.today(), status=status, parent_id=parent_id)
+        return crud.create_todo(db_session, list_id, todo_data, user_id)
+    
+    def test_subtree_nests_children_with_counts(self, db_session, test_user1, test_list, test_todo):
+        """Test the subtree is nested and carries direct child completion counts."""
+        child1 = self._subtask(db_session, test_list.id, test_user1.id, test_todo.id, "Child 1", TodoStatus.COMPLETED)
+        child2 = self._subtask(db_session, test_list.id, test_user1.id, test_todo.id, "Child 2")
+        grandchild = self._subtask(db_session, test_list.id, test_user1.id, child2.id, "Grandchild")
+        
+        tree = crud.get_todo_subtree(db_session, test_list.id, test_todo.id, test_user1.id)
+        
+        assert tree.id == test_todo.id
+        assert (tree.child_count, tree.completed_child_count) == (2, 1)
+        assert [c.id for c in tree.children] == [child1.id, child2.id]
+        assert tree.children[1].children[0].id == grandchild.id
+        assert tree.children[1].children[0].depth == 2
+        assert tree.children[1].children[0].parent_id == child2.id
+    
+    def test_subtree_depth_limit_keeps_counts(self, db_session, test_user1, test_list, test_todo):
+        """Test max_depth cuts the tree but counts still cover unreturned children."""
+        child = self._subtask(db_session, test_list.id, test_user1.id, test_todo.id, "Child")
+        self._subtask(db_session, test_list.id, test_user1.id, child.id, "Grandchild", TodoStatus.COMPLETED)
+        
+        tree = crud.get_todo_subtree(db_session, test_list.id, test_todo.id, test_user1.id, max_depth=1)
+        
+        assert tree.children[0].children == []
+        assert (tree.children[0].child_count, tree.children[0].completed_child_count) == (1, 1)
+    
+    def test_subtree_wrong_list(self, db_session, test_user1, test_user2, test_list2, test_todo):
+        """Test a todo outside the list is not found."""
+        with pytest.raises(HTTPException) as exc_info:
+            crud.get_todo_subtree(db_session, test_list2.id, test_todo.id, test_user2.id)
+        
+        assert exc_info.value.status_code == 404
+    
+    def test_create_subtask_parent_in_other_list_fails(self, db_session, test_user2, test_list2, test_todo):
+        """Test a subtask cannot be nested under a todo in another list."""
+        with pytest.raises(HTTPException) as exc_info:
+            self._subtask(db_session, test_list2.id, test_user2.id, test_todo.id, "Child")
+        
+        assert exc_info.value.status_code == 404
+    
+    def test_create_subtask_depth_limit(self, db_session, test_user1, test_list, test_todo):
+        """Test nesting beyond MAX_SUBTASK_DEPTH is rejected."""
+        parent = test_todo
+        for level in range(crud.MAX_SUBTASK_DEPTH):
+            parent = self._subtask(db_session, test_list.id, test_user1.id, parent.id, f"Level {level + 1}")
+        
+        with pytest.raises(HTTPException) as exc_info:
+            self._subtask(db_session, test_list.id, test_user1.id, parent.id, "Too deep")
+        
+        assert exc_info.value.status_code == 400
+    
+    def test_delete_removes_subtree(self, db_session, test_user1, test_list, test_todo):
+        """Test deleting a todo deletes and tombstones its subtasks."""
+        child = self._subtask(db_session, test_list.id, test_user1.id, test_todo.id, "Child")
+        grandchild = self._subtask(db_session, test_list.id, test_user1.id, child.id, "Grandchild")
+        subtree_ids = {test_todo.id, child.id, grandchild.id}
+        _, _, cursor, _ = crud.get_todo_changes(db_session, test_list.id, test_user1.id)
+        
+        crud.delete_todo(db_session, test_todo.id, test_user1.id)
+        
+        assert db_session.query(Todo).count() == 0
+        _, deleted, _, _ = crud.get_todo_changes(db_session, test_list.id, test_user1.id, since=cursor)
+        assert set(deleted) == subtree_ids
+
+
+class TestMoveTodosToList:
+    """Tests for moving todos between lists in bulk."""
+    
+    def _create(self, db_session, list_id, user_id, name, parent_id=None):
+        todo_data = schemas.TodoCreate(name=name, due_date=date.today(), parent_id=parent_id)
+        return crud.create_todo(db_session, list_id, todo_data, user_id)
+    
+    def test_move_appends_to_target_in_order(self, db_session, test_user2, test_list, test_list2, test_permission_update):
+        """Test moved todos land after the target's todos, keeping their order."""
+        existing = self._create(db_session, test_list2.id, test_user2.id, "Existing")
+        first = self._create(db_session, test_list.id, test_user2.id, "First")
+        second = self._create(db_session, test_list.id, test_user2.id, "Second")
+        first_id, second_id, existing_id = first.id, second.id, existing.id
+        
+        moved = crud.move_todos_to_list(
+            db_session, test_list.id, schemas.TodoBulkMove(todo_ids=[second_id, first_id], target_list_id=test_list2.id), test_user2.id
+        )
+        
+        assert [t.id for t in moved] == [first_id, second_id]
+        todos = crud.get_list_todos(db_session, test_list2.id, test_user2.id)
+        assert [t.id for t in todos] == [existing_id, first_id, second_id]
+        assert crud.get_list_todos(db_session, test_list.id, test_user2.id) == []
+    
+    def test_move_takes_subtasks_and_detaches_orphans(self, db_session, test_user2, test_list, test_list2, test_permission_update):
+        """Test subtasks follow their parent and moved subtasks of unmoved parents become top-level."""
+        parent = self._create(db_session, test_list.id, test_user2.id, "Parent")
+        child = self._create(db_session, test_list.id, test_user2.id, "Child", parent_id=parent.id)
+        other = self._create(db_session, test_list.id, test_user2.id, "Other")
+        other_child = self._create(db_session, test_list.id, test_user2.id, "Other child", parent_id=other.id)
+        parent_id, child_id, other_child_id = parent.id, child.id, other_child.id
+        
+        moved = crud.move_todos_to_list(
+            db_session, test_list.id, schemas.TodoBulkMove(todo_ids=[parent_id, other_child_id], target_list_id=test_list2.id), test_user2.id
+        )
+        
+        by_id = {t.id: t for t in moved}
+        assert set(by_id) == {parent_id, child_id, other_child_id}
+        assert by_id[child_id].parent_id == parent_id
+        assert by_id[other_child_id].parent_id is None
+    
+    def test_move_shows_in_delta_sync(self, db_session, test_user2, test_list, test_list2, test_permission_update):
+        """Test delta sync reports the move as a deletion in the source and a change in the target."""
+        todo = self._create(db_session, test_list.id, test_user2.id, "Todo")
+        todo_id = todo.id
+        _, _, source_cursor, _ = crud.get_todo_changes(db_session, test_list.id, test_user2.id)
+        
+        crud.move_todos_to_list(db_session, test_list.id, schemas.TodoBulkMove(todo_ids=[todo_id], target_list_id=test_list2.id), test_user2.id)
+        
+        _, deleted, _, _ = crud.get_todo_changes(db_session, test_list.id, test_user2.id, since=source_cursor)
+        assert deleted == [todo_id]
+        
+        _, _, target_cursor, _ = crud.get_todo_changes(db_session, test_list2.id, test_user2.id)
+        crud.move_todos_to_list(db_session, test_list2.id, schemas.TodoBulkMove(todo_ids=[todo_id], target_list_id=test_list.id), test_user2.id)
+        changed, deleted, _, _ = crud.get_todo_changes(db_session, test_list.id, test_user2.id, since=source_cursor)
+        assert [t.id for t in changed] == [todo_id]
+        assert deleted == []
+    
+    def test_move_logs_one_entry_per_list(self, db_session, test_user2, test_list, test_list2, test_permission_update):
+        """Test a move logs exactly one activity entry on each list."""
+        todos = [self._create(db_session, test_list.id, test_user2.id, f"Todo {i}") for i in range(3)]
+        todo_ids = [t.id for t in todos]
+        
+        crud.move_todos_to_list(db_session, test_list.id, schemas.TodoBulkMove(todo_ids=todo_ids, target_list_id=test_list2.id), test_user2.id)
+        
+        moves = db_session.query(ActivityLog).filter(ActivityLog.action_type == "moved").all()
+        assert sorted(log.list_id for log in moves) == sorted([test_list.id, test_list2.id])
+        assert all(log.details_dict["count"] == 3 for log in moves)
+    
+    def test_move_requires_update_on_target(self, db_session, test_user1, test_list, test_list2, test_todo):
+        """Test moving into a list without update permission is forbidden."""
+        with pytest.raises(HTTPException) as exc_info:
+            crud.move_todos_to_list(db_session, test_list.id, schemas.TodoBulkMove(todo_ids=[test_todo.id], target_list_id=test_list2.id), test_user1.id)
+        
+        assert exc_info.value.status_code == 403
+    
+    def test_move_todo_from_other_list_fails(self, db_session, test_user2, test_list, test_list2, test_permission_update):
+        """Test every todo must belong to the source list."""
+        todo = self._create(db_session, test_list2.id, test_user2.id, "Elsewhere")
+        
+        with pytest.raises(HTTPException) as exc_info:
+            crud.move_todos_to_list(db_session, test_list.id, schemas.TodoBulkMove(todo_ids=[todo.id], target_list_id=test_list2.id), test_user2.id)
+        
+        assert exc_info.value.status_code == 404
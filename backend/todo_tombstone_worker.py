@@ -0,0 +1,51 @@
+"""
+Todo tombstone pruning worker.
+
+Deletes todo_deletions rows past TODO_TOMBSTONE_RETENTION; delta-sync clients
+further behind than that are sent a full resync instead. Runs as its own
+process against the same database as the API:
+
+	python todo_tombstone_worker.py
+"""
+import logging
+import os
+import signal
+import threading
+
+from app.crud import prune_todo_deletions
+from app.database import SessionLocal
+
+RUN_INTERVAL_SECONDS = float(os.getenv("TODO_TOMBSTONE_PRUNE_INTERVAL_SECONDS", "3600"))
+
+logger = logging.getLogger("todo_tombstone_worker")
+
+stop_event = threading.Event()
+
+
+def _stop(signum, frame):
+	logger.info("Received signal %s, stopping after the current run", signum)
+	stop_event.set()
+
+
+def main():
+	logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+	signal.signal(signal.SIGTERM, _stop)
+	signal.signal(signal.SIGINT, _stop)
+	
+	logger.info("Pruning todo tombstones every %ss", RUN_INTERVAL_SECONDS)
+	while not stop_event.is_set():
+		db = SessionLocal()
+		try:
+			removed = prune_todo_deletions(db)
+			if removed:
+				logger.info("Pruned %s todo tombstones", removed)
+		except Exception:
+			logger.exception("Todo tombstone pruning failed")
+			db.rollback()
+		finally:
+			db.close()
+		stop_event.wait(RUN_INTERVAL_SECONDS)
+
+
+if __name__ == "__main__":
+	main()
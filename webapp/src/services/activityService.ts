@@ -4,7 +4,8 @@ import { getAuthHeaders } from './authService';
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8080';
 
 export interface ActivityFeedResponse {
-	total: number;
+	total?: number | null;
+	next_cursor?: string | null;
 	items: Activity[];
 }
 
@@ -30,6 +31,33 @@ export async function getMyActivityFeed(
 	return response.json();
 }
 
+/**
+ * Get activity on every list the current user owns or has been shared,
+ * newest first. Pass next_cursor from the previous page to continue.
+ */
+export async function getMyListsActivityFeed(
+	cursor?: string | null,
+	limit: number = 50
+): Promise<ActivityFeedResponse> {
+	const params = new URLSearchParams({ limit: String(limit) });
+	if (cursor) {
+		params.set('cursor', cursor);
+	}
+	const response = await fetch(
+		`${API_URL}/activity/lists?${params}`,
+		{
+			headers: getAuthHeaders(),
+		}
+	);
+
+	if (!response.ok) {
+		const error = await response.json();
+		throw new Error(error.detail || 'Failed to fetch activity feed');
+	}
+
+	return response.json();
+}
+
 /**
  * Get activity feed for a specific list
  */
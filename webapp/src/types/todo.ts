@@ -134,6 +134,7 @@ export interface TodoCreate {
 export interface TodoUpdate {
 	name?: string;
 	description?: string | null;
+	due_date?: string;
 	status?: TodoStatus;
 	priority?: TodoPriority;
 	tag_ids?: number[];